@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Check generated lesson audio against its text with whisper.
+
+MP3s are decoded to 16 kHz mono by ffmpeg in worker processes while
+whisper transcribes earlier files in batches on CPU. Each transcript is
+scored by word error rate against the expected text: the lesson script
+in metadata.json or, for files it does not list, the prompt spelled out
+in the file name. Files with a high WER or an empty transcript are
+reported as suspect, as are files ffmpeg cannot decode (corrupt or
+truncated MP3s). Transcripts are cached by file content hash and
+model, so a rerun only transcribes new or changed audio.
+
+Usage:
+    python asr_qa.py                                  # audio/ielts-lessons, whisper-tiny.en
+    python asr_qa.py --model whisper-small.en --threshold 0.15
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from tts_backends import configure_threads
+from tts_encoding import find_ffmpeg
+
+ROOT = Path(__file__).resolve().parent
+AUDIO_DIR = ROOT / 'audio' / 'ielts-lessons'
+MODELS_DIR = ROOT / 'models' / 'Xenova'
+MODELS = ['whisper-tiny.en', 'whisper-small.en']
+
+SAMPLE_RATE = 16000
+# Whisper sees 30 s windows; longer files are transcribed in pieces
+SEGMENT_SECONDS = 30
+DEFAULT_THRESHOLD = 0.25
+
+CACHE_NAME = '.asr-cache.json'
+REPORT_NAME = 'asr-report.json'
+
+NUMBER_PREFIX_RE = re.compile(r'^\d+[-_ ]*')
+WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def text_from_filename(name):
+    """01-What-kind-of-music-do-you-like.mp3 -> What kind of music do you like"""
+    return NUMBER_PREFIX_RE.sub('', Path(name).stem).replace('-', ' ').replace('_', ' ')
+
+
+def expected_texts(audio_dir):
+    """{file name: (topic, script text)} from metadata.json, if present."""
+    metadata = Path(audio_dir) / 'metadata.json'
+    if not metadata.exists():
+        return {}
+    with open(metadata, 'r', encoding='utf-8') as f:
+        return {entry['filename']: (entry.get('topic', ''), entry.get('text', ''))
+                for entry in json.load(f)}
+
+
+def decode(path):
+    """Worker: decode one audio file to 16 kHz mono float32 samples."""
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError("decoding needs ffmpeg on PATH (or FFMPEG_BINARY)")
+    result = subprocess.run(
+        [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-i', str(path),
+         '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+        capture_output=True
+    )
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(message[-1] if message else 'ffmpeg failed')
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def decode_all(paths, workers):
+    """
+    Yield (path, samples, error) in order, keeping only a few decodes ahead.
+    A file that fails to decode comes back with samples None and the error.
+    """
+    # spawn: the parent holds torch's threads, which fork does not copy safely
+    context = multiprocessing.get_context('spawn')
+    def finished(path, future):
+        try:
+            return path, future.result(), None
+        except Exception as e:
+            return path, None, e
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        window = deque()
+        for path in paths:
+            window.append((path, pool.submit(decode, path)))
+            if len(window) >= workers * 2:
+                yield finished(*window.popleft())
+        while window:
+            yield finished(*window.popleft())
+
+
+def load_spelling(model_dir):
+    """British -> American spelling map shipped with the whisper tokenizer."""
+    normalizer = Path(model_dir) / 'normalizer.json'
+    if not normalizer.exists():
+        return {}
+    with open(normalizer, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def words(text, spelling=None):
+    """Lowercase words without punctuation, with spelling variants unified."""
+    tokens = WORD_RE.findall(text.lower().replace('’', "'"))
+    if spelling:
+        tokens = [spelling.get(token, token) for token in tokens]
+    return tokens
+
+
+def word_error_rate(reference, hypothesis):
+    """(substitutions + deletions + insertions) / reference length."""
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+class Transcriber:
+    """
+    Batched whisper transcription on CPU.
+
+    The processor (feature extractor and tokenizer) comes from the
+    vendored models/Xenova/<model> configs; those directories hold no
+    PyTorch weights, so the model is loaded from the checkpoint their
+    config was exported from (openai/<model>).
+    """
+
+    def __init__(self, model_name, threads=None):
+        import torch
+        from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+        model_dir = MODELS_DIR / model_name
+        with open(model_dir / 'config.json', 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f).get('_name_or_path', f'openai/{model_name}')
+
+        self.torch = torch
+        self.threads = configure_threads(threads)
+        self.processor = WhisperProcessor.from_pretrained(model_dir)
+        self.model = WhisperForConditionalGeneration.from_pretrained(checkpoint).eval()
+
+    def transcribe(self, waveforms):
+        """One transcript per waveform; long ones are cut into 30 s segments."""
+        segment = SEGMENT_SECONDS * SAMPLE_RATE
+        pieces, owners = [], []
+        for index, waveform in enumerate(waveforms):
+            for start in range(0, max(len(waveform), 1), segment):
+                pieces.append(waveform[start:start + segment])
+                owners.append(index)
+
+        features = self.processor(pieces, sampling_rate=SAMPLE_RATE,
+                                  return_tensors='pt').input_features
+        with self.torch.inference_mode():
+            generated = self.model.generate(features)
+        texts = self.processor.batch_decode(generated, skip_special_tokens=True)
+
+        transcripts = [[] for _ in waveforms]
+        for owner, text in zip(owners, texts):
+            transcripts[owner].append(text.strip())
+        return [' '.join(parts) for parts in transcripts]
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def decode_failure(name, error):
+    """Report entry for a file that could not be decoded."""
+    return {
+        'file': name,
+        'wer': 1.0,
+        'expected_from': None,
+        'expected': '',
+        'transcript': '',
+        'suspect': True,
+        'reasons': [f'decode failed: {error}'],
+    }
+
+
+def score(name, transcript, expected, spelling, threshold):
+    """Report entry for one file."""
+    topic, script = expected.get(name, ('', ''))
+    hypothesis = words(transcript, spelling)
+    if script:
+        # The prompt may or may not be read out before the answer
+        references = [script, f'{topic} {script}'] if topic else [script]
+        source = 'metadata'
+    else:
+        references = [text_from_filename(name)]
+        source = 'filename'
+    wer = min(word_error_rate(words(reference, spelling), hypothesis) for reference in references)
+
+    reasons = []
+    if not hypothesis:
+        reasons.append('empty transcript')
+    elif wer > threshold:
+        reasons.append(f'WER {wer:.0%} above {threshold:.0%}')
+    return {
+        'file': name,
+        'wer': round(wer, 4),
+        'expected_from': source,
+        'expected': references[0],
+        'transcript': transcript,
+        'suspect': bool(reasons),
+        'reasons': reasons,
+    }
+
+
+def run_qa(audio_dir=AUDIO_DIR, model_name=MODELS[0], workers=None, batch_size=8,
+           threshold=DEFAULT_THRESHOLD, threads=None, force=False):
+    """Transcribe changed files, score all of them and return the report."""
+    audio_dir = Path(audio_dir)
+    paths = sorted(audio_dir.glob('*.mp3'))
+    expected = expected_texts(audio_dir)
+    spelling = load_spelling(MODELS_DIR / model_name)
+    cache_path = audio_dir / CACHE_NAME
+    cache = {} if force else load_cache(cache_path)
+
+    hashes = {path.name: file_hash(path) for path in paths}
+    todo = [
+        path for path in paths
+        if cache.get(path.name, {}).get('hash') != hashes[path.name]
+        or cache[path.name].get('model') != model_name
+    ]
+    print(f"{len(paths)} files, {len(paths) - len(todo)} cached, {len(todo)} to transcribe "
+          f"with {model_name}")
+
+    start = time.perf_counter()
+    failures = {}
+    if todo:
+        if find_ffmpeg() is None:
+            raise RuntimeError("decoding needs ffmpeg on PATH (or FFMPEG_BINARY)")
+        transcriber = Transcriber(model_name, threads)
+        batch = []
+        done = 0
+
+        def flush():
+            nonlocal done
+            transcripts = transcriber.transcribe([samples for _, samples in batch])
+            for (path, samples), transcript in zip(batch, transcripts):
+                cache[path.name] = {
+                    'hash': hashes[path.name],
+                    'model': model_name,
+                    'duration_s': round(len(samples) / SAMPLE_RATE, 2),
+                    'transcript': transcript,
+                }
+            done += len(batch)
+            batch.clear()
+            save_cache(cache_path, cache)  # an interrupted run keeps its progress
+            elapsed = time.perf_counter() - start
+            print(f"  {done}/{len(todo)} transcribed ({done / elapsed:.2f} files/s)")
+
+        for path, samples, error in decode_all(todo, workers or max(1, (os.cpu_count() or 2) // 2)):
+            if error is not None:
+                # Not cached: a fixed file with the same name is decoded next run
+                failures[path.name] = error
+                print(f"  ✗ {path.name}: decode failed: {error}")
+                continue
+            batch.append((path, samples))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    files = [
+        decode_failure(path.name, failures[path.name]) if path.name in failures
+        else score(path.name, cache[path.name]['transcript'], expected, spelling, threshold)
+        for path in paths
+    ]
+    files.sort(key=lambda entry: entry['wer'], reverse=True)
+    present = {path.name for path in paths}
+    return {
+        'model': model_name,
+        'threshold': threshold,
+        'files': len(files),
+        'transcribed': len(todo) - len(failures),
+        'decode_failures': len(failures),
+        'seconds': round(time.perf_counter() - start, 1),
+        'mean_wer': round(sum(entry['wer'] for entry in files) / len(files), 4) if files else 0.0,
+        'suspects': sum(entry['suspect'] for entry in files),
+        'missing_audio': sorted(name for name in expected if name not in present),
+        'results': files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--audio-dir', default=str(AUDIO_DIR), help='directory of MP3s')
+    parser.add_argument('--model', choices=MODELS, default=MODELS[0])
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='WER above which a file is suspect (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=8, help='files per whisper batch')
+    parser.add_argument('--workers', type=int, help='decoder processes (default: half the CPUs)')
+    parser.add_argument('--threads', type=int, help='torch threads for whisper')
+    parser.add_argument('--report', help=f'report JSON (default: <audio-dir>/{REPORT_NAME})')
+    parser.add_argument('--force', action='store_true', help='ignore cached transcripts')
+    args = parser.parse_args()
+
+    report = run_qa(args.audio_dir, args.model, args.workers, args.batch_size,
+                    args.threshold, args.threads, args.force)
+
+    report_path = args.report or str(Path(args.audio_dir) / REPORT_NAME)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\nMean WER {report['mean_wer']:.1%} over {report['files']} files; "
+          f"report written to {report_path}")
+    for name in report['missing_audio']:
+        print(f"  ✗ {name}: listed in metadata.json but missing")
+    suspects = [entry for entry in report['results'] if entry['suspect']]
+    if not suspects:
+        print(f"✓ No suspect files at WER threshold {args.threshold:.0%}")
+        return
+
+    print(f"\n❌ {len(suspects)} suspect files:")
+    for entry in suspects:
+        print(f"  {entry['file']}: {', '.join(entry['reasons'])}\n"
+              f"    heard: {entry['transcript'][:100]}")
+    raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Benchmark the translation and TTS hot paths.
+
+Synthetic corpora scale data/to-translate.json to 1k, 10k and 100k items;
+each translator runs its full load/translate/dump cycle over them, and
+the TTS server's synthesis path runs over a fixed Vietnamese sentence set.
+Every case runs in a fresh process so peak RSS is its own. Results are
+written as JSON and compared against a stored baseline: any metric worse
+than the tolerance fails the run, and so does a missing baseline.
+
+Usage:
+    python benchmark.py                          # all cases, compare to baseline
+    python benchmark.py --sizes 1000 --skip-tts
+    python benchmark.py --save-baseline          # record the current numbers
+"""
+
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SOURCE_CORPUS = ROOT / 'data' / 'to-translate.json'
+RESULTS_DIR = ROOT / 'benchmarks'
+DEFAULT_BASELINE = RESULTS_DIR / 'baseline.json'
+DEFAULT_RESULTS = RESULTS_DIR / 'latest.json'
+
+TRANSLATORS = ['full_translator', 'translate_vocab', 'comprehensive_translate']
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Every Nth synthetic item gets an edited sentence, so the miss path runs too
+MISS_EVERY = 10
+
+# Metric -> True if higher is better
+METRICS = {
+    'items_per_s': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'peak_rss_mb': False,
+    'rtf': False,
+}
+
+# Changes smaller than these are timer/allocator noise, whatever the ratio
+NOISE_FLOOR = {
+    'p50_ms': 0.05,
+    'p95_ms': 0.05,
+    'peak_rss_mb': 5,
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def make_corpus(size, path, source=SOURCE_CORPUS):
+    """
+    Cycle the source items up to size with unique ids; every MISS_EVERY-th
+    copy has its sentences edited so it misses the translation memory.
+    """
+    with open(source, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    items = []
+    for i in range(size):
+        item = dict(base[i % len(base)])
+        copy = i // len(base)
+        item['id'] = f"{item['id']}~{copy}" if copy else item['id']
+        item['vietnameseDefinition'] = ''
+        item['vietnameseExample'] = ''
+        if i % MISS_EVERY == MISS_EVERY - 1:
+            for field in ('englishDefinition', 'englishExample'):
+                if item.get(field):
+                    item[field] = f"{item[field].rstrip('.')} in practice."
+        items.append(item)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def translator_item_function(name):
+    """The per-item translate function each translator hands to run_translation."""
+    module = importlib.import_module(name)
+    if name == 'comprehensive_translate':
+        translations = module.load_translations()
+        return lambda item: module.translate_item(item, translations)
+    return module.translate_item
+
+
+def run_translation_case(translator, input_file, output_file):
+    """Child process: one full translator run, with per-item latencies."""
+    from translation_pipeline import run_translation
+
+    translate_item = translator_item_function(translator)
+    latencies = []
+
+    def timed(item):
+        start = time.perf_counter()
+        result = translate_item(item)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        translated = run_translation(timed, input_file, output_file, translator=translator,
+                                     force=True)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'items': len(latencies),
+        'translated': translated,
+        'seconds': round(elapsed, 3),
+        'items_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def load_tts_module():
+    spec = importlib.util.spec_from_file_location('vietnamese_tts_mms', ROOT / 'vietnamese-tts-mms.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_tts_case(backend, repeats):
+    """
+    Child process: generate_speech latency over the sentence set (all cache
+    misses, through the batcher and WAV encoding) and real-time factor of
+    the forward pass alone.
+    """
+    from tts_backends import BENCHMARK_SENTENCES
+
+    os.environ['TTS_CACHE_DIR'] = tempfile.mkdtemp(prefix='tts-bench-cache-')
+    tts = load_tts_module()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tts.load_model(backend=backend)
+        tts.warm_up()
+
+        latencies = []
+        for sentence in BENCHMARK_SENTENCES:
+            start = time.perf_counter()
+            audio_file, _ = tts.generate_speech(sentence)
+            latencies.append(time.perf_counter() - start)
+            if audio_file is None:
+                raise RuntimeError(f"generate_speech failed for {sentence!r}")
+
+        synthesis_s = audio_s = 0.0
+        sample_rate = tts.model.config.sampling_rate
+        for _ in range(repeats):
+            for sentence in BENCHMARK_SENTENCES:
+                start = time.perf_counter()
+                waveform, = tts.synthesize_batch([sentence], [tts.SEED])
+                synthesis_s += time.perf_counter() - start
+                audio_s += len(waveform) / sample_rate
+
+    return {
+        'sentences': len(BENCHMARK_SENTENCES),
+        'items_per_s': round(len(latencies) / sum(latencies), 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'rtf': round(synthesis_s / audio_s, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def run_child(*args):
+    """Run one case in a fresh interpreter; returns its JSON result."""
+    result = subprocess.run(
+        [sys.executable, __file__, '_case', *map(str, args)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                           f"exit code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def selected(case, args):
+    """Whether this run's options cover a case name from the baseline."""
+    kind, *parts = case.split('/')
+    if kind == 'translate':
+        translator, size = parts
+        return translator in args.translators and int(size) in args.sizes
+    if kind == 'tts':
+        return not args.skip_tts and parts == [args.tts_backend]
+    return True
+
+
+def compare(results, baseline, tolerance, expected=None):
+    """
+    Metrics worse than baseline by more than tolerance, as messages. A case
+    that failed in this run is one too, unless it was skipped the same way
+    in the baseline, and so is a baseline case in expected (default: all
+    of them) that this run did not produce.
+    """
+    regressions = []
+    baseline_cases = baseline.get('cases', {})
+    for case in sorted(baseline_cases if expected is None else expected):
+        if case not in results['cases']:
+            regressions.append(f"{case}: in the baseline but not run")
+
+    for case, metrics in results['cases'].items():
+        previous = baseline_cases.get(case)
+        if 'error' in metrics:
+            skipped = metrics['error'].startswith('skipped:')
+            if not (skipped and previous and previous.get('error') == metrics['error']):
+                regressions.append(f"{case}: {metrics['error']}")
+            continue
+        if not previous or 'error' in previous:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            if abs(new - old) < NOISE_FLOOR.get(metric, 0):
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append(f"{case} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='synthetic corpus sizes (default: 1000 10000 100000)')
+    parser.add_argument('--translators', nargs='+', choices=TRANSLATORS, default=TRANSLATORS)
+    parser.add_argument('--skip-tts', action='store_true', help='skip the TTS benchmark')
+    parser.add_argument('--tts-backend', default='fp32', help='backend for the TTS case')
+    parser.add_argument('--tts-repeats', type=int, default=3)
+    parser.add_argument('--output', default=str(DEFAULT_RESULTS), help='results JSON')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='baseline JSON')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative regression per metric (default: 0.25)')
+    args = parser.parse_args()
+
+    # Checked up front: a run with nothing to compare against must not pass
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline}; run with --save-baseline to create one")
+        sys.exit(1)
+
+    from translation_memory import ensure_store
+    ensure_store()  # built once here, not timed inside a case
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'cases': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix='vocab-bench-') as work_dir:
+        for size in args.sizes:
+            corpus = make_corpus(size, Path(work_dir) / f'corpus-{size}.json')
+            for translator in args.translators:
+                case = f'translate/{translator}/{size}'
+                output = Path(work_dir) / f'{translator}-{size}.json'
+                try:
+                    metrics = run_child('translate', translator, corpus, output)
+                except RuntimeError as e:
+                    metrics = {'error': str(e)}
+                results['cases'][case] = metrics
+                print(f"{case}: " + (metrics.get('error') or
+                      f"{metrics['items_per_s']:.0f} items/s, p50 {metrics['p50_ms']:.3f}ms, "
+                      f"p95 {metrics['p95_ms']:.3f}ms, peak RSS {metrics['peak_rss_mb']:.0f}MB"))
+
+    if not args.skip_tts:
+        case = f'tts/{args.tts_backend}'
+        if importlib.util.find_spec('torch') is None:
+            metrics = {'error': 'skipped: torch is not installed'}
+        else:
+            try:
+                metrics = run_child('tts', args.tts_backend, args.tts_repeats)
+            except RuntimeError as e:
+                metrics = {'error': str(e)}
+        results['cases'][case] = metrics
+        print(f"{case}: " + (metrics.get('error') or
+              f"p50 {metrics['p50_ms']:.0f}ms, p95 {metrics['p95_ms']:.0f}ms, "
+              f"RTF {metrics['rtf']:.3f}, peak RSS {metrics['peak_rss_mb']:.0f}MB"))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    expected = [case for case in baseline.get('cases', {}) if selected(case, args)]
+    regressions = compare(results, baseline, args.tolerance, expected)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"✓ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+def case_main(kind, *args):
+    if kind == 'translate':
+        result = run_translation_case(*args)
+    elif kind == 'tts':
+        result = run_tts_case(args[0], int(args[1]))
+    else:
+        raise SystemExit(f"unknown case {kind}")
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '_case':
+        case_main(*sys.argv[2:])
+    else:
+        main()
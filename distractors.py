@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Precompute quiz distractors for every word in the corpus and word lists.
+
+Candidates for an entry are the other entries of its group: the item
+type for data/translated.json, the first part-of-speech tag for the
+vocablist/ lists. Answers are embedded as L2-normalized hashed character
+trigram counts, and each group is ranked in blocks of one matrix
+product: trigram cosine plus length ratio, with a bonus for the same
+fileId (or word list). The top k per entry are kept for both question
+directions, English answers (headwords) and Vietnamese answers
+(translations), and written as one compact table, so a quiz asks for
+its wrong answers in O(1) instead of comparing against the whole list.
+
+Usage:
+    python distractors.py                            # -> data/distractors.json
+    python distractors.py --k 5 --lookup flood
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # reported by main(); nothing else here runs without it
+    np = None
+
+from json_stream import iter_json_array
+from vocab_store import normalize_headword, shared_store
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+DEFAULT_INPUT = DATA_DIR / 'translated.json'
+DEFAULT_OUTPUT = DATA_DIR / 'distractors.json'
+
+DIRECTIONS = ['en', 'vi']
+DEFAULT_K = 3
+NGRAM = 3
+DIMENSIONS = 1 << 10
+# Score = NGRAM_WEIGHT * trigram cosine + LENGTH_WEIGHT * length ratio (+ SAME_FILE_BONUS)
+NGRAM_WEIGHT = 0.7
+LENGTH_WEIGHT = 0.3
+SAME_FILE_BONUS = 0.1
+BLOCK_ROWS = 1024
+
+
+class Entry:
+    """One quiz word: its key, group, file and the answer in each direction."""
+
+    __slots__ = ('key', 'group', 'file', 'en', 'vi')
+
+    def __init__(self, key, group, file, en, vi):
+        self.key = key
+        self.group = group
+        self.file = file
+        self.en = en
+        self.vi = vi
+
+
+def corpus_entries(path=DEFAULT_INPUT):
+    """Items of a translated file, keyed by id and grouped by type."""
+    for item in iter_json_array(path):
+        word = (item.get('word') or '').strip()
+        translation = (item.get('vietnameseDefinition') or '').strip()
+        if word and translation:
+            yield Entry(item['id'], f"type:{item.get('type', '')}", item.get('fileId', ''),
+                        word, translation)
+
+
+def vocab_entries(store=None):
+    """Word-list lines, keyed by list:line and grouped by first part of speech."""
+    store = store or shared_store()
+    for source, (first, end) in store.by_source.items():
+        for index in range(first, end):
+            entry = store.entry(index)
+            pos = entry.pos[0] if entry.pos else ''
+            yield Entry(f"{source}:{entry.line}", f"pos:{pos}", source,
+                        entry.headword, entry.translation)
+
+
+def trigram_matrix(texts, n=NGRAM, dimensions=DIMENSIONS):
+    """L2-normalized hashed character n-gram counts, one float32 row per text."""
+    rows, columns = [], []
+    for row, text in enumerate(texts):
+        text = f" {' '.join(text.lower().split())} "
+        grams = [text[i:i + n] for i in range(max(len(text) - n + 1, 1))]
+        rows += [row] * len(grams)
+        columns += [zlib.crc32(gram.encode('utf-8')) % dimensions for gram in grams]
+
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), 1.0)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+    return matrix
+
+
+def rank(texts, files, k, block_rows=BLOCK_ROWS):
+    """
+    Top-k candidate rows per row of one group, best first, as an int array
+    (-1 where the group has fewer than k other answers). Candidates with
+    the same normalized answer are never chosen: they would be correct.
+    """
+    count = len(texts)
+    top = np.full((count, k), -1, dtype=np.int64)
+    if count < 2:
+        return top
+
+    normalized = [normalize_headword(text) for text in texts]
+    answer_codes = {}
+    answer = np.array([answer_codes.setdefault(text, len(answer_codes)) for text in normalized])
+    file_codes = {}
+    file = np.array([file_codes.setdefault(name, len(file_codes)) for name in files])
+    lengths = np.array([len(text) for text in normalized], dtype=np.float32)
+    vectors = trigram_matrix(normalized)
+    # Words repeated across lists share an answer; fetch extra so k distinct ones remain
+    keep = min(k * 4, count - 1)
+
+    # Blocks bound the similarity matrix at block_rows x count
+    for start in range(0, count, block_rows):
+        stop = min(start + block_rows, count)
+        scores = NGRAM_WEIGHT * (vectors[start:stop] @ vectors.T)
+        block_lengths = lengths[start:stop, None]
+        scores += LENGTH_WEIGHT * (np.minimum(block_lengths, lengths) /
+                                   np.maximum(np.maximum(block_lengths, lengths), 1))
+        scores += SAME_FILE_BONUS * (file[start:stop, None] == file)
+        scores[answer[start:stop, None] == answer] = -np.inf
+
+        best = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        valid = np.take_along_axis(best_scores, order, axis=1) > -np.inf
+
+        for offset, (candidates, usable) in enumerate(zip(best.tolist(), valid.tolist())):
+            seen = set()
+            picks = []
+            for candidate, ok in zip(candidates, usable):
+                if ok and answer[candidate] not in seen:
+                    seen.add(answer[candidate])
+                    picks.append(candidate)
+                    if len(picks) == k:
+                        break
+            top[start + offset, :len(picks)] = picks
+    return top
+
+
+def build_index(entries, k=DEFAULT_K):
+    """
+    The lookup table: keys and answers as parallel lists, and per direction
+    one list of k row numbers per entry, pointing into those lists.
+    """
+    entries = list(entries)
+    groups = {}
+    for row, entry in enumerate(entries):
+        groups.setdefault(entry.group, []).append(row)
+
+    distractors = {direction: [[] for _ in entries] for direction in DIRECTIONS}
+    for rows in groups.values():
+        rows_array = np.array(rows, dtype=np.int64)
+        files = [entries[row].file for row in rows]
+        for direction in DIRECTIONS:
+            top = rank([getattr(entries[row], direction) for row in rows], files, k)
+            for row, picks in zip(rows, top.tolist()):
+                picks = [pick for pick in picks if pick >= 0]
+                distractors[direction][row] = rows_array[picks].tolist()
+
+    return {
+        'version': 1,
+        'k': k,
+        'keys': [entry.key for entry in entries],
+        'en': [entry.en for entry in entries],
+        'vi': [entry.vi for entry in entries],
+        'distractors': distractors,
+    }
+
+
+def save_index(index, path=DEFAULT_OUTPUT):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+class DistractorIndex:
+    """A built table with O(1) lookups by entry key or headword."""
+
+    def __init__(self, index):
+        self.index = index
+        self.rows = {key: row for row, key in enumerate(index['keys'])}
+        self.by_word = {}
+        for row, word in enumerate(index['en']):
+            self.by_word.setdefault(normalize_headword(word), []).append(row)
+
+    @classmethod
+    def load(cls, path=DEFAULT_OUTPUT):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def distractors(self, key, direction='vi'):
+        """Wrong answers for the entry with this key, most plausible first."""
+        row = self.rows[key]
+        return [self.index[direction][pick] for pick in self.index['distractors'][direction][row]]
+
+    def keys_for(self, word):
+        return [self.index['keys'][row] for row in self.by_word.get(normalize_headword(word), ())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default=str(DEFAULT_INPUT), help='translated item file')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='distractor table')
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help='distractors per entry')
+    parser.add_argument('--no-vocablist', action='store_true', help='skip the vocablist/ lists')
+    parser.add_argument('--lookup', metavar='WORD', help='print the distractors of WORD')
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ NumPy is required for ranking. Install with:\n  pip install numpy")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    entries = list(corpus_entries(args.input))
+    if not args.no_vocablist:
+        entries += vocab_entries()
+    index = build_index(entries, args.k)
+    save_index(index, args.output)
+    elapsed = time.perf_counter() - start
+
+    groups = len({entry.group for entry in entries})
+    print(f"{len(entries)} entries in {groups} groups, top {args.k} distractors each "
+          f"({elapsed * 1000:.0f} ms); written to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f}KB)")
+
+    if args.lookup:
+        lookup = DistractorIndex(index)
+        keys = lookup.keys_for(args.lookup)
+        for key in keys:
+            row = lookup.rows[key]
+            print(f"\n{key}: {index['en'][row]} = {index['vi'][row]}")
+            for direction in DIRECTIONS:
+                print(f"  {direction}: " + ' | '.join(lookup.distractors(key, direction)))
+        if not keys:
+            print("(not found)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Export the translated corpus as per-topic shards for the static front-ends.
+
+Items are grouped by fileId and each group is written as minified JSON,
+either as an item array (rows) or as one array per field (columnar,
+smaller and faster to parse for wide topics). Every shard is named after
+its content hash, e.g. academic-grouping.3f9c2a1b.json, and gets gzip
+and (with the brotli package) brotli siblings for servers that serve
+precompressed files (nginx gzip_static/brotli_static and the like).
+index.json lists the shards with their hashes and sizes; clients fetch
+it fresh and the shard they need, which can be cached forever.
+
+Usage:
+    python export_shards.py                          # data/translated.json -> data/shards/
+    python export_shards.py --format columnar --fields id word vietnameseDefinition
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # gzip siblings are still written
+    brotli = None
+
+from json_stream import iter_json_array
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+DEFAULT_INPUT = DATA_DIR / 'translated.json'
+DEFAULT_OUTPUT = DATA_DIR / 'shards'
+MANIFEST_NAME = 'index.json'
+FORMATS = ['rows', 'columnar']
+
+HASH_LENGTH = 8
+SHARD_NAME_RE = re.compile(r'^(?P<name>.+)\.(?P<hash>[0-9a-f]{%d})\.json(\.gz|\.br)?$' % HASH_LENGTH)
+UNSAFE_NAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def minified(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def group_items(path, fields=None):
+    """{fileId: [item, ...]} in first-seen order, optionally keeping only fields."""
+    groups = {}
+    for item in iter_json_array(path):
+        # Grouped before projecting, so fileId need not be among the fields
+        file_id = item.get('fileId') or '_'
+        if fields:
+            item = {field: item[field] for field in fields if field in item}
+        groups.setdefault(file_id, []).append(item)
+    return groups
+
+
+def encode_shard(items, fmt):
+    """Minified bytes of one shard."""
+    if fmt == 'rows':
+        return minified(items)
+
+    fields = []
+    for item in items:
+        fields += [field for field in item if field not in fields]
+    return minified({
+        'fields': fields,
+        'columns': [[item.get(field) for item in items] for field in fields],
+    })
+
+
+def write_atomic(path, data):
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_shard(output_dir, file_id, data):
+    """Write the shard and its compressed siblings unless already there. Returns its entry."""
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{UNSAFE_NAME_RE.sub('-', file_id)}.{digest[:HASH_LENGTH]}.json"
+    path = output_dir / name
+    entry = {'file': name, 'sha256': digest, 'bytes': len(data)}
+
+    # Content-addressed: an existing file with this name has these bytes
+    if not path.exists():
+        write_atomic(path, data)
+    gz_path = path.with_name(f'{name}.gz')
+    if not gz_path.exists():
+        write_atomic(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    entry['gzip'] = gz_path.stat().st_size
+
+    if brotli is not None:
+        br_path = path.with_name(f'{name}.br')
+        if not br_path.exists():
+            write_atomic(br_path, brotli.compress(data, quality=11))
+        entry['br'] = br_path.stat().st_size
+    return entry
+
+
+def prune(output_dir, keep):
+    """Remove shard files not referenced by the new manifest. Returns how many."""
+    removed = 0
+    for path in output_dir.iterdir():
+        match = SHARD_NAME_RE.match(path.name)
+        if match and f"{match.group('name')}.{match.group('hash')}.json" not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def export(input_file=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT, fmt='rows', fields=None,
+           workers=4, keep_stale=False):
+    """Write every shard and index.json; returns the manifest."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    groups = group_items(input_file, fields)
+
+    # Compression dominates and releases the GIL, so threads overlap it
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            file_id: pool.submit(write_shard, output_dir, file_id, encode_shard(items, fmt))
+            for file_id, items in groups.items()
+        }
+        shards = {}
+        for file_id, future in futures.items():
+            shards[file_id] = {**future.result(), 'items': len(groups[file_id])}
+
+    manifest = {
+        'version': 1,
+        'format': fmt,
+        'source': Path(input_file).name,
+        'items': sum(len(items) for items in groups.values()),
+        'compression': ['gzip'] + (['br'] if brotli is not None else []),
+        'shards': shards,
+    }
+    write_atomic(output_dir / MANIFEST_NAME, minified(manifest))
+    if not keep_stale:
+        manifest['pruned'] = prune(output_dir, {entry['file'] for entry in shards.values()})
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default=str(DEFAULT_INPUT), help='translated item file')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT), help='shard directory')
+    parser.add_argument('--format', choices=FORMATS, default='rows',
+                        help='item arrays or one array per field (default: rows)')
+    parser.add_argument('--fields', nargs='+', help='only export these item fields')
+    parser.add_argument('--workers', type=int, default=4, help='compression threads')
+    parser.add_argument('--keep-stale', action='store_true',
+                        help='keep shard files from earlier exports')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = export(args.input, args.output_dir, args.format, args.fields,
+                      args.workers, args.keep_stale)
+    elapsed = time.perf_counter() - start
+
+    shards = manifest['shards'].values()
+    if not shards:
+        print(f"No items in {args.input}; wrote an empty index to {args.output_dir}")
+        return
+    raw = sum(entry['bytes'] for entry in shards)
+    print(f"Exported {manifest['items']} items into {len(shards)} shards in {args.output_dir} "
+          f"({elapsed * 1000:.0f} ms)")
+    print(f"  {os.path.getsize(args.input) / 1024:.0f}KB source -> {raw / 1024:.0f}KB minified, "
+          f"{sum(entry['gzip'] for entry in shards) / 1024:.0f}KB gzip"
+          + (f", {sum(entry['br'] for entry in shards) / 1024:.0f}KB brotli"
+             if brotli is not None else " (pip install brotli for .br files)"))
+    print(f"  largest shard {max(entry['bytes'] for entry in shards) / 1024:.1f}KB, "
+          f"{manifest.get('pruned', 0)} stale files removed")
+
+
+if __name__ == '__main__':
+    main()
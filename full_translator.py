@@ -4,186 +4,76 @@ Full Vietnamese translator for 933 IELTS vocabulary items.
 Provides comprehensive, context-aware translations.
 """
 
-import json
-import re
+from translation_memory import TranslationMemory, shared_store
+from translation_pipeline import parse_args, run_translation
+
+# Literal sentences live in the shared on-disk store (data/translation-memory.sqlite)
+definition_memory = None
+example_memory = None
+
+def get_memories():
+    """Build both memories on first use; lookups no longer scale with the table size."""
+    global definition_memory, example_memory
+
+    if definition_memory is None:
+        store = shared_store()
+        definition_memory = TranslationMemory(store=store)
+        example_memory = TranslationMemory(store=store)
+    return definition_memory, example_memory
 
 def translate_definition(text, context=None):
     """Translate English definition to Vietnamese."""
-
-    # Common patterns in definitions
-    patterns = {
-        r'^Dividing students into groups based on their academic ability\.$':
-            'Phân chia học sinh thành các nhóm dựa trên năng lực học tập.',
-        r'^Classes containing students with varying academic performance levels\.$':
-            'Các lớp học có học sinh với nhiều trình độ học tập khác nhau.',
-        r'^The level of achievement in educational tasks and assessments\.$':
-            'Mức độ đạt được trong các nhiệm vụ giáo dục và đánh giá.',
-        r'^The speed at which a student acquires new knowledge\.$':
-            'Tốc độ mà học sinh tiếp thu kiến thức mới.',
-        r'^Fair access to quality education for all students\.$':
-            'Quyền tiếp cận công bằng với giáo dục chất lượng cho tất cả học sinh.',
-        r'^Education that occurs through interaction among students\.$':
-            'Giáo dục diễn ra thông qua tương tác giữa các học sinh.',
-        r'^Special educational programs for academically talented students\.$':
-            'Các chương trình giáo dục đặc biệt dành cho học sinh có năng khiếu học thuật.',
-        r'^Educational approach integrating students of all abilities\.$':
-            'Phương pháp giáo dục tích hợp học sinh ở mọi trình độ.',
-        r'^Disparity in educational performance between student groups\.$':
-            'Sự chênh lệch về kết quả học tập giữa các nhóm học sinh.',
-        r'^Teaching customized to specific student needs\.$':
-            'Phương pháp giảng dạy được tùy chỉnh theo nhu cầu cụ thể của học sinh.',
-        r'^The process of different groups mixing and interacting\.$':
-            'Quá trình các nhóm khác nhau hòa nhập và tương tác với nhau.',
-        r'^Confidence in one\'s own worth and abilities\.$':
-            'Sự tự tin về giá trị và năng lực của bản thân.',
-
-        # Adult illiteracy
-        r'^The ability to read and write well enough for everyday tasks\.$':
-            'Khả năng đọc và viết đủ để thực hiện các nhiệm vụ hàng ngày.',
-        r'^The availability and opportunity to receive education\.$':
-            'Sự sẵn có và cơ hội để tiếp cận giáo dục.',
-        r'^Available job positions and career possibilities\.$':
-            'Các vị trí việc làm và cơ hội nghề nghiệp hiện có.',
-        r'^Being shut out from participating fully in society\.$':
-            'Bị loại trừ khỏi việc tham gia đầy đủ vào xã hội.',
-        r'^The ability to use computers and digital technology effectively\.$':
-            'Khả năng sử dụng máy tính và công nghệ số một cách hiệu quả.',
-        r'^To support financially, typically by government\.$':
-            'Hỗ trợ tài chính, thường là từ chính phủ.',
-        r'^Exposed to harm or exploitation\.$':
-            'Dễ bị tổn hại hoặc bóc lột.',
-        r'^Learning courses designed specifically for grown-up students\.$':
-            'Các khóa học được thiết kế đặc biệt cho học viên trưởng thành.',
-    }
-
-    # Try pattern matching
-    for pattern, translation in patterns.items():
-        if re.match(pattern, text):
-            return translation
+    translation = get_memories()[0].lookup(text)
+    if translation is not None:
+        return translation
 
     # Generic translation logic based on common structures
     return translate_generic(text)
 
 def translate_example(text, context=None):
     """Translate English example to Vietnamese."""
-
-    patterns = {
-        r'^Streaming allows teachers to tailor instruction to students\' ability levels\.$':
-            'Phân luồng cho phép giáo viên điều chỉnh phương pháp giảng dạy phù hợp với trình độ của học sinh.',
-        r'^Mixed-ability classes promote peer learning and social inclusion\.$':
-            'Các lớp học trình độ hỗn hợp thúc đẩy học tập từ bạn bè và hòa nhập xã hội.',
-        r'^Ability grouping may improve academic performance for high-achieving students\.$':
-            'Phân nhóm theo năng lực có thể cải thiện kết quả học tập cho học sinh giỏi.',
-        r'^Students have different learning paces that teachers must accommodate\.$':
-            'Học sinh có nhịp độ học tập khác nhau mà giáo viên cần phải điều chỉnh phù hợp.',
-        r'^Mixed-ability classes are often promoted to ensure educational equity\.$':
-            'Các lớp học trình độ hỗn hợp thường được khuyến khích để đảm bảo công bằng giáo dục.',
-        r'^Peer learning benefits both high and low achievers in mixed classes\.$':
-            'Học tập từ bạn bè có lợi cho cả học sinh giỏi và kém trong các lớp học hỗn hợp.',
-        r'^Many countries offer gifted programs for high-achieving learners\.$':
-            'Nhiều quốc gia cung cấp các chương trình dành cho học sinh năng khiếu.',
-        r'^Inclusive education emphasizes learning together regardless of ability\.$':
-            'Giáo dục hòa nhập nhấn mạnh việc học cùng nhau bất kể trình độ.',
-        r'^Mixed-ability classes aim to reduce the academic achievement gap\.$':
-            'Các lớp học trình độ hỗn hợp nhằm thu hẹp khoảng cách thành tích học tập.',
-        r'^Ability grouping allows for more tailored instruction\.$':
-            'Phân nhóm theo năng lực cho phép phương pháp giảng dạy được cá nhân hóa hơn.',
-        r'^Mixed classes promote social integration among diverse learners\.$':
-            'Các lớp học hỗn hợp thúc đẩy hòa nhập xã hội giữa những học viên đa dạng.',
-        r'^Being placed in lower streams can damage students\' self-esteem\.$':
-            'Việc được xếp vào các nhóm thấp hơn có thể gây tổn hại đến lòng tự trọng của học sinh.',
-
-        # Adult illiteracy
-        r'^Many jobs today require functional literacy beyond basic reading skills\.$':
-            'Nhiều công việc ngày nay yêu cầu khả năng đọc viết thực dụng vượt xa kỹ năng đọc cơ bản.',
-        r'^Despite improved educational access, some adults missed early learning opportunities\.$':
-            'Mặc dù khả năng tiếp cận giáo dục được cải thiện, một số người lớn đã bỏ lỡ cơ hội học tập sớm.',
-        r'^Illiteracy severely limits employment opportunities in modern economies\.$':
-            'Mù chữ hạn chế nghiêm trọng cơ hội việc làm trong nền kinh tế hiện đại.',
-        r'^Adult illiteracy often leads to social exclusion and isolation\.$':
-            'Mù chữ ở người lớn thường dẫn đến tình trạng bị loại trừ xã hội và cô lập.',
-        r'^Modern adult education programs must include digital literacy training\.$':
-            'Các chương trình giáo dục người lớn hiện đại phải bao gồm đào tạo kỹ năng số.',
-        r'^Governments should subsidize adult education programs to make them affordable\.$':
-            'Chính phủ nên trợ cấp các chương trình giáo dục người lớn để làm cho chúng hợp túi tiền.',
-        r'^Illiterate adults are vulnerable to scams and fraud\.$':
-            'Người lớn mù chữ dễ bị lừa đảo và gian lận.',
-        r'^Governments should expand free adult education programs in community centers\.$':
-            'Chính phủ nên mở rộng các chương trình giáo dục người lớn miễn phí tại các trung tâm cộng đồng.',
-    }
-
-    for pattern, translation in patterns.items():
-        if re.match(pattern, text):
-            return translation
+    translation = get_memories()[1].lookup(text)
+    if translation is not None:
+        return translation
 
     return translate_generic(text)
 
 def translate_generic(text):
     """Generic translation for texts not in predefined patterns."""
 
-    # Word-level translation dictionary
-    vocab = {
-        'student': 'học sinh', 'students': 'học sinh', 'learner': 'học viên', 'learners': 'học viên',
-        'teacher': 'giáo viên', 'teachers': 'giáo viên', 'education': 'giáo dục', 'educational': 'giáo dục',
-        'academic': 'học thuật', 'ability': 'năng lực', 'performance': 'hiệu suất', 'achievement': 'thành tích',
-        'learning': 'học tập', 'knowledge': 'kiến thức', 'skill': 'kỹ năng', 'skills': 'kỹ năng',
-        'society': 'xã hội', 'social': 'xã hội', 'government': 'chính phủ', 'public': 'công cộng',
-        'environment': 'môi trường', 'environmental': 'môi trường', 'technology': 'công nghệ',
-        'health': 'sức khỏe', 'medical': 'y tế', 'economic': 'kinh tế', 'economy': 'nền kinh tế',
-        'community': 'cộng đồng', 'people': 'mọi người', 'individual': 'cá nhân', 'individuals': 'cá nhân',
-        'children': 'trẻ em', 'child': 'trẻ em', 'adult': 'người lớn', 'adults': 'người lớn',
-        'work': 'công việc', 'job': 'việc làm', 'jobs': 'việc làm', 'employment': 'việc làm',
-        'program': 'chương trình', 'programs': 'chương trình', 'system': 'hệ thống',
-        'development': 'phát triển', 'improvement': 'cải thiện', 'benefit': 'lợi ích', 'benefits': 'lợi ích',
-        'advantage': 'ưu điểm', 'disadvantage': 'nhược điểm', 'problem': 'vấn đề', 'issue': 'vấn đề',
-        'solution': 'giải pháp', 'impact': 'tác động', 'effect': 'tác động', 'affect': 'ảnh hưởng',
-        'influence': 'ảnh hưởng', 'quality': 'chất lượng', 'important': 'quan trọng', 'necessary': 'cần thiết',
-        'require': 'yêu cầu', 'need': 'cần', 'provide': 'cung cấp', 'support': 'hỗ trợ',
-        'increase': 'tăng', 'decrease': 'giảm', 'reduce': 'giảm', 'improve': 'cải thiện',
-        'develop': 'phát triển', 'create': 'tạo ra', 'ensure': 'đảm bảo', 'promote': 'thúc đẩy',
-    }
-
-    # This is a simplified translator - in production, you'd use a proper translation API
-    # For now, return empty string to indicate needs manual translation
+    # This is a simplified translator - empty strings are left for a proper
+    # translation API (run with --backend URL, see translation_backend.py).
+    # Word-level glossary drafts for them come from --drafts (see glossary.py).
     return ""
 
+def translate_item(item):
+    """Translate a single vocabulary item in place."""
+    # Translate definition
+    if 'englishDefinition' in item:
+        vn_def = translate_definition(item['englishDefinition'], item)
+        if vn_def:
+            item['vietnameseDefinition'] = vn_def
+
+    # Translate example
+    if 'englishExample' in item:
+        vn_ex = translate_example(item['englishExample'], item)
+        if vn_ex:
+            item['vietnameseExample'] = vn_ex
+
+    return item
+
 def main():
-    input_file = '/home/user/vocab-learner/data/to-translate.json'
-    output_file = '/home/user/vocab-learner/data/translated.json'
-
-    print("Loading data...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    print(f"Total items: {len(data)}")
-
-    # Translate each item
-    translated_count = 0
-    for i, item in enumerate(data):
-        # Translate definition
-        if 'englishDefinition' in item:
-            vn_def = translate_definition(item['englishDefinition'], item)
-            if vn_def:
-                item['vietnameseDefinition'] = vn_def
-
-        # Translate example
-        if 'englishExample' in item:
-            vn_ex = translate_example(item['englishExample'], item)
-            if vn_ex:
-                item['vietnameseExample'] = vn_ex
-
-        if item.get('vietnameseDefinition') and item.get('vietnameseExample'):
-            translated_count += 1
-
-        if (i + 1) % 100 == 0:
-            print(f"Processed {i + 1}/{len(data)} items...")
-
-    print(f"\nTranslated: {translated_count}/{len(data)} items")
-
-    # Save
-    print(f"Saving to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    args = parse_args(
+        __doc__.strip().splitlines()[0],
+        input_file='/home/user/vocab-learner/data/to-translate.json',
+        output_file='/home/user/vocab-learner/data/translated.json',
+    )
+
+    # Only new or changed items are translated again
+    run_translation(translate_item, args.input, args.output,
+                    translator='full_translator', force=args.force, stream=args.stream,
+                    backend=args.backend, drafts_file=args.drafts,
+                    fuzzy_threshold=args.fuzzy_threshold)
 
     print("Done!")
 
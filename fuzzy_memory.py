@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Fuzzy translation-memory matches for near-duplicate English sentences.
+
+Sentences are shingled into character n-grams and summarized by a
+one-permutation MinHash signature; LSH buckets over bands of the signature
+narrow a query to a handful of candidates, which are ranked by exact
+Jaccard similarity of their shingles. Good matches are offered as drafts
+for sentences the exact translation memory misses.
+
+Usage:
+    python fuzzy_memory.py "Mixed-ability classes help weaker students learn from peers."
+    python fuzzy_memory.py --input data/to-translate.json --threshold 0.8
+"""
+
+import argparse
+import heapq
+import json
+import time
+import zlib
+
+from translation_memory import FIELDS, normalize_text, shared_store
+
+DEFAULT_THRESHOLD = 0.8
+
+
+class FuzzyMatch:
+    """One translated sentence close to the query."""
+
+    __slots__ = ('source', 'target', 'score')
+
+    def __init__(self, source, target, score):
+        self.source = source
+        self.target = target
+        self.score = score
+
+    def __repr__(self):
+        return f"<{self.score:.2f} {self.source!r}>"
+
+
+def shingles(text, n=3):
+    """Set of hashed character n-grams of the normalized, lowercased text."""
+    text = f" {normalize_text(text).lower()} "
+    if len(text) <= n:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + n].encode('utf-8')) for i in range(len(text) - n + 1)}
+
+
+class FuzzyIndex:
+    """
+    MinHash/LSH index of (English source, Vietnamese target) pairs.
+
+    The signature has bands * rows bins. A shingle hash goes to bin
+    hash % bins and each bin keeps its minimum; empty bins borrow from the
+    next filled one (rotation densification), so short sentences still get
+    full signatures. Two sentences become candidates when any band of
+    their signatures is identical, which for Jaccard similarity s happens
+    with probability 1 - (1 - s**rows)**bands.
+    """
+
+    def __init__(self, n=3, bands=8, rows=4):
+        self.n = n
+        self.bands = bands
+        self.rows = rows
+        self.bins = bands * rows
+        self.sources = []
+        self.targets = []
+        self.shingle_sets = []
+        self.buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self.sources)
+
+    @classmethod
+    def from_store(cls, store=None, **options):
+        """Index every segment of a TranslationStore (the shared one by default)."""
+        index = cls(**options)
+        for source, target in (store or shared_store()).iter_segments():
+            index.add(source, target)
+        return index
+
+    def signature(self, shingle_set):
+        bins = self.bins
+        minimums = [None] * bins
+        for value in shingle_set:
+            slot = value % bins
+            rank = value // bins
+            if minimums[slot] is None or rank < minimums[slot]:
+                minimums[slot] = rank
+
+        # Densify: an empty bin takes the next filled bin's value, offset
+        # by the distance so borrowed values never equal real ones
+        filled = list(minimums)
+        for slot in range(bins):
+            if filled[slot] is None:
+                step = 1
+                while filled[(slot + step) % bins] is None:
+                    step += 1
+                minimums[slot] = filled[(slot + step) % bins] + (step << 32)
+        return minimums
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, source, target):
+        shingle_set = frozenset(shingles(source, self.n))
+        entry = len(self.sources)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.shingle_sets.append(shingle_set)
+        for bucket, key in zip(self.buckets, self._band_keys(self.signature(shingle_set))):
+            bucket.setdefault(key, []).append(entry)
+
+    def search(self, text, k=3, min_score=0.0):
+        """Top-k FuzzyMatch results for text, best first."""
+        query = shingles(text, self.n)
+        candidates = set()
+        for bucket, key in zip(self.buckets, self._band_keys(self.signature(query))):
+            candidates.update(bucket.get(key, ()))
+
+        scored = []
+        for entry in candidates:
+            other = self.shingle_sets[entry]
+            common = len(query & other)
+            score = common / (len(query) + len(other) - common)
+            if score >= min_score:
+                scored.append((score, entry))
+
+        return [FuzzyMatch(self.sources[entry], self.targets[entry], score)
+                for score, entry in heapq.nlargest(k, scored)]
+
+
+_shared_index = None
+
+
+def shared_index():
+    """Index of the shared translation memory, built on first use."""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = FuzzyIndex.from_store()
+    return _shared_index
+
+
+def fuzzy_draft(item, threshold=DEFAULT_THRESHOLD, index=None, k=3):
+    """
+    Drafts from near-duplicate translations for the untranslated fields of
+    one item. Returns (draft or None, True when every missing field has a
+    match at or above threshold).
+    """
+    index = index or shared_index()
+    draft = {}
+    matches = {}
+    missing = 0
+    for source_field, target_field, _ in FIELDS:
+        if not item.get(source_field) or item.get(target_field):
+            continue
+        missing += 1
+        found = index.search(item[source_field], k=k, min_score=threshold)
+        if found:
+            draft[target_field] = found[0].target
+            matches[target_field] = [
+                {'source': match.source, 'target': match.target, 'score': round(match.score, 3)}
+                for match in found
+            ]
+
+    if not draft:
+        return None, False
+    draft = {'id': item['id'], 'fileId': item.get('fileId', ''), **draft, 'fuzzyMatches': matches}
+    return draft, len(matches) == missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('text', nargs='?', help='English sentence to match')
+    parser.add_argument('--input', help='JSON item file; counts items with fuzzy drafts')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('-k', type=int, default=3, help='matches to show')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = shared_index()
+    print(f"Indexed {len(index)} translated sentences in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.text:
+        start = time.perf_counter()
+        matches = index.search(args.text, k=args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for match in matches:
+            print(f"  {match.score:.3f}  {match.source}\n         {match.target}")
+        print(f"({elapsed:.3f} ms)" if matches else f"(no match, {elapsed:.3f} ms)")
+        return
+    if not args.input:
+        parser.error('give a text or --input')
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    start = time.perf_counter()
+    drafted = complete = 0
+    for item in items:
+        draft, covered = fuzzy_draft(item, args.threshold, index, args.k)
+        drafted += draft is not None
+        complete += covered
+    elapsed = time.perf_counter() - start
+    print(f"{drafted}/{len(items)} items have fuzzy drafts, {complete} fully covered "
+          f"(threshold {args.threshold}, {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Glossary fallback for sentences the translation memory misses.
+Tokenizes once and matches multi-word terms longest-first with a phrase
+trie built at import, producing glossary-annotated drafts for translators.
+
+Usage:
+    python glossary.py "Mixed-ability classes promote digital literacy."
+    python glossary.py --input data/to-translate.json
+"""
+
+import argparse
+import json
+import re
+import time
+
+from vocab_store import shared_store as vocab_store
+
+# Common IELTS term mappings (formerly term_map in translate_vocab.py)
+TERM_MAP = {
+    'society': 'xã hội',
+    'government': 'chính phủ',
+    'education': 'giáo dục',
+    'environment': 'môi trường',
+    'technology': 'công nghệ',
+    'students': 'học sinh',
+    'student': 'học sinh',
+    'teachers': 'giáo viên',
+    'teacher': 'giáo viên',
+    'learning': 'học tập',
+    'academic': 'học thuật',
+    'performance': 'hiệu suất',
+    'ability': 'năng lực',
+    'skills': 'kỹ năng',
+    'knowledge': 'kiến thức',
+    'development': 'phát triển',
+    'quality': 'chất lượng',
+    'system': 'hệ thống',
+    'health': 'sức khỏe',
+    'social': 'xã hội',
+    'economic': 'kinh tế',
+    'cultural': 'văn hóa',
+    'political': 'chính trị',
+    'problem': 'vấn đề',
+    'issue': 'vấn đề',
+    'solution': 'giải pháp',
+    'benefit': 'lợi ích',
+    'advantage': 'ưu điểm',
+    'disadvantage': 'nhược điểm',
+    'impact': 'tác động',
+    'affect': 'ảnh hưởng',
+    'effect': 'tác động',
+    'influence': 'ảnh hưởng',
+    'children': 'trẻ em',
+    'people': 'mọi người',
+    'individuals': 'cá nhân',
+    'community': 'cộng đồng',
+    'public': 'công chúng',
+    'private': 'tư nhân',
+    'work': 'công việc',
+    'business': 'kinh doanh',
+    'economy': 'nền kinh tế',
+    'resources': 'tài nguyên',
+    'support': 'hỗ trợ',
+    'improve': 'cải thiện',
+    'increase': 'tăng',
+    'decrease': 'giảm',
+    'reduce': 'giảm thiểu',
+}
+
+# Word-level translation dictionary (formerly vocab in full_translator.py)
+WORD_MAP = {
+    'student': 'học sinh', 'students': 'học sinh', 'learner': 'học viên', 'learners': 'học viên',
+    'teacher': 'giáo viên', 'teachers': 'giáo viên', 'education': 'giáo dục', 'educational': 'giáo dục',
+    'academic': 'học thuật', 'ability': 'năng lực', 'performance': 'hiệu suất', 'achievement': 'thành tích',
+    'learning': 'học tập', 'knowledge': 'kiến thức', 'skill': 'kỹ năng', 'skills': 'kỹ năng',
+    'society': 'xã hội', 'social': 'xã hội', 'government': 'chính phủ', 'public': 'công cộng',
+    'environment': 'môi trường', 'environmental': 'môi trường', 'technology': 'công nghệ',
+    'health': 'sức khỏe', 'medical': 'y tế', 'economic': 'kinh tế', 'economy': 'nền kinh tế',
+    'community': 'cộng đồng', 'people': 'mọi người', 'individual': 'cá nhân', 'individuals': 'cá nhân',
+    'children': 'trẻ em', 'child': 'trẻ em', 'adult': 'người lớn', 'adults': 'người lớn',
+    'work': 'công việc', 'job': 'việc làm', 'jobs': 'việc làm', 'employment': 'việc làm',
+    'program': 'chương trình', 'programs': 'chương trình', 'system': 'hệ thống',
+    'development': 'phát triển', 'improvement': 'cải thiện', 'benefit': 'lợi ích', 'benefits': 'lợi ích',
+    'advantage': 'ưu điểm', 'disadvantage': 'nhược điểm', 'problem': 'vấn đề', 'issue': 'vấn đề',
+    'solution': 'giải pháp', 'impact': 'tác động', 'effect': 'tác động', 'affect': 'ảnh hưởng',
+    'influence': 'ảnh hưởng', 'quality': 'chất lượng', 'important': 'quan trọng', 'necessary': 'cần thiết',
+    'require': 'yêu cầu', 'need': 'cần', 'provide': 'cung cấp', 'support': 'hỗ trợ',
+    'increase': 'tăng', 'decrease': 'giảm', 'reduce': 'giảm', 'improve': 'cải thiện',
+    'develop': 'phát triển', 'create': 'tạo ra', 'ensure': 'đảm bảo', 'promote': 'thúc đẩy',
+}
+
+# Multi-word terms, as rendered in the reviewed translations
+PHRASE_MAP = {
+    'mixed-ability classes': 'lớp học trình độ hỗn hợp',
+    'mixed classes': 'lớp học hỗn hợp',
+    'ability grouping': 'phân nhóm theo năng lực',
+    'academic performance': 'kết quả học tập',
+    'achievement gap': 'khoảng cách thành tích',
+    'learning pace': 'nhịp độ học tập',
+    'learning paces': 'nhịp độ học tập',
+    'peer learning': 'học tập từ bạn bè',
+    'social inclusion': 'hòa nhập xã hội',
+    'social integration': 'hòa nhập xã hội',
+    'social exclusion': 'loại trừ xã hội',
+    'educational equity': 'công bằng giáo dục',
+    'inclusive education': 'giáo dục hòa nhập',
+    'gifted programs': 'chương trình năng khiếu',
+    'tailored instruction': 'giảng dạy cá nhân hóa',
+    'digital literacy': 'kỹ năng số',
+    'functional literacy': 'khả năng đọc viết thực dụng',
+    'adult education': 'giáo dục người lớn',
+    'adult illiteracy': 'mù chữ ở người lớn',
+    'employment opportunities': 'cơ hội việc làm',
+    'community centers': 'trung tâm cộng đồng',
+}
+
+# Later maps win: reviewed phrases over IELTS terms over plain words
+GLOSSARY = {**WORD_MAP, **TERM_MAP, **PHRASE_MAP}
+
+TOKEN_RE = re.compile(r"[A-Za-z]+(?:[-'][A-Za-z]+)*")
+TERMINAL = None  # trie key holding the translation of a complete term
+
+
+def tokenize(text):
+    """Lowercased word tokens with their (start, end) character spans."""
+    return [(m.group().lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+
+def build_trie(glossary):
+    """Nested dicts keyed by token; TERMINAL marks the end of a term."""
+    trie = {}
+    for term, translation in glossary.items():
+        node = trie
+        for token, _, _ in tokenize(term):
+            node = node.setdefault(token, {})
+        node[TERMINAL] = (term, translation)
+    return trie
+
+
+GLOSSARY_TRIE = build_trie(GLOSSARY)
+
+
+def find_terms(text, trie=GLOSSARY_TRIE):
+    """
+    Glossary terms in text, leftmost-longest and non-overlapping.
+    Returns [(start, end, term, translation)] as character spans.
+    """
+    tokens = tokenize(text)
+    matches = []
+    i = 0
+    while i < len(tokens):
+        node = trie
+        best = None
+        j = i
+        while j < len(tokens) and tokens[j][0] in node:
+            node = node[tokens[j][0]]
+            j += 1
+            if TERMINAL in node:
+                best = (j, node[TERMINAL])
+
+        if best is None:
+            i += 1
+            continue
+
+        end, (term, translation) = best
+        matches.append((tokens[i][1], tokens[end - 1][2], term, translation))
+        i = end
+    return matches
+
+
+def draft(text, trie=GLOSSARY_TRIE):
+    """
+    Glossary-annotated draft: each known term is followed by its
+    Vietnamese rendering in brackets, e.g. "peer learning [học tập từ bạn bè]".
+    Returns None when no glossary term occurs.
+    """
+    matches = find_terms(text, trie)
+    if not matches:
+        return None
+
+    parts = []
+    pos = 0
+    for start, end, _, translation in matches:
+        parts.append(text[pos:end])
+        parts.append(f" [{translation}]")
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def draft_item(item):
+    """
+    Drafts for the untranslated fields of one item, or None. The item's
+    headword is also looked up in the vocablist/ word lists.
+    """
+    drafts = {}
+    for source_field, target_field in (('englishDefinition', 'vietnameseDefinition'),
+                                       ('englishExample', 'vietnameseExample')):
+        if item.get(source_field) and not item.get(target_field):
+            annotated = draft(item[source_field])
+            if annotated:
+                drafts[target_field] = annotated
+    if not drafts:
+        return None
+
+    # The headword's meaning from the class word lists, when it is there
+    if item.get('word'):
+        word_translation = vocab_store().translate(item['word'])
+        if word_translation:
+            drafts['wordTranslation'] = word_translation
+    return {'id': item['id'], 'fileId': item.get('fileId', ''), **drafts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('text', nargs='?', help='English text to annotate')
+    parser.add_argument('--input', help='JSON item file; drafts every English field')
+    args = parser.parse_args()
+
+    if args.text:
+        print(draft(args.text) or '(no glossary terms)')
+        return
+    if not args.input:
+        parser.error('give a text or --input')
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    start = time.perf_counter()
+    texts = [item[field] for item in items
+             for field in ('englishDefinition', 'englishExample') if item.get(field)]
+    annotated = sum(1 for text in texts if find_terms(text))
+    elapsed = time.perf_counter() - start
+
+    print(f"{annotated}/{len(texts)} sentences contain glossary terms "
+          f"({len(GLOSSARY)} terms, {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
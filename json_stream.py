@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Incremental reader and atomic writer for large JSON item arrays.
+Memory use stays at one chunk plus one item, however long the array is.
+"""
+
+import json
+import os
+import re
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+SCALAR_END_RE = re.compile(r'[\s,\]}]')
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        state = 'start'  # start -> value -> separator -> value ... -> done
+
+        while True:
+            # Skip whitespace, refilling the buffer as needed
+            while True:
+                while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    break
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if state != 'done':
+                        raise ValueError(f"{path}: unexpected end of JSON array")
+                    return
+                buffer, pos = buffer[pos:] + chunk, 0
+
+            char = buffer[pos]
+
+            if state == 'done':
+                raise ValueError(f"{path}: trailing data after JSON array")
+
+            if state == 'start':
+                if char != '[':
+                    raise ValueError(f"{path}: expected a JSON array")
+                pos += 1
+                state = 'first'
+                continue
+
+            if char == ']' and state in ('first', 'separator'):
+                pos += 1
+                state = 'done'
+                continue
+
+            if state == 'separator':
+                if char != ',':
+                    raise ValueError(f"{path}: expected ',' or ']' at offset {pos}")
+                pos += 1
+                state = 'value'
+                continue
+
+            # A bare number or literal is only complete once its terminator
+            # is in the buffer ("22." would otherwise decode as 22)
+            if char not in '{["':
+                while not SCALAR_END_RE.search(buffer, pos):
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    buffer, pos = buffer[pos:] + chunk, 0
+
+            # Decode one element, reading more input until it is complete
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        raise
+                    buffer, pos = buffer[pos:] + chunk, 0
+
+            yield value
+            pos = end
+            state = 'separator'
+
+
+class JsonArrayWriter:
+    """
+    Write items to a JSON array as they arrive, in the same layout as
+    json.dump(items, f, ensure_ascii=False, indent=2).
+
+    Items go to `<path>.tmp`, which is renamed over path when the block
+    exits cleanly. On error the partial temp file is left for inspection
+    and path is untouched.
+    """
+
+    def __init__(self, path, indent=2):
+        self.path = str(path)
+        self.tmp_path = self.path + '.tmp'
+        self.indent = indent
+        self.count = 0
+        self.file = None
+        self.discarded = False
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.file.write('[')
+        return self
+
+    def write(self, item):
+        text = json.dumps(item, ensure_ascii=False, indent=self.indent)
+        pad = ' ' * self.indent
+        text = '\n'.join(pad + line for line in text.split('\n'))
+        self.file.write(('\n' if self.count == 0 else ',\n') + text)
+        self.count += 1
+
+    def discard(self):
+        """Drop the output and keep whatever is at path now."""
+        self.discarded = True
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.write('\n]' if self.count else ']')
+        self.file.close()
+
+        if exc_type is not None:
+            return False
+        if self.discarded:
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.path)
+        return False
@@ -0,0 +1,215 @@
+"""
+Lightweight metrics for the translators and the TTS server.
+
+Stage timers, labelled counters and histograms, all off by default: while
+disabled, timer() hands back one shared no-op context manager and count()
+and observe() return at once, so instrumented code pays a function call
+and a flag check. Enable with enable() or VOCAB_METRICS=1, then export a
+JSON run report (report / write_report) or Prometheus text format
+(prometheus_text).
+
+    with metrics.timer('translate.match'):
+        translate_item(item)
+    metrics.count('tm_lookups_total', result='hit', fileId=item['fileId'])
+"""
+
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds; one extra +Inf bucket is implied
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_enabled = os.environ.get('VOCAB_METRICS', '') not in ('', '0')
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_started = time.time()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def count(name, amount=1, **labels):
+    """Add amount to a labelled counter."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    """Record one value in a labelled histogram."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                'buckets': buckets, 'counts': [0] * (len(buckets) + 1),
+                'count': 0, 'sum': 0.0, 'max': 0.0,
+            }
+        index = 0
+        for bound in histogram['buckets']:
+            if value <= bound:
+                break
+            index += 1
+        histogram['counts'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+        if value > histogram['max']:
+            histogram['max'] = value
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    __slots__ = ('stage', 'labels', 'start')
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe('stage_seconds', time.perf_counter() - self.start, stage=self.stage, **self.labels)
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+def timer(stage, **labels):
+    """Context manager timing one pass through stage into stage_seconds."""
+    if not _enabled:
+        return NULL_TIMER
+    return _Timer(stage, labels)
+
+
+def timed_iter(iterable, stage, **labels):
+    """Iterate, timing each step (e.g. parsing the next item) as stage."""
+    if not _enabled:
+        return iterable
+    return _timed_iter(iter(iterable), stage, labels)
+
+
+def _timed_iter(iterator, stage, labels):
+    while True:
+        with _Timer(stage, labels):
+            try:
+                value = next(iterator)
+            except StopIteration:
+                return
+        yield value
+
+
+def _estimate(histogram, quantile):
+    """Upper bound of the bucket holding the quantile."""
+    target = quantile * histogram['count']
+    seen = 0
+    for bound, bucket_count in zip(histogram['buckets'], histogram['counts']):
+        seen += bucket_count
+        if seen >= target:
+            return bound
+    return histogram['max']
+
+
+def report():
+    """Everything recorded so far, as a JSON-ready dict."""
+    with _lock:
+        counters = [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        histograms = []
+        for (name, labels), histogram in sorted(_histograms.items()):
+            count_ = histogram['count']
+            histograms.append({
+                'name': name,
+                'labels': dict(labels),
+                'count': count_,
+                'sum': round(histogram['sum'], 6),
+                'mean': round(histogram['sum'] / count_, 6) if count_ else 0.0,
+                'max': round(histogram['max'], 6),
+                'p50_le': _estimate(histogram, 0.50),
+                'p95_le': _estimate(histogram, 0.95),
+            })
+
+    return {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_started)),
+        'uptime_s': round(time.time() - _started, 3),
+        'counters': counters,
+        'histograms': histograms,
+    }
+
+
+def write_report(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, ensure_ascii=False, indent=2)
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def prometheus_text(prefix='vocab_'):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    with _lock:
+        typed = set()
+        for (name, labels), value in sorted(_counters.items()):
+            metric = prefix + name
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} counter')
+                typed.add(metric)
+            lines.append(f'{metric}{_labels_text(labels)} {value}')
+
+        for (name, labels), histogram in sorted(_histograms.items()):
+            metric = prefix + name
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} histogram')
+                typed.add(metric)
+            cumulative = 0
+            bounds = [str(bound) for bound in histogram['buckets']] + ['+Inf']
+            for bound, bucket_count in zip(bounds, histogram['counts']):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{_labels_text(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{metric}_sum{_labels_text(labels)} {histogram["sum"]}')
+            lines.append(f'{metric}_count{_labels_text(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
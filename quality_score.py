@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Score translation quality across a translated item file.
+
+Every definition/example pair becomes one row of NumPy arrays, and each
+check is a handful of vectorized operations over all rows at once; at
+100k items the checks take milliseconds. Building the rows does not: the
+texts of each field are normalized as one joined string and searched for
+glossary words as one array of code points, which leaves little per-row
+Python, but the whole-string passes still take about a second:
+
+  empty      English text with no Vietnamese translation
+  identical  translation equal to its English source
+  ratio      Vietnamese/English length ratio far from the corpus norm
+             (robust z-score of the log ratio, or outside fixed bounds)
+  glossary   a glossary.TERM_MAP word in the English whose mapped
+             Vietnamese term does not appear in the translation
+  duplicate  the same translation given for different English texts
+
+Outliers are summarized per fileId, with examples.
+
+Usage:
+    python quality_score.py                          # data/translated.json
+    python quality_score.py --input data/translated.json --examples 5 --strict
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # reported by main(); nothing else here runs without it
+    np = None
+
+from glossary import TERM_MAP
+
+DEFAULT_INPUT = Path(__file__).resolve().parent / 'data' / 'translated.json'
+
+# (English field, Vietnamese field, label)
+FIELDS = [
+    ('englishDefinition', 'vietnameseDefinition', 'definition'),
+    ('englishExample', 'vietnameseExample', 'example'),
+]
+
+CHECKS = ['empty', 'identical', 'ratio', 'glossary', 'duplicate']
+# Checks that fail the run with --strict; the others are review hints
+ERRORS = ['empty', 'identical', 'duplicate']
+
+# Vietnamese/English character ratios outside these bounds are always flagged
+RATIO_BOUNDS = (0.5, 2.5)
+ROBUST_Z = 3.5
+
+# TERM_MAP keys are single words; several can share one Vietnamese term
+TARGETS = sorted(set(TERM_MAP.values()))
+TARGET_IDS = {target: index for index, target in enumerate(TARGETS)}
+TERM_TARGETS = {term: TARGET_IDS[target] for term, target in TERM_MAP.items()}
+# Every [a-z] run is packed into one integer, its length and its first
+# PACKED_LETTERS letters at 5 bits each: exact up to that length, and the
+# rare longer matches are checked against the text
+PACKED_LETTERS = 11
+
+# Joins the texts of a field; rows are cut apart again on it
+SEPARATOR = '\x00'
+# What str.split() splits on, besides the space itself
+WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003'
+              '\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+
+
+def normalize_joined(texts):
+    """
+    Every text whitespace-collapsed and lowercased, as one SEPARATOR-joined
+    string: a few whole-string replaces instead of a call per text. A NUL
+    inside a text reads as a space.
+    """
+    texts = list(texts)
+    joined = SEPARATOR.join(texts)
+    if joined.count(SEPARATOR) >= len(texts):
+        joined = SEPARATOR.join(text.replace(SEPARATOR, ' ') for text in texts)
+    for char in WHITESPACE:
+        if char in joined:
+            joined = joined.replace(char, ' ')
+    while '  ' in joined:
+        joined = joined.replace('  ', ' ')
+    joined = joined.replace(f' {SEPARATOR}', SEPARATOR).replace(f'{SEPARATOR} ', SEPARATOR)
+    return joined.strip(' ').lower()
+
+
+def words(text):
+    """Code points of text and the start and length of every [a-z] run."""
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    letter = ((codes >= ord('a')) & (codes <= ord('z'))).view(np.int8)
+    edges = np.diff(np.concatenate([np.zeros(1, np.int8), letter, np.zeros(1, np.int8)]))
+    starts = np.flatnonzero(edges == 1)
+    return codes, starts, np.flatnonzero(edges == -1) - starts
+
+
+def pack_words(codes, starts, lengths):
+    """One uint64 key per [a-z] run: length, then letters at 5 bits each."""
+    keys = np.minimum(lengths, 511).astype(np.uint64) << np.uint64(5 * PACKED_LETTERS)
+    for offset in range(PACKED_LETTERS):
+        inside = lengths > offset
+        letters = codes[starts[inside] + offset].astype(np.uint64) - np.uint64(ord('a') - 1)
+        keys[inside] |= letters << np.uint64(5 * offset)
+    return keys
+
+
+def glossary_hits(text):
+    """(offset, target id) arrays of the whole-word TERM_MAP keys in text."""
+    terms = sorted(TERM_TARGETS)
+    term_keys = pack_words(*words(SEPARATOR.join(terms)))
+    order = np.argsort(term_keys)
+    term_keys = term_keys[order]
+    term_targets = np.array([TERM_TARGETS[term] for term in terms], dtype=np.int64)[order]
+
+    codes, starts, lengths = words(text)
+    # Only runs whose length and first letter some term has are packed
+    term_lengths = np.array([len(term) for term in terms])
+    term_firsts = np.array([ord(term[0]) for term in terms])
+    candidate = np.isin(np.minimum(lengths, 511) * 256 + codes[starts] % 256,
+                        term_lengths * 256 + term_firsts)
+    starts, lengths = starts[candidate], lengths[candidate]
+    keys = pack_words(codes, starts, lengths)
+    found = np.minimum(np.searchsorted(term_keys, keys), len(term_keys) - 1)
+    hit = term_keys[found] == keys
+    starts, lengths, targets = starts[hit], lengths[hit], term_targets[found[hit]]
+
+    for index in np.flatnonzero(lengths > PACKED_LETTERS).tolist():
+        start = starts[index]
+        targets[index] = TERM_TARGETS.get(text[start:start + lengths[index]], -1)
+    return starts[targets >= 0], targets[targets >= 0]
+
+
+def extract(items):
+    """
+    Row arrays for every (item, field): lengths, normalized-text hashes,
+    fileId codes and glossary term codes. Per-item Python is limited to
+    reading the fields and hashing the normalized texts.
+    """
+    rows = len(items) * len(FIELDS)
+    item_index = np.tile(np.arange(len(items)), len(FIELDS))
+    field_index = np.repeat(np.arange(len(FIELDS)), len(items))
+
+    file_codes = {}
+    file_index = np.fromiter(
+        (file_codes.setdefault(item.get('fileId', ''), len(file_codes)) for item in items),
+        dtype=np.int64, count=len(items)
+    )
+
+    english_text = normalize_joined(
+        item.get(source_field) or '' for source_field, _, _ in FIELDS for item in items)
+    english = english_text.split(SEPARATOR) if rows else []
+    vietnamese = normalize_joined(
+        item.get(target_field) or '' for _, target_field, _ in FIELDS for item in items
+    ).split(SEPARATOR) if rows else []
+    en_len = np.fromiter(map(len, english), dtype=np.int64, count=rows)
+
+    # Expected glossary terms as row * len(TARGETS) + target id, each with
+    # whether the translation contains it; offsets in the joined text map
+    # back to rows through the row start offsets
+    stride = len(TARGETS)
+    offsets, target_ids = glossary_hits(english_text)
+    row_starts = np.cumsum(en_len + 1) - (en_len + 1)
+    expected_codes = np.unique(
+        (np.searchsorted(row_starts, offsets, side='right') - 1) * stride + target_ids)
+    expected_found = [TARGETS[code % stride] in vietnamese[code // stride]
+                      for code in expected_codes.tolist()]
+
+    return {
+        'rows': rows,
+        'items': items,
+        'item_index': item_index,
+        'field_index': field_index,
+        'file_index': np.tile(file_index, len(FIELDS)),
+        'file_names': np.array(list(file_codes), dtype=object),
+        'en_len': en_len,
+        'vi_len': np.fromiter(map(len, vietnamese), dtype=np.int64, count=rows),
+        'en_hash': np.fromiter(map(hash, english), dtype=np.int64, count=rows),
+        'vi_hash': np.fromiter(map(hash, vietnamese), dtype=np.int64, count=rows),
+        'expected_codes': expected_codes,
+        'expected_found': np.array(expected_found, dtype=bool),
+    }
+
+
+def score(features, ratio_bounds=RATIO_BOUNDS, robust_z=ROBUST_Z):
+    """Boolean flag array per check (one entry per row), plus the length ratios."""
+    rows = features['rows']
+    en_len, vi_len = features['en_len'], features['vi_len']
+    has_source = en_len > 0
+    translated = has_source & (vi_len > 0)
+
+    empty = has_source & (vi_len == 0)
+    identical = translated & (features['vi_hash'] == features['en_hash'])
+
+    ratio = np.where(translated, vi_len / np.maximum(en_len, 1), np.nan)
+    log_ratio = np.log(ratio[translated])
+    ratio_flags = np.zeros(rows, dtype=bool)
+    if log_ratio.size:
+        median = np.median(log_ratio)
+        mad = np.median(np.abs(log_ratio - median)) or 1e-9
+        z = 0.6745 * (log_ratio - median) / mad
+        outside = (ratio[translated] < ratio_bounds[0]) | (ratio[translated] > ratio_bounds[1])
+        ratio_flags[translated] = (np.abs(z) > robust_z) | outside
+
+    stride = len(TARGETS)
+    missed = features['expected_codes'][~features['expected_found']]
+    glossary_misses = np.bincount(missed // stride, minlength=rows)
+    glossary = translated & (glossary_misses > 0)
+
+    # Same Vietnamese for more than one distinct English text
+    order = np.lexsort((features['en_hash'], features['vi_hash']))
+    vi_sorted, en_sorted = features['vi_hash'][order], features['en_hash'][order]
+    new_group = np.r_[True, vi_sorted[1:] != vi_sorted[:-1]]
+    new_pair = new_group | np.r_[True, en_sorted[1:] != en_sorted[:-1]]
+    group = np.cumsum(new_group) - 1
+    distinct_sources = np.bincount(group, weights=new_pair)
+    duplicate = np.zeros(rows, dtype=bool)
+    duplicate[order] = distinct_sources[group] > 1
+    duplicate &= translated & ~identical
+
+    flags = {
+        'empty': empty,
+        'identical': identical,
+        'ratio': ratio_flags,
+        'glossary': glossary,
+        'duplicate': duplicate,
+    }
+    return flags, ratio, glossary_misses
+
+
+def per_file(features, flags):
+    """{fileId: {check: count}} for fileIds with at least one flagged row."""
+    file_names, file_index = features['file_names'], features['file_index']
+    counts = np.stack([
+        np.bincount(file_index, weights=flags[check], minlength=len(file_names))
+        for check in CHECKS
+    ]).astype(np.int64)
+    flagged = np.nonzero(counts.sum(axis=0))[0]
+    return {
+        file_names[index]: dict(zip(CHECKS, counts[:, index].tolist()))
+        for index in flagged[np.argsort(-counts[:, flagged].sum(axis=0), kind='stable')]
+    }
+
+
+def glossary_adherence(features):
+    """{term target: (expected, found)} across the corpus."""
+    stride = len(TARGETS)
+    expected, hit = features['expected_codes'], features['expected_found']
+    totals = np.bincount(expected % stride, minlength=stride)
+    found = np.bincount(expected[hit] % stride, minlength=stride)
+    return {TARGETS[i]: (int(totals[i]), int(found[i])) for i in np.nonzero(totals)[0]}
+
+
+def examples(features, flags, ratio, glossary_misses, check, limit):
+    """Up to limit flagged rows for check, as report dicts."""
+    rows = np.nonzero(flags[check])[0]
+    if check == 'ratio':
+        rows = rows[np.argsort(-np.abs(np.log(ratio[rows])))]
+    found = []
+    for row in rows[:limit]:
+        item = features['items'][features['item_index'][row]]
+        source_field, target_field, label = FIELDS[features['field_index'][row]]
+        entry = {
+            'id': item.get('id'),
+            'fileId': item.get('fileId', ''),
+            'field': label,
+            'english': item.get(source_field) or '',
+            'vietnamese': item.get(target_field) or '',
+        }
+        if check == 'ratio':
+            entry['ratio'] = round(float(ratio[row]), 2)
+        elif check == 'glossary':
+            entry['missing_terms'] = int(glossary_misses[row])
+        found.append(entry)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default=str(DEFAULT_INPUT), help='translated item file')
+    parser.add_argument('--examples', type=int, default=3, help='examples shown per check')
+    parser.add_argument('--report', metavar='PATH', help='write the full report as JSON')
+    parser.add_argument('--strict', action='store_true',
+                        help=f"exit 1 if any {'/'.join(ERRORS)} rows are found")
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ NumPy is required for scoring. Install with:\n  pip install numpy")
+        sys.exit(1)
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    start = time.perf_counter()
+    features = extract(items)
+    extracted = time.perf_counter()
+    flags, ratio, glossary_misses = score(features)
+    scored = time.perf_counter()
+
+    totals = {check: int(flags[check].sum()) for check in CHECKS}
+    files = per_file(features, flags)
+    print(f"Scored {len(items)} items ({features['rows']} fields) in "
+          f"{(scored - start) * 1000:.0f} ms ({(extracted - start) * 1000:.0f} ms extracting, "
+          f"{(scored - extracted) * 1000:.1f} ms checks)")
+    print('  ' + ', '.join(f"{check} {count}" for check, count in totals.items()))
+
+    if files:
+        width = max(len(name) for name in files)
+        print(f"\n{'fileId':<{width}}  " + ' '.join(f"{check:>9}" for check in CHECKS))
+        for name, counts in files.items():
+            print(f"{name:<{width}}  " + ' '.join(f"{counts[check]:>9}" for check in CHECKS))
+
+    report = {'input': args.input, 'items': len(items), 'totals': totals, 'files': files,
+              'examples': {}, 'glossary': {}}
+    for check in CHECKS:
+        found = examples(features, flags, ratio, glossary_misses, check,
+                         args.examples if not args.report else features['rows'])
+        report['examples'][check] = found
+        if found and args.examples:
+            print(f"\n{check}:")
+            for entry in found[:args.examples]:
+                detail = entry.get('ratio', entry.get('missing_terms', ''))
+                print(f"  {entry['id']} ({entry['field']}) {detail}\n"
+                      f"    en: {entry['english'][:90]}\n    vi: {entry['vietnamese'][:90]}")
+
+    adherence = glossary_adherence(features)
+    report['glossary'] = {target: {'expected': total, 'found': hit}
+                          for target, (total, hit) in adherence.items()}
+    weakest = sorted(adherence.items(), key=lambda entry: entry[1][1] / entry[1][0])[:5]
+    if weakest:
+        print("\nLeast consistent glossary terms: " + ', '.join(
+            f"{target} {hit}/{total}" for target, (total, hit) in weakest))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.report}")
+
+    if args.strict and any(totals[check] for check in ERRORS):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
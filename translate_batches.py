@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parallel batch translation over data/translation-batches/batch-*.json.
+Fans the batches out across a process pool, runs a translator's
+translate_item() on every item and merges the results into translated.json.
+
+Usage:
+    python translate_batches.py --workers 8 --translator full_translator
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from json_stream import JsonArrayWriter
+from translation_memory import DATA_DIR, ensure_store
+from translation_pipeline import is_translated
+
+BATCH_PATTERN = str(DATA_DIR / 'translation-batches' / 'batch-*.json')
+OUTPUT_FILE = str(DATA_DIR / 'translated.json')
+
+# Modules exposing translate_item(item) -> item
+TRANSLATORS = ['comprehensive_translate', 'full_translator', 'translate_vocab']
+
+
+def translate_batch(translator, batch_file):
+    """Worker: translate every item of one batch file."""
+    start = time.perf_counter()
+    translate_item = importlib.import_module(translator).translate_item
+
+    with open(batch_file, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    results = [translate_item(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def merge_results(batch_files, results_by_batch):
+    """
+    Merge batch results by id, independent of completion order: items keep
+    the position of their first appearance (batch order, then item order)
+    and take the value from the last batch that produced them.
+    """
+    merged = {}
+    for batch_file in batch_files:
+        for item in results_by_batch[batch_file]:
+            merged[item['id']] = item
+    return list(merged.values())
+
+
+def run_batches(batch_files, translator, workers, retries):
+    """Translate all batches, retrying failures. Returns {batch_file: items}."""
+    results_by_batch = {}
+    attempts = {batch_file: 0 for batch_file in batch_files}
+    pending = list(batch_files)
+
+    # spawn: workers open their own SQLite connection instead of inheriting one
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        while pending:
+            futures = {
+                pool.submit(translate_batch, translator, batch_file): batch_file
+                for batch_file in pending
+            }
+            pending = []
+
+            for future in as_completed(futures):
+                batch_file = futures[future]
+                name = os.path.basename(batch_file)
+                attempts[batch_file] += 1
+
+                try:
+                    items, elapsed = future.result()
+                except Exception as e:
+                    if attempts[batch_file] <= retries:
+                        print(f"  ✗ {name}: {e} (retry {attempts[batch_file]}/{retries})")
+                        pending.append(batch_file)
+                        continue
+                    raise RuntimeError(f"{name} failed after {attempts[batch_file]} attempts") from e
+
+                results_by_batch[batch_file] = items
+                translated = sum(1 for item in items if is_translated(item))
+                print(f"  [{len(results_by_batch)}/{len(batch_files)}] {name}: "
+                      f"{translated}/{len(items)} translated in {elapsed:.2f}s")
+
+    return results_by_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batches', default=BATCH_PATTERN, help='batch file glob')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='merged output file')
+    parser.add_argument('--translator', default='comprehensive_translate', choices=TRANSLATORS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--retries', type=int, default=2, help='retries per failed batch')
+    args = parser.parse_args()
+
+    batch_files = sorted(glob.glob(args.batches))
+    if not batch_files:
+        print(f"No batch files match {args.batches}")
+        return
+
+    # Build the shared store once here rather than racing in every worker
+    ensure_store()
+
+    print(f"Translating {len(batch_files)} batches with {args.translator} "
+          f"on {args.workers} workers...")
+    start = time.perf_counter()
+    results_by_batch = run_batches(batch_files, args.translator, args.workers, args.retries)
+
+    merged = merge_results(batch_files, results_by_batch)
+    translated_count = sum(1 for item in merged if is_translated(item))
+
+    print(f"\nTranslated: {translated_count}/{len(merged)} items "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Saving to {args.output}...")
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with JsonArrayWriter(args.output) as writer:
+        for item in merged:
+            writer.write(item)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
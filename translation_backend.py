@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Async machine-translation backend for items the translation memory misses.
+
+Speaks the LibreTranslate JSON API (POST /translate with a list of texts)
+over pooled keep-alive connections. Short definitions and examples are
+packed many to a request, the number of in-flight requests is capped, and
+429/503 responses, timeouts and dropped connections are retried with
+backoff. A batch that still fails is logged and left untranslated, so
+the next run picks its items up again.
+
+A local stand-in server is included for tests and dry runs:
+
+    python translation_backend.py serve-mock --port 5005
+    python full_translator.py --backend http://127.0.0.1:5005/translate
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import metrics
+
+FIELD_PAIRS = [
+    ('englishDefinition', 'vietnameseDefinition'),
+    ('englishExample', 'vietnameseExample'),
+]
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class BackendError(Exception):
+    """The translation service failed or answered with something unusable."""
+
+
+def retry_after(value):
+    """Seconds to wait from a Retry-After header (delay or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class TranslationBackend:
+    """Interface for English -> Vietnamese services."""
+
+    async def translate(self, texts):
+        """Return one translation (or None) per text, in order."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response. Returns (status, headers, body bytes)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by server")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = b''
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+    else:
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+    return status, headers, body
+
+
+def parse_translations(body, count):
+    """The translatedText list of a 200 response body; BackendError if malformed."""
+    try:
+        translated = json.loads(body).get('translatedText')
+    except (ValueError, AttributeError) as e:
+        raise BackendError(f"malformed response: {body[:200]!r}") from e
+    if isinstance(translated, str):
+        translated = [translated]
+    if not isinstance(translated, list) or len(translated) != count:
+        raise BackendError(f"expected {count} translations, got {translated!r:.200}")
+    return translated
+
+
+class HttpTranslationBackend(TranslationBackend):
+    """
+    LibreTranslate-compatible HTTP backend.
+
+    Texts are deduplicated and packed into requests of at most batch_size
+    texts / max_chars characters; at most max_in_flight requests run at
+    once, each on a connection reused from the pool.
+    """
+
+    def __init__(self, url, source='en', target='vi', api_key=None, batch_size=32,
+                 max_chars=4000, max_in_flight=4, retries=6, backoff=0.5, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.path = parts.path or '/translate'
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.source = source
+        self.target = target
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.idle = []
+        self._semaphore = None
+        self.requests_sent = 0
+
+    def pack(self, texts):
+        """Split texts into request-sized batches."""
+        batches, batch, chars = [], [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.batch_size or chars + len(text) > self.max_chars):
+                batches.append(batch)
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def translate(self, texts):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        batches = self.pack(list(dict.fromkeys(texts)))
+        results = await asyncio.gather(*(self._translate_batch(batch) for batch in batches),
+                                       return_exceptions=True)
+
+        translations = {}
+        for batch, translated in zip(batches, results):
+            if isinstance(translated, BackendError):
+                # Left empty: incomplete items are retried on the next run
+                print(f"⚠️ Translation backend gave up on {len(batch)} texts: {translated}")
+                metrics.count('translate_backend_failures_total')
+                continue
+            if isinstance(translated, BaseException):
+                raise translated
+            translations.update(zip(batch, translated))
+        return [translations.get(text) or None for text in texts]
+
+    async def _translate_batch(self, batch):
+        payload = {'q': batch, 'source': self.source, 'target': self.target, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                delay = None
+                try:
+                    status, headers, body = await self._post(json.dumps(payload).encode('utf-8'))
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as e:
+                    if attempt == self.retries:
+                        raise BackendError(f"{type(e).__name__}: {e}") from e
+                else:
+                    if status == 200:
+                        try:
+                            return parse_translations(body, len(batch))
+                        except BackendError:
+                            if attempt == self.retries:
+                                raise
+                    elif status not in RETRY_STATUSES or attempt == self.retries:
+                        raise BackendError(f"HTTP {status}: {body[:200]!r}")
+                    else:
+                        delay = retry_after(headers.get('retry-after'))
+
+                # Honour Retry-After, else exponential backoff with jitter
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt
+                await asyncio.sleep(delay * (1 + random.random() / 4))
+
+    async def _post(self, body):
+        request = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode('latin-1') + body
+
+        # A pooled connection may have been closed by the server meanwhile
+        for reused in (True, False):
+            if reused and not self.idle:
+                continue
+            if reused:
+                reader, writer = self.idle.pop()
+            else:
+                # A blackholed host would otherwise hang the connect forever
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, response = await asyncio.wait_for(
+                    read_response(reader), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue
+                raise
+            except asyncio.TimeoutError:
+                # A late response would be read as the answer to the next request
+                writer.close()
+                raise
+
+            self.requests_sent += 1
+            if headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                self.idle.append((reader, writer))
+            return status, headers, response
+
+    async def close(self):
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+
+
+async def fill_items(items, backend):
+    """Fill empty Vietnamese fields of items from backend. Returns the count filled."""
+    slots = [
+        (item, target_field, item[source_field])
+        for item in items
+        for source_field, target_field in FIELD_PAIRS
+        if item.get(source_field) and not item.get(target_field)
+    ]
+    if not slots:
+        return 0
+
+    with metrics.timer('translate.fallback', source='backend'):
+        translations = await backend.translate([text for _, _, text in slots])
+    filled = 0
+    for (item, target_field, _), translation in zip(slots, translations):
+        if translation:
+            item[target_field] = translation
+            filled += 1
+    return filled
+
+
+def fill_stage(triples, backend, window=256, skip=()):
+    """
+    Pipeline stage over (item, prior, dirty): fill misses of dirty items,
+    window items at a time, on one event loop so connections are reused.
+    Items whose id is in skip (already drafted) are left alone.
+    """
+    loop = asyncio.new_event_loop()
+    filled = 0
+    try:
+        window_items = []
+        for triple in triples:
+            window_items.append(triple)
+            if len(window_items) >= window:
+                dirty = [item for item, _, is_dirty in window_items
+                         if is_dirty and item['id'] not in skip]
+                filled += loop.run_until_complete(fill_items(dirty, backend))
+                yield from window_items
+                window_items = []
+
+        dirty = [item for item, _, is_dirty in window_items
+                 if is_dirty and item['id'] not in skip]
+        filled += loop.run_until_complete(fill_items(dirty, backend))
+        yield from window_items
+
+        print(f"Backend filled {filled} fields in {backend.requests_sent} requests")
+    finally:
+        loop.run_until_complete(backend.close())
+        loop.close()
+
+
+class MockTranslationServer:
+    """
+    Local LibreTranslate stand-in.
+
+    Translates with translate_text (default: tags the English text with
+    "[vi]"), keeps connections alive and, with rate_limit_every=N, answers
+    every Nth request with 429 so client backoff can be exercised.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, translate_text=None, rate_limit_every=0):
+        self.host = host
+        self.port = port
+        self.translate_text = translate_text or (lambda text: f"[vi] {text}")
+        self.rate_limit_every = rate_limit_every
+        self.server = None
+        self.requests = 0
+        self.connections = 0
+        self.handlers = {}
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/translate"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        # Hang up idle keep-alive clients so their handlers finish cleanly
+        for writer in self.handlers.values():
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.handlers[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                self.requests += 1
+                writer.write(self._respond(method, path, body))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.handlers.pop(asyncio.current_task(), None)
+            writer.close()
+
+    def _respond(self, method, path, body):
+        extra = ''
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            status, payload, extra = 429, {'error': 'Too many requests'}, 'Retry-After: 0.01\r\n'
+        elif method != 'POST' or path != '/translate':
+            status, payload = 404, {'error': 'Not found'}
+        else:
+            texts = json.loads(body).get('q', [])
+            if isinstance(texts, str):
+                translated = self.translate_text(texts)
+            else:
+                translated = [self.translate_text(text) for text in texts]
+            status, payload = 200, {'translatedText': translated}
+
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        reason = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests'}[status]
+        return (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"{extra}"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode('latin-1') + data
+
+
+async def serve_mock(host, port, rate_limit_every):
+    async with MockTranslationServer(host, port, rate_limit_every=rate_limit_every) as server:
+        print(f"Mock translation server on {server.url}")
+        await server.server.serve_forever()
+
+
+async def translate_texts(url, texts):
+    backend = HttpTranslationBackend(url)
+    try:
+        for text, translation in zip(texts, await backend.translate(texts)):
+            print(f"{text}\n  -> {translation}")
+    finally:
+        await backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    mock_cmd = sub.add_parser('serve-mock', help='run the local stand-in server')
+    mock_cmd.add_argument('--host', default='127.0.0.1')
+    mock_cmd.add_argument('--port', type=int, default=5005)
+    mock_cmd.add_argument('--rate-limit-every', type=int, default=0,
+                          help='answer every Nth request with 429')
+
+    translate_cmd = sub.add_parser('translate', help='translate texts with a backend')
+    translate_cmd.add_argument('url')
+    translate_cmd.add_argument('texts', nargs='+')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'serve-mock':
+            asyncio.run(serve_mock(args.host, args.port, args.rate_limit_every))
+        else:
+            asyncio.run(translate_texts(args.url, args.texts))
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+
+
+if __name__ == '__main__':
+    main()
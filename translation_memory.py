@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Translation memory engine for the IELTS vocabulary translators.
+Built once at startup; every lookup is O(1) for literal sentences,
+whatever the table size.
+
+The on-disk TranslationStore (SQLite) holds the literal translations shared
+by translate_vocab.py, full_translator.py and comprehensive_translate.py.
+Build or refresh it with:
+
+    python translation_memory.py import
+
+The hand-checked tables the translators used to carry as literals live in
+data/legacy-translations.json; they are imported after the corpus files
+and win over them.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+DEFAULT_STORE = DATA_DIR / 'translation-memory.sqlite'
+
+# Imported in order, so later files win: the merged output has the final say
+DEFAULT_SOURCES = [
+    str(DATA_DIR / 'translation-batches' / 'batch-*.json'),
+    str(DATA_DIR / 'translated.json'),
+]
+
+# Hand-checked sentences and per-item overrides, imported last so they win
+LEGACY_TABLES = DATA_DIR / 'legacy-translations.json'
+
+# (item field, store field) pairs; 'def'/'ex' match the old per-id table keys
+FIELDS = [
+    ('englishDefinition', 'vietnameseDefinition', 'def'),
+    ('englishExample', 'vietnameseExample', 'ex'),
+]
+
+# Typographic quotes that show up in pasted definitions/examples
+QUOTE_MAP = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '‛': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"',
+    '´': "'", '`': "'",
+})
+
+WHITESPACE_RE = re.compile(r'\s+')
+LEADING_QUOTES_RE = re.compile(r'^[\s\'"]+')
+TRAILING_PUNCT_RE = re.compile(r'[\s.!?;:,…\'"]+$')
+
+
+def normalize_text(text):
+    """
+    Normalize English source text for exact-match lookups.
+    Unicode NFC, straight quotes, collapsed whitespace, no wrapping quotes
+    and no trailing punctuation.
+    """
+    text = unicodedata.normalize('NFC', text).translate(QUOTE_MAP)
+    text = WHITESPACE_RE.sub(' ', text)
+    text = LEADING_QUOTES_RE.sub('', text)
+    return TRAILING_PUNCT_RE.sub('', text)
+
+
+def text_hash(text, normalized=False):
+    """Stable hash of the normalized source text, used as the store key."""
+    if not normalized:
+        text = normalize_text(text)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Exact-match hash index over literal sentences.
+
+    Entries are keyed by their normalized source text. An optional
+    TranslationStore is consulted on a miss.
+    """
+
+    def __init__(self, entries=None, store=None):
+        self.store = store
+        self.exact = {}
+
+        for source, target in (entries or {}).items():
+            self.add(source, target)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def add(self, source, target):
+        """Add a literal sentence; the first translation for a key wins."""
+        self.exact.setdefault(normalize_text(source), target)
+
+    def lookup(self, text):
+        """Return the Vietnamese translation for text, or None on a miss."""
+        if not text:
+            return None
+
+        key = normalize_text(text)
+        hit = self.exact.get(key)
+        if hit is not None:
+            return hit
+
+        if self.store is not None:
+            return self.store.lookup(key, normalized=True)
+        return None
+
+
+class TranslationStore:
+    """
+    SQLite-backed translation memory.
+
+    `segments` maps a normalized source-text hash to its translation and
+    `items` maps (item id, 'def'|'ex') to the translation applied to that
+    item. Rows are read on demand, so opening the store costs milliseconds
+    however large the corpus grows.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS segments (
+            hash TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            target TEXT NOT NULL,
+            PRIMARY KEY (id, field)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=DEFAULT_STORE, readonly=False):
+        self.path = Path(path)
+        if readonly:
+            self.conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(self.path)
+            self.conn.executescript(self.SCHEMA)
+        # Let SQLite page the file in through mmap instead of read() calls
+        self.conn.execute('PRAGMA mmap_size = 268435456')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def lookup(self, text, normalized=False):
+        """Translation for an English sentence, or None on a miss."""
+        row = self.conn.execute(
+            'SELECT target FROM segments WHERE hash = ?',
+            (text_hash(text, normalized),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def iter_segments(self):
+        """Every (normalized source, translation) pair in the store."""
+        return iter(self.conn.execute('SELECT source, target FROM segments'))
+
+    def get(self, item_id, field):
+        """Translation applied to item_id's 'def' or 'ex' field, or None."""
+        row = self.conn.execute(
+            'SELECT target FROM items WHERE id = ? AND field = ?',
+            (item_id, field)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, source, target, item_id=None, field=None):
+        """Store one translation; existing rows for the same keys are replaced."""
+        key = normalize_text(source)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO segments VALUES (?, ?, ?)',
+            (text_hash(key, normalized=True), key, target)
+        )
+        if item_id is not None:
+            self.put_item(item_id, field, target)
+
+    def put_item(self, item_id, field, target):
+        """Store the translation applied to one item field, whatever its source text."""
+        self.conn.execute('INSERT OR REPLACE INTO items VALUES (?, ?, ?)', (item_id, field, target))
+
+    def import_items(self, items):
+        """Bulk import translated vocabulary items. Returns the rows written."""
+        count = 0
+        with self.conn:
+            for item in items:
+                for source_field, target_field, field in FIELDS:
+                    source = item.get(source_field)
+                    target = item.get(target_field)
+                    if source and target:
+                        self.put(source, target, item.get('id'), field)
+                        count += 1
+        return count
+
+    def import_files(self, patterns=DEFAULT_SOURCES):
+        """Import every JSON item array matching patterns, in order."""
+        total = 0
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                with open(path, 'r', encoding='utf-8') as f:
+                    count = self.import_items(json.load(f))
+                print(f"  {path}: {count} translations")
+                total += count
+        return total
+
+    def import_legacy(self, path=LEGACY_TABLES):
+        """
+        Import the legacy sentence and per-item tables over whatever is
+        stored, and record the file's hash so it is only imported once.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        tables = json.loads(data)
+        with self.conn:
+            for entry in tables['segments']:
+                self.put(entry['source'], entry['target'])
+            for entry in tables['items']:
+                self.put_item(entry['id'], entry['field'], entry['target'])
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                              ('legacy', legacy_hash(data)))
+        print(f"  {path}: {len(tables['segments'])} sentences, {len(tables['items'])} item fields")
+        return len(tables['segments']) + len(tables['items'])
+
+    def legacy_imported(self, path=LEGACY_TABLES):
+        """True if the current legacy tables are already in the store."""
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy'").fetchone()
+        except sqlite3.OperationalError:  # stores built before the meta table
+            return False
+        with open(path, 'rb') as f:
+            return row is not None and row[0] == legacy_hash(f.read())
+
+
+def legacy_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+_shared_store = None
+
+
+def ensure_store(path=DEFAULT_STORE):
+    """
+    Build the store from the bundled data if it does not exist yet, and
+    bring in the legacy tables if it predates (the current version of) them.
+    """
+    if not Path(path).exists():
+        print(f"Building translation memory at {path}...")
+        with TranslationStore(path) as store:
+            store.import_files()
+            store.import_legacy()
+        return
+
+    with TranslationStore(path, readonly=True) as store:
+        if store.legacy_imported():
+            return
+    print(f"Importing legacy translation tables into {path}...")
+    with TranslationStore(path) as store:
+        store.import_legacy()
+
+
+def shared_store(path=DEFAULT_STORE):
+    """
+    Process-wide read-only store, built from the bundled data on first use.
+    Opened lazily so forked workers get their own SQLite connection.
+    """
+    global _shared_store
+
+    if _shared_store is None:
+        ensure_store(path)
+        _shared_store = TranslationStore(path, readonly=True)
+
+    return _shared_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=str(DEFAULT_STORE), help='SQLite store path')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = sub.add_parser('import', help='bulk import translated item files')
+    import_cmd.add_argument('files', nargs='*', default=DEFAULT_SOURCES,
+                            help='JSON files or glob patterns, later ones win')
+
+    lookup_cmd = sub.add_parser('lookup', help='look up one English sentence')
+    lookup_cmd.add_argument('text')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        start = time.perf_counter()
+        with TranslationStore(args.db) as store:
+            total = store.import_files(args.files)
+            total += store.import_legacy()
+            print(f"Imported {total} translations ({len(store)} item fields) "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+    elif args.command == 'lookup':
+        start = time.perf_counter()
+        with TranslationStore(args.db, readonly=True) as store:
+            print(store.lookup(args.text) or '(no translation)')
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms including open)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Shared driver for the translation entry points.
+Runs a per-item translate function over data/to-translate.json, skipping
+items whose English text, other fields and applied translation are
+unchanged since the last run (tracked in a manifest next to the output file).
+
+With --stream, items flow one at a time from the input file, through the
+translate stages, into a temp file that replaces the output on success.
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import metrics
+from fuzzy_memory import DEFAULT_THRESHOLD, fuzzy_draft
+from glossary import draft_item
+from json_stream import JsonArrayWriter, iter_json_array
+
+SOURCE_FIELDS = ('englishDefinition', 'englishExample')
+TRANSLATION_FIELDS = ('vietnameseDefinition', 'vietnameseExample')
+
+
+def content_hash(item, fields):
+    """Hash of the given item fields, stable across runs and key order."""
+    payload = json.dumps([item.get(field, '') for field in fields], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def metadata_hash(item):
+    """Hash of every field that is not a translation (word, type, fileId, ...)."""
+    fields = {field: value for field, value in item.items() if field not in TRANSLATION_FIELDS}
+    payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def manifest_path_for(output_file):
+    """data/translated.json -> data/translated.manifest.json"""
+    path = Path(output_file)
+    return path.with_name(f"{path.stem}.manifest.json")
+
+
+class Manifest:
+    """
+    Per-item hashes from the previous run.
+
+    `items` maps item id to {"fileId", "source", "metadata", "translation"}
+    where source hashes the English fields, metadata every other input
+    field and translation what was written out. A change of translator
+    invalidates every entry.
+    """
+
+    def __init__(self, path, translator='', items=None):
+        self.path = Path(path)
+        self.translator = translator
+        self.items = items or {}
+
+    @classmethod
+    def load(cls, path, translator=''):
+        path = Path(path)
+        if not path.exists():
+            return cls(path, translator)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('translator') != translator:
+            return cls(path, translator)
+        return cls(path, translator, data.get('items', {}))
+
+    def is_clean(self, item, previous):
+        """
+        True if item was translated before and its output is still intact.
+        Incomplete items are never clean, so misses are retried every run.
+        """
+        entry = self.items.get(item['id'])
+        return (
+            entry is not None
+            and previous is not None
+            and is_translated(previous)
+            and entry['source'] == content_hash(item, SOURCE_FIELDS)
+            # Entries from before metadata was hashed rely on the rewrite check
+            and entry.get('metadata') in (None, metadata_hash(item))
+            and entry['translation'] == content_hash(previous, TRANSLATION_FIELDS)
+        )
+
+    def record(self, item):
+        self.items[item['id']] = {
+            'fileId': item.get('fileId', ''),
+            'source': content_hash(item, SOURCE_FIELDS),
+            'metadata': metadata_hash(item),
+            'translation': content_hash(item, TRANSLATION_FIELDS),
+        }
+
+    def prune(self, ids):
+        """Forget items that are no longer in the input."""
+        ids = set(ids)
+        self.items = {item_id: entry for item_id, entry in self.items.items() if item_id in ids}
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'translator': self.translator, 'items': self.items},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def is_translated(item):
+    return bool(item.get('vietnameseDefinition') and item.get('vietnameseExample'))
+
+
+def load_items(path):
+    with metrics.timer('translate.load'), open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_items(path, items):
+    with metrics.timer('translate.write'), open(path, 'w', encoding='utf-8') as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+
+
+def count_lookups(item):
+    """Translation-memory hit/miss counters for one translated item."""
+    labels = {'fileId': item.get('fileId', ''), 'type': item.get('type', '')}
+    for source_field, target_field in zip(SOURCE_FIELDS, TRANSLATION_FIELDS):
+        if item.get(source_field):
+            result = 'hit' if item.get(target_field) else 'miss'
+            metrics.count('tm_lookups_total', result=result, **labels)
+
+
+def print_file_stats(stats):
+    """Dirty/clean counts per fileId, dirty files first."""
+    dirty_files = sorted(file_id for file_id, (dirty, _) in stats.items() if dirty)
+    for file_id in dirty_files:
+        dirty, clean = stats[file_id]
+        print(f"  {file_id}: {dirty} dirty, {clean} clean")
+
+    clean_files = len(stats) - len(dirty_files)
+    if clean_files:
+        print(f"  ({clean_files} files unchanged)")
+
+
+def pair_with_previous(items, previous, known_ids=None):
+    """
+    Stage: yield (item, prior output item or None), paired by id.
+
+    The previous output is read ahead only as far as the item's id, so an
+    unchanged order costs nothing; prior items passed on the way wait in a
+    buffer until their id comes up (an insert or removal buffers one item,
+    a reorder more). Ids not in known_ids, the manifest, were never
+    written, so they do not send the reader through the rest of the file.
+    Items without an id take the next prior item by position.
+    """
+    previous = iter(previous)
+    pending = {}
+    for item in items:
+        item_id = item.get('id')
+        if item_id is None:
+            yield item, next(previous, None)
+            continue
+
+        prior = pending.pop(item_id, None)
+        if prior is None and (known_ids is None or item_id in known_ids):
+            for candidate in previous:
+                if candidate.get('id') == item_id:
+                    prior = candidate
+                    break
+                pending[candidate.get('id')] = candidate
+        yield item, prior
+
+
+def translate_stage(pairs, translate_item, manifest, force=False):
+    """
+    Stage: yield (output item, prior, dirty), translating only dirty items.
+    A clean item is the current input with the prior translations merged in.
+    """
+    for item, prior in pairs:
+        if not force and manifest.is_clean(item, prior):
+            merged = dict(item)
+            merged.update((field, prior[field]) for field in TRANSLATION_FIELDS if field in prior)
+            yield merged, prior, False
+            continue
+
+        with metrics.timer('translate.match'):
+            item = translate_item(item)
+        if metrics.enabled():
+            count_lookups(item)
+        yield item, prior, True
+
+
+def record_stage(triples, manifest, stats):
+    """Stage: record dirty items in the manifest; yield (output item, changed)."""
+    for item, prior, dirty in triples:
+        file_stats = stats[item.get('fileId', '')]
+        if dirty:
+            manifest.record(item)
+            file_stats[0] += 1
+        else:
+            file_stats[1] += 1
+        yield item, item != prior
+
+
+def fuzzy_stage(triples, drafts, drafted, covered, threshold):
+    """
+    Stage: draft incomplete dirty items from near-duplicate translations.
+    Drafts go to drafts and, by id, to drafted; ids whose every missing
+    field has a match at or above threshold go to covered, so the backend
+    does not spend a request on them.
+    """
+    for item, prior, dirty in triples:
+        if dirty and not is_translated(item):
+            with metrics.timer('translate.fallback', source='fuzzy'):
+                item_draft, complete = fuzzy_draft(item, threshold)
+            if item_draft:
+                drafts.append(item_draft)
+                drafted[item['id']] = item_draft
+                if complete:
+                    covered.add(item['id'])
+        yield item, prior, dirty
+
+
+def draft_stage(triples, drafts, drafted=None):
+    """
+    Stage: append glossary drafts for items that are still incomplete.
+    Items with a fuzzy draft already only gain the fields it lacks.
+    """
+    if drafted is None:
+        drafted = {}
+    for item, prior, dirty in triples:
+        if not is_translated(item):
+            with metrics.timer('translate.fallback', source='glossary'):
+                item_drafts = draft_item(item)
+            if item_drafts:
+                existing = drafted.get(item['id'])
+                if existing is None:
+                    drafts.append(item_drafts)
+                else:
+                    for field, value in item_drafts.items():
+                        existing.setdefault(field, value)
+        yield item, prior, dirty
+
+
+def build_stages(pairs, translate_item, manifest, stats, force=False, backend=None,
+                 drafts=None, fuzzy_threshold=DEFAULT_THRESHOLD):
+    """
+    Chain the translate stages. With a drafts list, items the translate
+    function leaves incomplete are first drafted from near-duplicate
+    translations (fuzzy_threshold, 0 to skip). With a backend URL, the
+    rest are filled by the machine-translation backend in concurrent
+    batches before they are recorded. Whatever is still missing after that
+    gets a glossary draft.
+    """
+    triples = translate_stage(pairs, translate_item, manifest, force)
+    drafted = {}
+    covered = set()
+    if drafts is not None and fuzzy_threshold:
+        triples = fuzzy_stage(triples, drafts, drafted, covered, fuzzy_threshold)
+    if backend:
+        from translation_backend import HttpTranslationBackend, fill_stage
+        triples = fill_stage(triples, HttpTranslationBackend(backend), skip=covered)
+    if drafts is not None:
+        triples = draft_stage(triples, drafts, drafted)
+    return record_stage(triples, manifest, stats)
+
+
+def save_drafts(drafts_file, drafts):
+    if drafts_file is None:
+        return
+    fuzzy = sum(1 for item_drafts in drafts if 'fuzzyMatches' in item_drafts)
+    print(f"Writing {len(drafts)} drafts ({fuzzy} from fuzzy matches) to {drafts_file}...")
+    save_items(drafts_file, drafts)
+
+
+def print_summary(stats, translated_count, total):
+    dirty = sum(counts[0] for counts in stats.values())
+    print(f"Dirty: {dirty}, clean: {total - dirty}")
+    print_file_stats(stats)
+    print(f"\nTranslated: {translated_count}/{total} items")
+
+
+def stream_translation(translate_item, input_file, output_file, translator='', force=False,
+                       backend=None, drafts_file=None, fuzzy_threshold=DEFAULT_THRESHOLD):
+    """
+    Streaming variant of run_translation: memory stays flat in the corpus size.
+    The output is only replaced if some item changed.
+    """
+    print(f"Streaming {input_file}...")
+
+    previous = iter(())
+    prior_ids = []
+    if os.path.exists(output_file) and not force:
+        previous = metrics.timed_iter(iter_json_array(output_file), 'translate.load')
+    # Every prior item read, in file order, to compare with what is written
+    priors = (prior_ids.append(prior.get('id')) or prior for prior in previous)
+
+    manifest = Manifest.load(manifest_path_for(output_file), translator)
+    stats = defaultdict(lambda: [0, 0])
+    seen_ids = []
+    translated_count = 0
+    changed = force
+
+    drafts = [] if drafts_file else None
+    items = metrics.timed_iter(iter_json_array(input_file), 'translate.load')
+    pairs = pair_with_previous(items, priors, manifest.items)
+    stages = build_stages(pairs, translate_item, manifest, stats, force, backend, drafts,
+                          fuzzy_threshold)
+    with JsonArrayWriter(output_file) as writer:
+        for item, item_changed in stages:
+            with metrics.timer('translate.write'):
+                writer.write(item)
+            seen_ids.append(item['id'])
+            changed = changed or item_changed
+            translated_count += is_translated(item)
+
+            if writer.count % 100 == 0:
+                print(f"Processed {writer.count} items...")
+
+        # Any added, removed or reordered item means the output must be rewritten
+        if not changed:
+            prior_ids.extend(prior.get('id') for prior in previous)
+            changed = prior_ids != seen_ids
+        if hasattr(previous, 'close'):
+            previous.close()  # release the file before it is replaced
+        if not changed:
+            writer.discard()
+
+    print(f"Total items: {writer.count}")
+    print_summary(stats, translated_count, writer.count)
+    if changed:
+        print(f"Saved to {output_file}")
+    else:
+        print(f"No changes, leaving {output_file} as is")
+    save_drafts(drafts_file, drafts)
+
+    manifest.prune(seen_ids)
+    manifest.save()
+    return translated_count
+
+
+def run_translation(translate_item, input_file, output_file, translator='', force=False,
+                    stream=False, backend=None, drafts_file=None,
+                    fuzzy_threshold=DEFAULT_THRESHOLD):
+    """
+    Translate input_file into output_file, reusing unchanged items.
+
+    translate_item(item) mutates and returns one item. backend is an optional
+    machine-translation service URL for whatever translate_item misses, and
+    drafts_file collects fuzzy-match and glossary drafts for what is still
+    missing; items fully covered by fuzzy matches above fuzzy_threshold are
+    not sent to the backend.
+    Returns the number of fully translated items in the output.
+    """
+    if stream:
+        return stream_translation(translate_item, input_file, output_file, translator, force,
+                                  backend, drafts_file, fuzzy_threshold)
+
+    print(f"Loading {input_file}...")
+    data = load_items(input_file)
+    print(f"Total items: {len(data)}")
+
+    previous = {}
+    if os.path.exists(output_file) and not force:
+        previous = {item['id']: item for item in load_items(output_file)}
+
+    manifest = Manifest.load(manifest_path_for(output_file), translator)
+    stats = defaultdict(lambda: [0, 0])
+    # Any added, removed or reordered item means the output must be rewritten
+    changed = force or list(previous) != [item['id'] for item in data]
+    results = []
+
+    drafts = [] if drafts_file else None
+    pairs = ((item, previous.get(item['id'])) for item in data)
+    stages = build_stages(pairs, translate_item, manifest, stats, force, backend, drafts,
+                          fuzzy_threshold)
+    for item, item_changed in stages:
+        results.append(item)
+        changed = changed or item_changed
+
+    translated_count = sum(1 for item in results if is_translated(item))
+    print_summary(stats, translated_count, len(data))
+
+    if changed:
+        print(f"Saving to {output_file}...")
+        save_items(output_file, results)
+    else:
+        print(f"No changes, leaving {output_file} as is")
+    save_drafts(drafts_file, drafts)
+
+    manifest.prune(item['id'] for item in data)
+    manifest.save()
+    return translated_count
+
+
+def parse_args(description, input_file, output_file):
+    """Common command line for the translator entry points."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--input', default=input_file, help='items to translate')
+    parser.add_argument('--output', default=output_file, help='translated items')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the manifest and retranslate every item')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream items through instead of loading whole files')
+    parser.add_argument('--backend', metavar='URL',
+                        help='machine-translation service for items the translator misses')
+    parser.add_argument('--drafts', metavar='PATH',
+                        help='write fuzzy-match and glossary drafts for untranslated items')
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='similarity above which a near-duplicate translation is drafted '
+                             'instead of sent to the backend (0 disables)')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='write a JSON report of stage timings and hit/miss counts')
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable()
+        atexit.register(write_metrics_report, args.metrics)
+    return args
+
+
+def write_metrics_report(path):
+    metrics.write_report(path)
+    print(f"Metrics report written to {path}")
@@ -0,0 +1,337 @@
+"""
+Asyncio HTTP API for the TTS server.
+
+A small keep-alive HTTP/1.1 server on asyncio streams, so the quiz and
+video front-ends can fetch speech without going through Gradio:
+
+    GET  /tts?text=...       encoded audio for one text
+    POST /tts                {"text": "..."}, same response
+    POST /tts/batch          {"texts": [...], "inline": false} -> JSON list of
+                             {text, url, etag, bytes[, audio (base64)]}
+    GET  /audio/<etag>       audio synthesized earlier, e.g. by a batch
+    GET  /health             200 once the model is ready, 503 before
+
+Audio is content-addressed: the ETag is the speech cache key, derived from
+the text and every synthesis setting, so If-None-Match is answered with
+304 before any lookup. Cache misses go to synthesize() on a thread pool
+sized to max_pending; beyond that, requests get 503 with Retry-After
+instead of piling up behind the model.
+"""
+
+import asyncio
+import base64
+import json
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+
+MAX_BODY_BYTES = 256 * 1024
+MAX_TEXT_CHARS = 2000
+MAX_BATCH_TEXTS = 64
+KEEP_ALIVE_TIMEOUT = 15
+RETRY_AFTER_S = 1
+
+REASONS = {
+    200: 'OK', 204: 'No Content', 304: 'Not Modified', 400: 'Bad Request',
+    404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+# The front-ends are static pages that may be served from another origin
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Overloaded(HttpError):
+    def __init__(self, message='inference queue is full'):
+        super().__init__(503, message, {'Retry-After': str(RETRY_AFTER_S)})
+
+
+class SpeechApi:
+    """
+    HTTP front for a speech cache and synthesizer.
+
+    key_for(text) returns the cache key (used as ETag), cached(key) the
+    stored bytes or None, and synthesize(text) the encoded bytes of a
+    fresh synthesis, storing them so cached() finds them afterwards; it
+    may raise TimeoutError while the model is loading. is_ready() gates
+    /health and queue_depth(), when given, adds load from other callers
+    (e.g. the Gradio UI) to the backpressure check.
+    """
+
+    def __init__(self, key_for, cached, synthesize, mime_type, is_ready=lambda: True,
+                 queue_depth=None, host='0.0.0.0', port=7862, max_pending=64):
+        self.key_for = key_for
+        self.cached = cached
+        self.synthesize = synthesize
+        self.mime_type = mime_type
+        self.is_ready = is_ready
+        self.queue_depth = queue_depth
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.pending = 0
+        self.server = None
+        # One thread per in-flight synthesis, so they all reach the batcher
+        self.executor = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix='tts-api')
+        self.connections = set()
+        self.requests = 0
+        self.not_modified = 0
+        self.rejected = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                 backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'rejected': self.rejected,
+            'pending': self.pending,
+            'connections': len(self.connections),
+        }
+
+    async def _handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be skipped, so the connection cannot be reused
+                    writer.write(self._response(400, *json_body({'error': 'invalid Content-Length'}),
+                                                keep_alive=False))
+                    await writer.drain()
+                    break
+                if length > MAX_BODY_BYTES:
+                    writer.write(self._response(413, *json_body({'error': 'body too large'}),
+                                                keep_alive=False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                self.requests += 1
+                status, content_type, data, extra = await self._dispatch(
+                    method, target, headers, body)
+                metrics.count('tts_api_requests_total', status=str(status))
+                writer.write(self._response(status, content_type, data, extra, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        try:
+            if method == 'OPTIONS':
+                return 204, None, b'', {}
+            if url.path == '/health':
+                ready = self.is_ready()
+                return (200 if ready else 503, *json_body({'ready': ready, **self.stats()}), {})
+            if url.path == '/tts':
+                if method == 'GET':
+                    text = parse_qs(url.query).get('text', [''])[0]
+                elif method == 'POST':
+                    text = parse_json(body).get('text', '')
+                else:
+                    raise HttpError(405, 'use GET or POST')
+                return await self._single(text, headers)
+            if url.path == '/tts/batch':
+                if method != 'POST':
+                    raise HttpError(405, 'use POST')
+                return await self._batch(parse_json(body))
+            if url.path.startswith('/audio/') and method == 'GET':
+                return await self._audio(url.path[len('/audio/'):], headers)
+            raise HttpError(404, 'not found')
+        except HttpError as e:
+            if isinstance(e, Overloaded):
+                self.rejected += 1
+            return (e.status, *json_body({'error': str(e)}), e.headers)
+        except Exception as e:
+            # Synthesis, encoding or a failed model load: answer instead of dropping the connection
+            print(f"❌ {method} {url.path} failed: {e}")
+            traceback.print_exc()
+            return (500, *json_body({'error': f'{type(e).__name__}: {e}'}), {})
+
+    async def _single(self, text, headers):
+        key = self.key_for(check_text(text))
+        if not_modified(headers, key):
+            self.not_modified += 1
+            return 304, None, b'', {'ETag': etag(key)}
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, self.cached, key)
+        if data is None:
+            self._reserve(1)
+            try:
+                data = await self._synthesize(text)
+            finally:
+                self.pending -= 1
+        return 200, self.mime_type, data, audio_headers(key)
+
+    async def _batch(self, payload):
+        texts = payload.get('texts')
+        if not isinstance(texts, list) or not texts:
+            raise HttpError(400, 'texts must be a non-empty list')
+        if len(texts) > MAX_BATCH_TEXTS:
+            raise HttpError(413, f'at most {MAX_BATCH_TEXTS} texts per batch')
+        keys = [self.key_for(check_text(text)) for text in texts]
+
+        loop = asyncio.get_running_loop()
+        found = await loop.run_in_executor(None, lambda: [self.cached(key) for key in keys])
+        unique_misses = {}
+        for text, key, data in zip(texts, keys, found):
+            if data is None:
+                unique_misses.setdefault(key, text)
+
+        # Submit every miss at once, so they share batched forward passes
+        self._reserve(len(unique_misses))
+        try:
+            results = await asyncio.gather(
+                *(self._synthesize(text) for text in unique_misses.values()))
+        finally:
+            self.pending -= len(unique_misses)
+        fresh = dict(zip(unique_misses, results))
+
+        items = []
+        for text, key, data in zip(texts, keys, found):
+            data = data if data is not None else fresh[key]
+            item = {'text': text, 'url': f'/audio/{key}', 'etag': etag(key), 'bytes': len(data)}
+            if payload.get('inline'):
+                item['audio'] = base64.b64encode(data).decode('ascii')
+            items.append(item)
+
+        return (200, *json_body({
+            'mimeType': self.mime_type,
+            'cached': sum(data is not None for data in found),
+            'items': items,
+        }), {})
+
+    async def _audio(self, key, headers):
+        if not_modified(headers, key):
+            self.not_modified += 1
+            return 304, None, b'', {'ETag': etag(key)}
+        data = await asyncio.get_running_loop().run_in_executor(None, self.cached, key)
+        if data is None:
+            raise HttpError(404, 'audio not cached; request it through /tts')
+        return 200, self.mime_type, data, audio_headers(key)
+
+    def _reserve(self, count):
+        """Claim count synthesis slots, or refuse with 503."""
+        if not count:
+            return
+        backlog = self.queue_depth() if self.queue_depth else 0
+        if self.pending + count > self.max_pending or backlog >= self.max_pending:
+            raise Overloaded()
+        self.pending += count
+
+    async def _synthesize(self, text):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self.synthesize, text)
+        except TimeoutError:
+            raise HttpError(503, 'model is still loading', {'Retry-After': '5'})
+
+    def _response(self, status, content_type, data, extra=None, keep_alive=True):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        if status != 304:
+            lines.append(f"Content-Length: {len(data)}")
+        for name, value in {**CORS_HEADERS, **(extra or {})}.items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + data
+
+
+def etag(key):
+    return f'"{key}"'
+
+
+def not_modified(headers, key):
+    match = headers.get('if-none-match')
+    if not match:
+        return False
+    return match.strip() == '*' or etag(key) in (tag.strip() for tag in match.split(','))
+
+
+def audio_headers(key):
+    # Revalidation is a cheap 304, so settings changes show up within a day
+    return {'ETag': etag(key), 'Cache-Control': 'public, max-age=86400'}
+
+
+def json_body(payload):
+    return 'application/json; charset=utf-8', json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def parse_json(body):
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError:
+        raise HttpError(400, 'body is not valid JSON')
+    if not isinstance(payload, dict):
+        raise HttpError(400, 'body must be a JSON object')
+    return payload
+
+
+def check_text(text):
+    if not isinstance(text, str) or not text.strip():
+        raise HttpError(400, 'text is required')
+    if len(text) > MAX_TEXT_CHARS:
+        raise HttpError(413, f'text is longer than {MAX_TEXT_CHARS} characters')
+    return text
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+CPU inference backends for the MMS VITS model, plus a benchmark.
+
+    fp32         the model as loaded (reference)
+    int8         dynamic int8 quantization of the Linear layers
+    torchscript  traced graph, frozen and optimized for inference
+    onnx         exported graph run by onnxruntime
+
+Every backend takes tokenizer output and returns (waveforms, lengths) the
+way the model does. Exported graphs are cached under models/ and reused.
+
+Usage:
+    python tts_backends.py --backends fp32 int8 torchscript onnx --threads 4
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+MODEL_NAME = "facebook/mms-tts-vie"
+EXPORT_DIR = Path("models") / MODEL_NAME
+BACKENDS = ("fp32", "int8", "torchscript", "onnx")
+# Zero frames after every row before decoding; covers the HiFi-GAN receptive field
+DECODER_MARGIN_FRAMES = 16
+
+# Fixed sentence set for the benchmark, short to paragraph length
+BENCHMARK_SENTENCES = [
+    "Xin chào.",
+    "Học tiếng Việt rất thú vị và bổ ích.",
+    "Hôm nay trời đẹp, chúng ta đi chơi nhé!",
+    "Tôi thích ăn phở và bánh mì vào buổi sáng.",
+    "Việt Nam là một quốc gia đẹp với lịch sử và văn hóa phong phú.",
+    "Công nghệ trí tuệ nhân tạo đang phát triển nhanh chóng trên toàn thế giới.",
+    "Lớp học trình độ hỗn hợp giúp học sinh học tập từ bạn bè và phát triển kỹ năng xã hội.",
+    "Giáo dục hòa nhập đòi hỏi giáo viên phải điều chỉnh phương pháp giảng dạy cho phù hợp "
+    "với nhịp độ học tập khác nhau của từng học sinh trong cùng một lớp.",
+]
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Set torch's intra-op (per operator) and inter-op thread counts.
+    Defaults to one intra-op thread per physical core, which avoids the
+    oversubscription torch's default of all logical CPUs can cause.
+    """
+    import torch
+
+    intra_op = intra_op or max(1, (os.cpu_count() or 2) // 2)
+    torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            pass  # only settable before the first parallel op runs
+    return intra_op
+
+
+class InferenceBackend:
+    """
+    Callable running one padded batch: backend(inputs, seeds) returns
+    (list of float32 numpy waveforms, list of valid lengths).
+    """
+
+    name = "base"
+
+    def __call__(self, inputs, seeds=None):
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """The eager model, optionally with dynamically quantized Linear layers."""
+
+    def __init__(self, model, noise_scale, noise_scale_duration, quantize=False):
+        import torch
+
+        self.name = "int8" if quantize else "fp32"
+        if quantize:
+            # Conv layers have no dynamic int8 kernels; Linear layers do
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.noise_scale = noise_scale
+        self.noise_scale_duration = noise_scale_duration
+
+    def __call__(self, inputs, seeds=None):
+        import torch
+
+        device = next(self.model.parameters()).device
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            waveform, lengths = vits_forward(
+                self.model, inputs["input_ids"], inputs["attention_mask"],
+                self.noise_scale, self.noise_scale_duration,
+                seeds=seeds or [0] * len(inputs["input_ids"])
+            )
+        return waveform.cpu().numpy(), lengths.cpu().tolist()
+
+
+def row_noise(generators, channels, lengths, reference):
+    """
+    Noise shaped like reference (batch, channels, padded length): row i
+    is drawn from generators[i] at its own length lengths[i] and zero-padded,
+    so it does not depend on how long the other rows are.
+    """
+    import torch
+
+    noise = torch.zeros((len(lengths), channels, reference.size(-1)), dtype=torch.float32)
+    for row, (generator, length) in enumerate(zip(generators, lengths)):
+        noise[row, :, :int(length)] = torch.randn((channels, int(length)), generator=generator)
+    return noise.to(device=reference.device, dtype=reference.dtype)
+
+
+def vits_forward(model, input_ids, attention_mask, noise_scale, noise_scale_duration, seeds=None):
+    """
+    Single-speaker VitsModel inference with its two noise draws made explicit.
+
+    Follows VitsModel.forward step by step, but samples the duration and
+    prior noise here instead of through torch.randn / torch.randn_like
+    inside the model. With seeds, each row gets a generator of its own and
+    its noise is drawn at its unpadded text and frame lengths, so a
+    request's audio does not change with its batch mates; without, noise
+    comes from the global generator (as in traced exports). Returns
+    (waveform, sequence lengths in samples).
+    """
+    import numpy as np
+    import torch
+
+    input_padding_mask = attention_mask.unsqueeze(1).to(torch.float32)
+    hidden_states, prior_means, prior_log_variances = model.text_encoder(
+        input_ids=input_ids,
+        padding_mask=input_padding_mask.transpose(1, 2),
+        attention_mask=attention_mask,
+        return_dict=False,
+    )[:3]
+    hidden_states = hidden_states.transpose(1, 2)
+
+    if seeds is not None:
+        generators = [torch.Generator().manual_seed(int(seed)) for seed in seeds]
+        input_lengths = attention_mask.sum(dim=1).tolist()
+
+    predictor = model.duration_predictor
+    if model.config.use_stochastic_duration_prediction:
+        # VitsStochasticDurationPredictor.forward(reverse=True)
+        conditioning = predictor.conv_pre(hidden_states)
+        conditioning = predictor.conv_dds(conditioning, input_padding_mask)
+        conditioning = predictor.conv_proj(conditioning) * input_padding_mask
+        flows = list(reversed(predictor.flows))
+        flows = flows[:-2] + [flows[-1]]  # the model skips one unused flow too
+
+        if seeds is None:
+            noise = torch.randn(hidden_states.size(0), 2, hidden_states.size(2)).to(hidden_states)
+        else:
+            noise = row_noise(generators, 2, input_lengths, hidden_states)
+        latents = noise * noise_scale_duration
+        for flow in flows:
+            latents = torch.flip(latents, [1])
+            latents, _ = flow(latents, input_padding_mask, global_conditioning=conditioning, reverse=True)
+        log_duration = latents[:, :1]
+    else:
+        log_duration = predictor(hidden_states, input_padding_mask)
+
+    duration = torch.ceil(torch.exp(log_duration) * input_padding_mask / model.speaking_rate)
+    predicted_lengths = torch.clamp_min(torch.sum(duration, [1, 2]), 1).long()
+
+    indices = torch.arange(predicted_lengths.max(), dtype=predicted_lengths.dtype,
+                           device=predicted_lengths.device)
+    output_padding_mask = (indices.unsqueeze(0) < predicted_lengths.unsqueeze(1)).unsqueeze(1)
+    output_padding_mask = output_padding_mask.to(input_padding_mask.dtype)
+
+    # Hard monotonic alignment from the rounded durations
+    attn_mask = torch.unsqueeze(input_padding_mask, 2) * torch.unsqueeze(output_padding_mask, -1)
+    batch_size, _, output_length, input_length = attn_mask.shape
+    cum_duration = torch.cumsum(duration, -1).view(batch_size * input_length, 1)
+    indices = torch.arange(output_length, dtype=duration.dtype, device=duration.device)
+    valid_indices = (indices.unsqueeze(0) < cum_duration).to(attn_mask.dtype)
+    valid_indices = valid_indices.view(batch_size, input_length, output_length)
+    padded_indices = valid_indices - torch.nn.functional.pad(valid_indices, [0, 0, 1, 0, 0, 0])[:, :-1]
+    attn = padded_indices.unsqueeze(1).transpose(2, 3) * attn_mask
+
+    prior_means = torch.matmul(attn.squeeze(1), prior_means).transpose(1, 2)
+    prior_log_variances = torch.matmul(attn.squeeze(1), prior_log_variances).transpose(1, 2)
+    if seeds is None:
+        noise = torch.randn_like(prior_means)
+    else:
+        noise = row_noise(generators, prior_means.size(1), predicted_lengths.tolist(), prior_means)
+    prior_latents = prior_means + noise * torch.exp(prior_log_variances) * noise_scale
+
+    spectrogram = model.flow(prior_latents, output_padding_mask, reverse=True) * output_padding_mask
+    if seeds is not None:
+        # The decoder's convolutions see past a row's end: with enough zero
+        # frames there for every row, padding from longer batch mates no
+        # longer reaches its samples
+        spectrogram = torch.nn.functional.pad(spectrogram, (0, DECODER_MARGIN_FRAMES))
+    waveform = model.decoder(spectrogram).squeeze(1)
+    return waveform, predicted_lengths * int(np.prod(model.config.upsample_rates))
+
+
+def waveform_module(model, noise_scale, noise_scale_duration):
+    """Wrap the model so export sees plain tensors in and out."""
+    import torch
+
+    class VitsWaveform(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return vits_forward(self.model, input_ids, attention_mask,
+                                noise_scale, noise_scale_duration)
+
+    return VitsWaveform().eval()
+
+
+def example_inputs(tokenizer):
+    return tokenizer(BENCHMARK_SENTENCES[:2], return_tensors="pt", padding=True)
+
+
+class TorchScriptBackend(InferenceBackend):
+    """
+    Traced and frozen graph. Noise inside the graph comes from torch's
+    global generator, so outputs are not reproducible per request seed.
+    """
+
+    name = "torchscript"
+
+    def __init__(self, model, tokenizer, noise_scale, noise_scale_duration, path=None):
+        import torch
+
+        path = Path(path or EXPORT_DIR / "torchscript" / f"model-{noise_scale}-{noise_scale_duration}.pt")
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            inputs = example_inputs(tokenizer)
+            module = waveform_module(model, noise_scale, noise_scale_duration)
+            with torch.no_grad():
+                traced = torch.jit.trace(
+                    module,
+                    (inputs["input_ids"], inputs["attention_mask"]),
+                    check_trace=False
+                )
+            tmp_path = path.with_suffix(".tmp")
+            torch.jit.save(torch.jit.freeze(traced), str(tmp_path))
+            os.replace(tmp_path, path)
+            print(f"💾 Exported TorchScript graph to {path}")
+
+        self.module = torch.jit.optimize_for_inference(torch.jit.load(str(path)))
+
+    def __call__(self, inputs, seeds=None):
+        import torch
+
+        with torch.no_grad():
+            waveform, lengths = self.module(inputs["input_ids"], inputs["attention_mask"])
+        return waveform.numpy(), lengths.tolist()
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX export run by onnxruntime with full graph optimizations.
+    Like TorchScript, noise is drawn inside the graph and not per request.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model, tokenizer, noise_scale, noise_scale_duration, path=None,
+                 intra_op=None):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("onnx backend needs onnxruntime: pip install onnxruntime onnx")
+        import torch
+
+        path = Path(path or EXPORT_DIR / "onnx" / f"model-{noise_scale}-{noise_scale_duration}.onnx")
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            inputs = example_inputs(tokenizer)
+            tmp_path = path.with_suffix(".tmp")
+            with torch.no_grad():
+                torch.onnx.export(
+                    waveform_module(model, noise_scale, noise_scale_duration),
+                    (inputs["input_ids"], inputs["attention_mask"]),
+                    str(tmp_path),
+                    input_names=["input_ids", "attention_mask"],
+                    output_names=["waveform", "sequence_lengths"],
+                    dynamic_axes={
+                        "input_ids": {0: "batch", 1: "tokens"},
+                        "attention_mask": {0: "batch", 1: "tokens"},
+                        "waveform": {0: "batch", 1: "samples"},
+                        "sequence_lengths": {0: "batch"},
+                    },
+                    opset_version=17
+                )
+            os.replace(tmp_path, path)
+            print(f"💾 Exported ONNX graph to {path}")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op or max(1, (os.cpu_count() or 2) // 2)
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, inputs, seeds=None):
+        waveform, lengths = self.session.run(None, {
+            "input_ids": inputs["input_ids"].numpy(),
+            "attention_mask": inputs["attention_mask"].numpy(),
+        })
+        return waveform, lengths.tolist()
+
+
+def create_backend(name, model, tokenizer, noise_scale, noise_scale_duration, threads=None):
+    """Build the named backend around an fp32 model (on CPU for all but fp32)."""
+    if name == "fp32":
+        return TorchBackend(model, noise_scale, noise_scale_duration)
+
+    model = model.to("cpu").eval()
+    if name == "int8":
+        return TorchBackend(model, noise_scale, noise_scale_duration, quantize=True)
+    if name == "torchscript":
+        return TorchScriptBackend(model, tokenizer, noise_scale, noise_scale_duration)
+    if name == "onnx":
+        return OnnxBackend(model, tokenizer, noise_scale, noise_scale_duration, intra_op=threads)
+    raise ValueError(f"Unknown backend {name!r}; choose from {', '.join(BACKENDS)}")
+
+
+def spectral_similarity(reference, candidate, frame=512, hop=256):
+    """
+    Cosine similarity of log-magnitude spectrograms over the common length.
+    1.0 means identical; robust to phase, unlike sample-wise comparison.
+    """
+    import numpy as np
+
+    def spectrogram(waveform):
+        count = max(1, 1 + (len(waveform) - frame) // hop)
+        padded = np.pad(waveform, (0, max(0, frame + (count - 1) * hop - len(waveform))))
+        frames = np.lib.stride_tricks.sliding_window_view(padded, frame)[::hop][:count]
+        return np.log1p(np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)))
+
+    length = min(len(reference), len(candidate))
+    a = spectrogram(reference[:length]).ravel()
+    b = spectrogram(candidate[:length]).ravel()
+    denominator = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / denominator) if denominator else 0.0
+
+
+def benchmark(model, tokenizer, sample_rate, backends, threads=None, repeats=3):
+    """
+    Real-time factor per backend and similarity to the fp32 outputs.
+
+    Noise scales are 0 so every backend synthesizes the same deterministic
+    speech, and differences come from the backend alone. Each sentence
+    runs on its own (batch of 1), once to warm up, then `repeats` times.
+    """
+    import numpy as np
+
+    results = {}
+    reference = None
+    for name in ["fp32"] + [b for b in backends if b != "fp32"]:
+        try:
+            start = time.perf_counter()
+            backend = create_backend(name, model, tokenizer, 0.0, 0.0, threads)
+            setup_s = time.perf_counter() - start
+        except Exception as e:
+            print(f"  {name}: unavailable ({e})")
+            results[name] = {"error": str(e)}
+            continue
+
+        outputs = []
+        synthesis_s = 0.0
+        for sentence in BENCHMARK_SENTENCES:
+            inputs = tokenizer(sentence, return_tensors="pt")
+            backend(inputs)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                waveforms, lengths = backend(inputs)
+            synthesis_s += (time.perf_counter() - start) / repeats
+            outputs.append(np.asarray(waveforms[0][:lengths[0]], dtype=np.float32))
+
+        audio_s = sum(len(w) for w in outputs) / sample_rate
+        entry = {
+            "setup_s": round(setup_s, 2),
+            "synthesis_s": round(synthesis_s, 3),
+            "audio_s": round(audio_s, 3),
+            "rtf": round(synthesis_s / audio_s, 4),
+        }
+        if reference is None:
+            reference = outputs
+        else:
+            entry["speedup"] = round(results["fp32"]["rtf"] / entry["rtf"], 2)
+            entry["similarity"] = round(float(np.mean(
+                [spectral_similarity(r, o) for r, o in zip(reference, outputs)])), 4)
+            entry["length_ratio"] = round(
+                sum(len(o) for o in outputs) / sum(len(r) for r in reference), 4)
+
+        results[name] = entry
+        print(f"  {name}: RTF {entry['rtf']:.3f}"
+              + (f", {entry['speedup']:.2f}x, similarity {entry['similarity']:.3f}, "
+                 f"length ratio {entry['length_ratio']:.3f}" if "speedup" in entry else ""))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MMS TTS inference backends on CPU")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--threads", type=int, help="intra-op threads (default: physical cores)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    from transformers import VitsModel, AutoTokenizer
+
+    threads = configure_threads(args.threads)
+    print(f"📥 Loading {MODEL_NAME} ({threads} intra-op threads)...")
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = VitsModel.from_pretrained(MODEL_NAME).eval()
+
+    print(f"⏱️ {len(BENCHMARK_SENTENCES)} sentences, {args.repeats} runs each")
+    results = benchmark(model, tokenizer, model.config.sampling_rate, args.backends,
+                        threads, args.repeats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"threads": threads, "results": results}, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
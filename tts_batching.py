@@ -0,0 +1,120 @@
+"""
+Micro-batching for the MMS TTS model.
+
+MicroBatcher collects requests that arrive within a short window and hands
+them to one batched synthesis call. Each request keeps its seed, so the
+backend can draw its VITS noise independently of whatever else ends up in
+its batch (see tts_backends.vits_forward).
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchRequest:
+    """One queued synthesis request."""
+
+    __slots__ = ('text', 'seed', 'future', 'enqueued', 'batch_size', 'queue_depth')
+
+    def __init__(self, text, seed):
+        self.text = text
+        self.seed = seed
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+        self.batch_size = 0
+        self.queue_depth = 0
+
+
+class MicroBatcher:
+    """
+    Run process_batch(requests) -> results on a single worker thread.
+
+    The worker takes the first waiting request, keeps collecting for up to
+    max_wait seconds or until max_batch_size requests are in hand, then
+    processes them together. submit() blocks the caller (e.g. a Gradio
+    worker thread) until its own result is ready.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait=0.025, history=256):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = deque()
+        self.cond = threading.Condition()
+        self.latencies = deque(maxlen=history)
+        self.batches = 0
+        self.requests = 0
+        self._thread = threading.Thread(target=self._run, name='tts-batcher', daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    def submit(self, text, seed=42):
+        """Queue text and wait. Returns (result, latency seconds, request)."""
+        request = BatchRequest(text, seed)
+        with self.cond:
+            request.queue_depth = len(self.pending)
+            self.pending.append(request)
+            self.cond.notify()
+
+        result = request.future.result()
+        latency = time.perf_counter() - request.enqueued
+        self.latencies.append(latency)
+        return result, latency, request
+
+    def stats(self):
+        """Queue depth, batch counts and latency percentiles in ms."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+            'queue_depth': self.queue_depth,
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+        }
+
+    def _take_batch(self):
+        with self.cond:
+            while not self.pending:
+                self.cond.wait()
+
+            # Give concurrent callers a short window to join this batch
+            deadline = time.perf_counter() + self.max_wait
+            while len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+
+            count = min(self.max_batch_size, len(self.pending))
+            return [self.pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            for request in batch:
+                request.batch_size = len(batch)
+
+            try:
+                results = self.process_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
@@ -0,0 +1,241 @@
+"""
+Headless bulk speech generation for vietnamese-tts-mms.py --bulk.
+
+Collects every Vietnamese definition/example from a translated item file
+(or every translation from a vocablist/*.txt|*.md list), synthesizes them
+in length-sorted batches so padding stays small, encodes and writes the
+files on a thread pool while the model works on the next batch, and records a
+summary in the same layout as audio/generation-summary.json.
+Each output directory keeps a texts.json index of the text hash and
+duration of every file written, updated after each batch: files whose
+text is unchanged are skipped, so an interrupted run can simply be
+restarted, and edited texts are synthesized again.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from vocab_store import VOCAB_DIR, VocabStore, shared_store
+
+TYPE_RE = re.compile(r'\([^)]*\)')
+SLUG_RE = re.compile(r'[^A-Za-z0-9]+')
+
+ITEM_FIELDS = [('vietnameseDefinition', 'def'), ('vietnameseExample', 'ex')]
+INDEX_NAME = 'texts.json'
+
+
+class SpeechJob:
+    """One text to synthesize into output_dir/name<suffix>."""
+
+    __slots__ = ('name', 'text')
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+
+
+def slugify(text):
+    return SLUG_RE.sub('-', text).strip('-').lower() or 'item'
+
+
+def jobs_from_items(path):
+    """Jobs for every Vietnamese definition/example in a translated item file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    jobs = {}
+    for item in items:
+        for field, suffix in ITEM_FIELDS:
+            text = (item.get(field) or '').strip()
+            if text:
+                jobs[f"{item['id']}-{suffix}"] = SpeechJob(f"{item['id']}-{suffix}", text)
+    return list(jobs.values())
+
+
+def jobs_from_vocablist(path):
+    """Jobs for the Vietnamese translation on every `N. word: (type) ... /ipa/` line."""
+    path = Path(path).resolve()
+    try:
+        # Lists under vocablist/ come from the shared, already indexed store
+        source = path.relative_to(VOCAB_DIR.resolve()).with_suffix('').as_posix()
+        entries = shared_store().in_source(source)
+    except ValueError:
+        entries = VocabStore.build([path]).in_source(path.stem)
+
+    jobs = []
+    for entry in entries:
+        # Notes such as "(làm cho)" are not read out
+        text = TYPE_RE.sub(', ', entry.translation)
+        text = ' '.join(text.replace(' ,', ',').split()).strip(' ,')
+        if text:
+            jobs.append(SpeechJob(f"{entry.line:03d}-{slugify(entry.headword)}", text))
+    return jobs
+
+
+def load_jobs(path):
+    path = Path(path)
+    if path.suffix == '.json':
+        return jobs_from_items(path)
+    return jobs_from_vocablist(path)
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def write_json(path, data, **kwargs):
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def load_index(output_dir, previous=None):
+    """
+    {file name: {'hash', 'duration_s'}} for the files in output_dir. A
+    directory without an index is seeded from its previous summary entry,
+    so files generated before the index existed are not redone.
+    """
+    path = Path(output_dir) / INDEX_NAME
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {
+        entry['file']: {'hash': text_hash(entry['text']), 'duration_s': entry['duration_s']}
+        for entry in (previous or {}).get('files', [])
+    }
+
+
+def length_sorted_batches(jobs, batch_size):
+    """Group jobs of similar length so each padded batch wastes little compute."""
+    ordered = sorted(jobs, key=lambda job: len(job.text))
+    return [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+def source_names(source_files):
+    """
+    Output name per source file: its path without suffix, relative to the
+    common directory of all sources, so grade-7/unit10.md and
+    grade-9/unit10.md stay apart. A single source keeps its bare stem.
+    """
+    paths = [Path(source_file).resolve() for source_file in source_files]
+    if not paths:
+        return []
+    root = Path(os.path.commonpath([path.parent for path in paths]))
+    return [path.relative_to(root).with_suffix('').as_posix() for path in paths]
+
+
+def run_bulk(source_file, output_dir, synthesize, write_audio, sample_rate, batch_size=16,
+             workers=4, source=None, suffix='.wav', previous=None):
+    """
+    Synthesize every job from source_file into output_dir.
+
+    synthesize(texts) returns one waveform per text at sample_rate and
+    write_audio(path, waveform) encodes one file. previous is this
+    source's entry in an earlier summary, if any. Returns the summary
+    entry for this source.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index_path = output_dir / INDEX_NAME
+    index = load_index(output_dir, previous)
+
+    def written(job):
+        name = f"{job.name}{suffix}"
+        return (output_dir / name).exists() and index.get(name, {}).get('hash') == text_hash(job.text)
+
+    jobs = load_jobs(source_file)
+    todo = [job for job in jobs if not written(job)]
+    print(f"{source_file}: {len(jobs)} texts, {len(jobs) - len(todo)} already generated")
+
+    def write(job, waveform):
+        name = f"{job.name}{suffix}"
+        write_audio(output_dir / name, waveform)
+        return name, {'hash': text_hash(job.text), 'duration_s': round(len(waveform) / sample_rate, 3)}
+
+    start = time.perf_counter()
+    done = 0
+    batches = length_sorted_batches(todo, batch_size)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        writes = []
+        for number, batch in enumerate(batches, 1):
+            waveforms = synthesize([job.text for job in batch])
+            writes += [pool.submit(write, job, waveform) for job, waveform in zip(batch, waveforms)]
+
+            # Record finished files, so a restart after this point skips them
+            pending = []
+            for future in writes:
+                if future.done():
+                    name, info = future.result()  # surfaces write errors
+                    index[name] = info
+                else:
+                    pending.append(future)
+            writes = pending
+            write_json(index_path, index)
+
+            done += len(batch)
+            elapsed = time.perf_counter() - start
+            print(f"  [{number}/{len(batches)}] {done}/{len(todo)} texts "
+                  f"({done / elapsed:.1f} texts/s)")
+
+        for future in writes:
+            name, info = future.result()
+            index[name] = info
+
+    index = {f"{job.name}{suffix}": index[f"{job.name}{suffix}"] for job in jobs}
+    write_json(index_path, index)
+
+    files = []
+    for job in jobs:
+        path = output_dir / f"{job.name}{suffix}"
+        files.append({
+            'file': path.name,
+            'text': job.text,
+            'size_kb': round(path.stat().st_size / 1024, 2),
+            'duration_s': index[path.name]['duration_s'],
+        })
+
+    return {
+        'source': source or Path(source_file).stem,
+        'file': str(source_file),
+        'output_dir': str(output_dir),
+        'count': len(files),
+        'total_size_kb': round(sum(entry['size_kb'] for entry in files), 2),
+        'total_duration_s': round(sum(entry['duration_s'] for entry in files), 3),
+        'files': files,
+    }
+
+
+def load_summary(path):
+    """An earlier generation-summary.json, or {} if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_summary(path, voice, entries):
+    """
+    Write a generation-summary.json style manifest. Entries of sources not
+    in this run are kept from the existing file, so resumed or partial runs
+    add to the summary instead of replacing it.
+    """
+    merged = {entry['source']: entry for entry in load_summary(path).get('files_processed', [])}
+    merged.update((entry['source'], entry) for entry in entries)
+    entries = list(merged.values())
+    summary = {
+        'voice': voice,
+        'rate': '+0%',
+        'volume': '+0%',
+        'files_processed': entries,
+        'total_files': sum(entry['count'] for entry in entries),
+        'total_size_kb': round(sum(entry['total_size_kb'] for entry in entries), 2),
+    }
+    write_json(path, summary, indent=2)
+    return summary
@@ -0,0 +1,175 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Audio is keyed by a hash of the normalized text and every synthesis
+setting, kept in a small in-memory LRU over an on-disk store that is
+capped in size and evicts least recently used files.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / 'vietnamese-tts-cache'
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """NFC and collapsed whitespace, so trivially different inputs share audio."""
+    return WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def cache_key(text, **settings):
+    """Hash of the normalized text plus synthesis settings (model, noise, seed...)."""
+    payload = json.dumps([normalize_text(text), sorted(settings.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier LRU cache of encoded audio bytes.
+
+    The memory tier holds up to memory_items entries; the disk tier keeps
+    `<key><suffix>` files under directory and evicts the least recently
+    used ones once their total size passes max_bytes. Safe to share
+    between threads.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024,
+                 memory_items=256, suffix='.wav'):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.suffix = suffix
+        self.memory = OrderedDict()
+        self.disk = OrderedDict()  # key -> size, least recently used first
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Rebuild the disk index, oldest first, from a previous run
+        files = sorted(self.directory.glob(f'*{suffix}'), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self.disk[path.name[:-len(suffix)]] = size
+            self.disk_bytes += size
+        self._evict()
+
+    def file_for(self, key):
+        return self.directory / f'{key}{self.suffix}'
+
+    def get(self, key):
+        """Cached bytes for key, or None."""
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+            if key not in self.disk:
+                self.misses += 1
+                return None
+            path = self.file_for(key)
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                self.disk_bytes -= self.disk.pop(key)
+                self.misses += 1
+                return None
+
+            self._touch(key, path)
+            self._remember(key, data)
+            self.hits += 1
+            return data
+
+    def path(self, key):
+        """
+        Path of the cached file for key, or None. Files evicted from disk
+        but still in memory are written back.
+        """
+        with self.lock:
+            path = self.file_for(key)
+            if key in self.disk:
+                if path.exists():
+                    self._touch(key, path)
+                    if key in self.memory:
+                        self.memory.move_to_end(key)
+                    self.hits += 1
+                    return path
+                self.disk_bytes -= self.disk.pop(key)
+
+            data = self.memory.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self._write(key, data)
+
+    def put(self, key, data, persist=True):
+        """
+        Store encoded audio under key; returns its file path. With
+        persist=False it is kept in the memory tier only (returns None);
+        path() writes it out if a file is ever asked for.
+        """
+        with self.lock:
+            self._remember(key, data)
+            return self._write(key, data) if persist else None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_items': len(self.memory),
+            'disk_items': len(self.disk),
+            'disk_mb': self.disk_bytes / (1024 * 1024),
+        }
+
+    def _remember(self, key, data):
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _touch(self, key, path):
+        self.disk.move_to_end(key)
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except FileNotFoundError:
+            pass
+
+    def _write(self, key, data):
+        path = self.file_for(key)
+        tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        self.disk_bytes -= self.disk.pop(key, 0)
+        self.disk[key] = len(data)
+        self.disk_bytes += len(data)
+        self._evict(keep=key)
+        return path
+
+    def _evict(self, keep=None):
+        while self.disk_bytes > self.max_bytes and self.disk:
+            key = next(iter(self.disk))
+            if key == keep:
+                break
+            self.disk_bytes -= self.disk.pop(key)
+            try:
+                self.file_for(key).unlink()
+            except FileNotFoundError:
+                pass
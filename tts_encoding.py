@@ -0,0 +1,249 @@
+"""
+Compressed audio output for the TTS server.
+
+Waveforms are clipped and scaled to int16 PCM, then encoded to Opus (in
+an Ogg container) or MP3 by an ffmpeg process fed through pipes, so the
+encoded bytes stay in memory until the caller decides to keep them.
+AudioEncoder runs the encodes on a small thread pool; ffmpeg works
+outside the GIL, so synthesis carries on while earlier audio is encoded.
+
+ffmpeg is looked up on PATH or taken from FFMPEG_BINARY. Without it only
+'wav' (int16 PCM) output is available.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class AudioFormat:
+    """Container/codec settings for one output format."""
+
+    __slots__ = ('name', 'suffix', 'mime_type', 'codec_args', 'bitrate')
+
+    def __init__(self, name, suffix, mime_type, codec_args=None, bitrate=None):
+        self.name = name
+        self.suffix = suffix
+        self.mime_type = mime_type
+        self.codec_args = codec_args
+        self.bitrate = bitrate
+
+
+# Bitrates suit 16 kHz mono speech; Opus in VoIP mode stays clear at 24k
+FORMATS = {
+    'wav': AudioFormat('wav', '.wav', 'audio/wav'),
+    'opus': AudioFormat('opus', '.ogg', 'audio/ogg',
+                        ['-c:a', 'libopus', '-application', 'voip', '-f', 'ogg'], '24k'),
+    'mp3': AudioFormat('mp3', '.mp3', 'audio/mpeg',
+                       ['-c:a', 'libmp3lame', '-f', 'mp3'], '48k'),
+}
+
+# Bytes per read while streaming ffmpeg's output
+STREAM_READ_SIZE = 4096
+
+
+def find_ffmpeg():
+    """Path of the ffmpeg binary, or None."""
+    return os.environ.get('FFMPEG_BINARY') or shutil.which('ffmpeg')
+
+
+def to_int16(waveform):
+    """
+    int16 PCM from a float waveform in [-1, 1]. The float buffer is
+    clipped and scaled in place, so the only new allocation is the
+    half-size int16 copy; callers must not reuse the waveform.
+    """
+    if waveform.dtype == np.int16:
+        return waveform
+    if not waveform.flags.writeable:
+        waveform = waveform.copy()
+    np.clip(waveform, -1.0, 1.0, out=waveform)
+    waveform *= 32767
+    return waveform.astype(np.int16)
+
+
+def wav_header(sample_rate, data_size=0xFFFFFFFF - 36):
+    """44-byte header of a mono int16 WAV; the default size suits streaming."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.setnframes(data_size // 2)
+    return buffer.getvalue()
+
+
+def wav_bytes(pcm, sample_rate):
+    """A complete mono int16 WAV file in memory."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def ffmpeg_command(ffmpeg, audio_format, sample_rate, bitrate=None):
+    """Raw s16le on stdin -> encoded audio on stdout."""
+    return [
+        ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+        *audio_format.codec_args, '-b:a', bitrate or audio_format.bitrate,
+        'pipe:1',
+    ]
+
+
+def ffmpeg_error(process_name, returncode, stderr):
+    message = stderr.decode('utf-8', 'replace').strip().splitlines()
+    return RuntimeError(f"{process_name} exited with {returncode}: "
+                        f"{message[-1] if message else 'no error output'}")
+
+
+def encode(waveform, sample_rate, fmt='mp3', bitrate=None, ffmpeg=None):
+    """Encode one waveform; returns the file contents as bytes."""
+    audio_format = FORMATS[fmt]
+    pcm = to_int16(waveform)
+    if audio_format.codec_args is None:
+        return wav_bytes(pcm, sample_rate)
+
+    ffmpeg = ffmpeg or find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError(f"{fmt} output needs ffmpeg on PATH (or FFMPEG_BINARY)")
+
+    result = subprocess.run(
+        ffmpeg_command(ffmpeg, audio_format, sample_rate, bitrate),
+        input=pcm.tobytes(), capture_output=True
+    )
+    if result.returncode != 0:
+        raise ffmpeg_error('ffmpeg', result.returncode, result.stderr)
+    return result.stdout
+
+
+def iter_encode(waveforms, sample_rate, fmt='mp3', bitrate=None, ffmpeg=None,
+                read_size=STREAM_READ_SIZE):
+    """
+    Encode a stream of waveform pieces into one file, yielding encoded bytes
+    as ffmpeg produces them. A feeder thread writes PCM while this
+    generator reads, so neither side blocks on a full pipe.
+    """
+    audio_format = FORMATS[fmt]
+    if audio_format.codec_args is None:
+        yield wav_header(sample_rate)
+        for waveform in waveforms:
+            yield to_int16(waveform).tobytes()
+        return
+
+    ffmpeg = ffmpeg or find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError(f"{fmt} output needs ffmpeg on PATH (or FFMPEG_BINARY)")
+
+    process = subprocess.Popen(
+        ffmpeg_command(ffmpeg, audio_format, sample_rate, bitrate),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    feed_error = []
+
+    def feed():
+        try:
+            for waveform in waveforms:
+                process.stdin.write(to_int16(waveform).tobytes())
+        except Exception as e:  # surfaced by the reader below
+            feed_error.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, name='ffmpeg-feed', daemon=True)
+    feeder.start()
+    try:
+        while True:
+            data = process.stdout.read1(read_size)
+            if not data:
+                break
+            yield data
+    finally:
+        if process.poll() is None and feeder.is_alive():
+            process.kill()  # the consumer stopped early
+        feeder.join()
+        stderr = process.stderr.read()
+        process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    if feed_error and not isinstance(feed_error[0], BrokenPipeError):
+        raise feed_error[0]
+    if process.returncode != 0:
+        raise ffmpeg_error('ffmpeg', process.returncode, stderr)
+
+
+class AudioEncoder:
+    """
+    Encodes waveforms to one format on a background thread pool.
+
+    submit() returns a Future of the encoded bytes; stream() encodes a
+    sequence of pieces incrementally. Thread-safe.
+    """
+
+    def __init__(self, fmt='mp3', bitrate=None, workers=2, ffmpeg=None):
+        self.format = FORMATS[fmt]
+        self.bitrate = bitrate or self.format.bitrate
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        if self.format.codec_args is not None and self.ffmpeg is None:
+            raise RuntimeError(f"{fmt} output needs ffmpeg on PATH (or FFMPEG_BINARY)")
+
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='encode')
+        self.lock = threading.Lock()
+        self.encoded = 0
+        self.pcm_bytes = 0
+        self.encoded_bytes = 0
+
+    @property
+    def name(self):
+        return self.format.name
+
+    @property
+    def suffix(self):
+        return self.format.suffix
+
+    @property
+    def mime_type(self):
+        return self.format.mime_type
+
+    def encode(self, waveform, sample_rate):
+        """Encode on the calling thread."""
+        samples = len(waveform)
+        data = encode(waveform, sample_rate, self.name, self.bitrate, self.ffmpeg)
+        with self.lock:
+            self.encoded += 1
+            self.pcm_bytes += samples * 4  # what a float32 WAV would have taken
+            self.encoded_bytes += len(data)
+        return data
+
+    def submit(self, waveform, sample_rate):
+        """Encode on the pool; returns a Future of the encoded bytes."""
+        return self.pool.submit(self.encode, waveform, sample_rate)
+
+    def stream(self, waveforms, sample_rate):
+        """Encoded bytes for a sequence of waveform pieces, as produced."""
+        return iter_encode(waveforms, sample_rate, self.name, self.bitrate, self.ffmpeg)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'format': self.name,
+                'bitrate': self.bitrate if self.format.codec_args else None,
+                'encoded': self.encoded,
+                'compression': self.pcm_bytes / self.encoded_bytes if self.encoded_bytes else 0.0,
+            }
+
+    def close(self):
+        self.pool.shutdown(wait=True)
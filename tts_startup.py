@@ -0,0 +1,133 @@
+"""
+Fast startup for the TTS server.
+
+BackgroundLoader loads (and warms up) the model on a thread while the
+process keeps going; HealthServer answers /health right away, 503 until
+the model is ready, so orchestrators see the replica as soon as it binds.
+It also exposes the metrics module's counters and timings for scraping.
+"""
+
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+
+# Reference point for time-to-ready; set when this module is first imported
+PROCESS_START = time.perf_counter()
+
+
+class BackgroundLoader:
+    """
+    Run load() then warm_up() on a daemon thread and record timings.
+
+    state is 'loading', 'warming', 'ready' or 'failed'; wait() blocks until
+    the model is usable (or the timeout passes) and re-raises a load error.
+    """
+
+    def __init__(self, load, warm_up=None):
+        self.load = load
+        self.warm_up = warm_up
+        self.state = 'idle'
+        self.error = None
+        self.timings = {}
+        self.ready = threading.Event()
+        self._done = threading.Event()
+
+    def start(self):
+        self.state = 'loading'
+        threading.Thread(target=self._run, name='model-loader', daemon=True).start()
+        return self
+
+    def run(self):
+        """Load on the calling thread instead; errors are kept for wait() as with start()."""
+        self.state = 'loading'
+        self._run()
+        return self
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            self.load()
+            self.timings['load_s'] = time.perf_counter() - start
+
+            if self.warm_up is not None:
+                self.state = 'warming'
+                start = time.perf_counter()
+                self.warm_up()
+                self.timings['warm_up_s'] = time.perf_counter() - start
+
+            self.timings['time_to_ready_s'] = time.perf_counter() - PROCESS_START
+            self.state = 'ready'
+            self.ready.set()
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+            traceback.print_exc()
+        finally:
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """True once ready; raises the load error if loading failed."""
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise RuntimeError(f"Model failed to load: {self.error}") from self.error
+        return self.ready.is_set()
+
+    def status(self):
+        return {'state': self.state, **{k: round(v, 3) for k, v in self.timings.items()}}
+
+
+class HealthServer:
+    """
+    Minimal HTTP health endpoint on its own thread.
+
+    GET /health and /ready return the loader status as JSON, with 200 once
+    the model is ready and 503 before that (or after a failed load).
+    GET /metrics serves Prometheus text format and /metrics.json the same
+    numbers as a JSON report.
+    """
+
+    def __init__(self, loader, host='0.0.0.0', port=7861):
+        loader_ref = loader
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path in ('/health', '/ready'):
+                    status = 200 if loader_ref.ready.is_set() else 503
+                    self.respond(status, 'application/json', json.dumps(loader_ref.status()))
+                elif path == '/metrics':
+                    self.respond(200, 'text/plain; version=0.0.4', metrics.prometheus_text())
+                elif path == '/metrics.json':
+                    self.respond(200, 'application/json', json.dumps(metrics.report()))
+                else:
+                    self.send_error(404)
+
+            def respond(self, status, content_type, text):
+                body = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep probe traffic out of the console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='health', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
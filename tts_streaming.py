@@ -0,0 +1,155 @@
+"""
+Sentence-chunked streaming synthesis for long passages.
+
+split_text breaks a passage on sentence, then clause, then word boundaries
+into chunks short enough for a quick forward pass; stream_speech
+synthesizes them in order (the next chunk is already running while the
+current one plays) and yields audio with crossfaded joins as soon as each
+chunk is ready.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SENTENCE_RE = re.compile(r'(?<=[.!?…;])\s+|\n+')
+CLAUSE_RE = re.compile(r'(?<=[,:–—])\s+')
+
+
+def _pack(parts, max_chars, separator=' '):
+    """Greedily join consecutive parts while they fit in max_chars."""
+    chunks = []
+    current = ''
+    for part in parts:
+        if current and len(current) + len(separator) + len(part) > max_chars:
+            chunks.append(current)
+            current = part
+        else:
+            current = f'{current}{separator}{part}' if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split(sentence, max_chars):
+    """Pieces of one sentence of at most max_chars, cut at clauses, then words."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces = []
+    for clause in _pack(CLAUSE_RE.split(sentence), max_chars):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+        else:
+            pieces.extend(_pack(clause.split(), max_chars))
+    return pieces
+
+
+def split_text(text, max_chars=160, min_chars=20):
+    """
+    Chunks of at most max_chars (unless a single word is longer), cut at
+    sentence ends first, then at clause punctuation, then between words.
+    Sentences shorter than min_chars are merged into their neighbour, so
+    "Vâng." does not become a chunk on its own; the first chunk is kept to
+    half of max_chars so playback can start sooner.
+    """
+    chunks = []
+    for sentence in SENTENCE_RE.split(text.strip()):
+        sentence = ' '.join(sentence.split())
+        if sentence:
+            chunks.extend(_split(sentence, max_chars))
+
+    # A short first sentence leads the next one instead of playing alone,
+    # and a long first chunk is cut again; the rest of it packs at max_chars
+    if len(chunks) > 1 and len(chunks[0]) < min_chars:
+        chunks[:2] = [f'{chunks[0]} {chunks[1]}']
+    if chunks and len(chunks[0]) > max_chars // 2:
+        first, *rest = _split(chunks[0], max_chars // 2)
+        chunks[:1] = [first] + (_split(' '.join(rest), max_chars) if rest else [])
+
+    merged = []
+    for chunk in chunks:
+        limit = max_chars if len(merged) > 1 else max_chars // 2
+        if merged and (len(merged[-1]) < min_chars or len(chunk) < min_chars) \
+                and len(merged[-1]) + 1 + len(chunk) <= limit:
+            merged[-1] = f'{merged[-1]} {chunk}'
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def crossfade(waveforms, fade_samples):
+    """
+    Yield the waveforms as one continuous signal, blending fade_samples at
+    each join with equal-power curves. The tail of every chunk is held back
+    until the next one arrives, so nothing already yielded changes.
+    """
+    if fade_samples > 0:
+        ramp = np.linspace(0.0, np.pi / 2, fade_samples, dtype=np.float32)
+        fade_in, fade_out = np.sin(ramp), np.cos(ramp)
+
+    tail = None
+    for waveform in waveforms:
+        waveform = np.asarray(waveform, dtype=np.float32)
+        if tail is not None:
+            overlap = min(len(tail), len(waveform))
+            if overlap:
+                head = waveform[:overlap] * fade_in[-overlap:] + tail[-overlap:] * fade_out[:overlap]
+                waveform = np.concatenate([tail[:-overlap], head, waveform[overlap:]])
+            else:
+                waveform = np.concatenate([tail, waveform])
+
+        if fade_samples > 0 and len(waveform) > fade_samples:
+            tail = waveform[-fade_samples:]
+            yield waveform[:-fade_samples]
+        elif fade_samples > 0:
+            tail = waveform
+        else:
+            yield waveform
+
+    if tail is not None and len(tail):
+        yield tail
+
+
+class StreamStats:
+    """Timings of one streamed passage."""
+
+    __slots__ = ('chunks', 'first_chunk_s', 'total_s', 'audio_s')
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.first_chunk_s = None
+        self.total_s = 0.0
+        self.audio_s = 0.0
+
+
+def stream_speech(text, synthesize, sample_rate, max_chars=160, fade_ms=30, lookahead=1):
+    """
+    Yield (waveform piece, StreamStats) for text, chunk by chunk.
+
+    synthesize(chunk) returns one waveform. The first chunk runs alone so
+    nothing delays it; after that up to lookahead chunks are synthesized
+    while the previous one plays, and only their audio is held in memory.
+    """
+    chunks = split_text(text, max_chars)
+    stats = StreamStats(len(chunks))
+    start = time.perf_counter()
+
+    def waveforms():
+        with ThreadPoolExecutor(max_workers=max(1, lookahead)) as pool:
+            pending = [pool.submit(synthesize, chunk) for chunk in chunks[:1]]
+            queued = len(pending)
+            while pending:
+                waveform = pending.pop(0).result()
+                while queued < len(chunks) and len(pending) < lookahead:
+                    pending.append(pool.submit(synthesize, chunks[queued]))
+                    queued += 1
+                yield waveform
+
+    for piece in crossfade(waveforms(), int(sample_rate * fade_ms / 1000)):
+        if stats.first_chunk_s is None:
+            stats.first_chunk_s = time.perf_counter() - start
+        stats.audio_s += len(piece) / sample_rate
+        stats.total_s = time.perf_counter() - start
+        yield piece, stats
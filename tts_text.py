@@ -0,0 +1,297 @@
+"""
+Vietnamese text normalization and token caching for the TTS model.
+
+normalize_text turns raw input into what the MMS tokenizer can read:
+Unicode NFC, numbers, dates, percentages and common abbreviations spelled
+out in Vietnamese, and punctuation reduced to the marks that shape
+pauses. Output is lowercase, like the tokenizer's own normalization, so
+inputs that differ only in case, spacing or punctuation style share one
+result. TokenCache keeps the input ids of recently seen normalized texts
+and pads cached rows into a batch, so repeated drill phrases skip the
+tokenizer entirely.
+
+    python tts_text.py "Khoảng 70% trong số 1.500 học sinh, v.v."
+    python tts_text.py "IELTS 6.5 - 7.0, điểm tăng 2.5%"
+"""
+
+import argparse
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+
+import metrics
+
+DIGITS = ['không', 'một', 'hai', 'ba', 'bốn', 'năm', 'sáu', 'bảy', 'tám', 'chín']
+
+# Expanded before anything else; matched case-sensitively on word boundaries
+ABBREVIATIONS = {
+    'TP.HCM': 'thành phố Hồ Chí Minh',
+    'TPHCM': 'thành phố Hồ Chí Minh',
+    'TP.': 'thành phố',
+    'v.v.': 'vân vân',
+    'v.v': 'vân vân',
+    'VD:': 'ví dụ:',
+    'Vd:': 'ví dụ:',
+    'vd:': 'ví dụ:',
+    'VN': 'Việt Nam',
+    'THPT': 'trung học phổ thông',
+    'THCS': 'trung học cơ sở',
+    'ĐH': 'đại học',
+    'GS.': 'giáo sư',
+    'TS.': 'tiến sĩ',
+    'ThS.': 'thạc sĩ',
+    'NASA': 'na xa',
+    'SETI': 'xê ti',
+    'IELTS': 'ai eo',
+    '24/7': 'hai mươi bốn trên bảy',
+    '3D': 'ba đê',
+}
+
+# Letter names for spelling out other acronyms (AI, CEO, GPS...)
+LETTER_NAMES = {
+    'A': 'ây', 'B': 'bi', 'C': 'xi', 'D': 'đi', 'E': 'i', 'F': 'ép', 'G': 'gi',
+    'H': 'hát', 'I': 'ai', 'J': 'giây', 'K': 'cây', 'L': 'eo', 'M': 'em',
+    'N': 'en', 'O': 'âu', 'P': 'pi', 'Q': 'kiu', 'R': 'a', 'S': 'ét', 'T': 'ti',
+    'U': 'diu', 'V': 'vi', 'W': 'đắp liu', 'X': 'ích', 'Y': 'oai', 'Z': 'dét',
+}
+
+UNITS = {
+    '%': 'phần trăm', 'km': 'ki lô mét', 'kg': 'ki lô gam', 'cm': 'xen ti mét',
+    'mm': 'mi li mét', 'm': 'mét', 'g': 'gam', 'h': 'giờ', 'đ': 'đồng',
+    'USD': 'đô la Mỹ', 'VND': 'đồng',
+}
+
+ABBREVIATION_RE = re.compile(
+    r'(?<![\w.])(' + '|'.join(re.escape(key) for key in
+                              sorted(ABBREVIATIONS, key=len, reverse=True)) + r')(?!\w)'
+)
+ACRONYM_RE = re.compile(r'\b[A-Z]{2,5}\b')
+# Spelled out even in all-caps text, where other capitals may be plain syllables
+ACRONYMS = {'AI', 'ATM', 'CEO', 'CV', 'DNA', 'EU', 'GDP', 'GPS', 'IT', 'PC', 'SMS', 'TV', 'UK',
+            'UN', 'USA', 'WHO'}
+# Onset, vowel nucleus and coda of a Vietnamese syllable written without diacritics
+SYLLABLE_RE = re.compile(
+    r'(?:ngh|ng|gh|gi|kh|nh|ph|qu|th|tr|ch|[bcdghklmnprstvx])?[aeiouy]{1,3}(?:ng|nh|ch|[cmnpt])?',
+    re.IGNORECASE
+)
+DATE_RE = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+TIME_RE = re.compile(r'\b(\d{1,2}):(\d{2})\b')
+RANGE_RE = re.compile(r'\b(\d+)\s*[-–]\s*(\d+)\b')
+CURRENCY_RE = re.compile(r'\$\s*(\d[\d.,]*)')
+# 1.500.000 and 1,500 group thousands; 3,5 is a decimal comma, and so is
+# the point of 6.5, 7.0 or 1234.5 (anything but a group of exactly 3 digits)
+NUMBER_RE = re.compile(
+    r'(?<![\w,.])(\d{1,3}(?:\.\d{3})+(?!\d)|\d{1,3}(?:,\d{3})+(?![\d])|\d+)'
+    r'(?:,(\d+)|\.(\d+)(?!\.\d))?'
+    r'(?:\s*(' + '|'.join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True)) +
+    r')(?!\w))?'
+)
+
+QUOTES_RE = re.compile(r'["“”„«»‘’‚`´]')
+BRACKETS_RE = re.compile(r'\s*[()\[\]{}]\s*')
+DASH_RE = re.compile(r'\s+[-–—]+\s+|[–—]')
+ELLIPSIS_RE = re.compile(r'…|\.{2,}')
+PAUSE_RE = re.compile(r'[;:]')
+SYMBOLS = {'&': ' và ', '+': ' cộng ', '=': ' bằng ', '/': ' ', '@': ' a còng '}
+SYMBOLS_RE = re.compile('[' + re.escape(''.join(SYMBOLS)) + ']')
+OTHER_RE = re.compile(r'[^\w\s,.!?\'-]')
+REPEATED_RE = re.compile(r'[,.!?](?:\s*[,.!?])+')
+SPACE_BEFORE_RE = re.compile(r'\s+([,.!?])')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def read_group(number, full):
+    """Words for 0 < number < 1000; full reads leading zeros ("không trăm lẻ")."""
+    hundreds, tens, ones = number // 100, number // 10 % 10, number % 10
+    words = []
+    if full or hundreds:
+        words += [DIGITS[hundreds], 'trăm']
+    if tens == 0:
+        if ones:
+            words += ['lẻ', DIGITS[ones]] if words else [DIGITS[ones]]
+    elif tens == 1:
+        words.append('mười')
+        if ones:
+            words.append('lăm' if ones == 5 else DIGITS[ones])
+    else:
+        words += [DIGITS[tens], 'mươi']
+        if ones:
+            words.append({1: 'mốt', 4: 'tư', 5: 'lăm'}.get(ones, DIGITS[ones]))
+    return ' '.join(words)
+
+
+def read_number(number, full=False):
+    """Vietnamese words for a non-negative integer: 1005 -> một nghìn không trăm lẻ năm."""
+    if number == 0:
+        return DIGITS[0]
+
+    if number >= 10 ** 9:
+        high, low = divmod(number, 10 ** 9)
+        words = [read_number(high, full), 'tỷ']
+        if low:
+            words.append(read_number(low, full=True))
+        return ' '.join(words)
+
+    words = []
+    for group, unit in ((number // 10 ** 6, 'triệu'), (number // 1000 % 1000, 'nghìn'),
+                        (number % 1000, '')):
+        if group:
+            words.append(read_group(group, full or bool(words)))
+            if unit:
+                words.append(unit)
+    return ' '.join(words)
+
+
+def read_digits(digits):
+    return ' '.join(DIGITS[int(digit)] for digit in digits)
+
+
+def read_numeral(integer, decimal=None):
+    """Words for a written number: grouping separators, decimal comma, phone-like digit runs."""
+    digits = integer.replace('.', '').replace(',', '')
+    if len(digits) > 1 and digits.startswith('0') or len(digits) > 15:
+        words = read_digits(digits)
+    else:
+        words = read_number(int(digits))
+    if decimal:
+        fraction = read_digits(decimal) if decimal.startswith('0') else read_number(int(decimal))
+        words += f' phẩy {fraction}'
+    return words
+
+
+def _number(match):
+    words = read_numeral(match.group(1), match.group(2) or match.group(3))
+    unit = match.group(4)
+    return f'{words} {UNITS[unit]}' if unit else words
+
+
+def _acronym(match, all_caps=False):
+    token = match.group()
+    # "XIN CHÀO": in shouted text, a capitalized syllable is just a word
+    if all_caps and token not in ACRONYMS and SYLLABLE_RE.fullmatch(token):
+        return token
+    return ' '.join(LETTER_NAMES[letter] for letter in token)
+
+
+def _date(match):
+    day, month, year = (int(part) for part in match.groups())
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return match.group()
+    return f'{read_number(day)} tháng {read_number(month)} năm {read_number(year)}'
+
+
+@lru_cache(maxsize=8192)
+def normalize_text(text):
+    """
+    Speakable Vietnamese for text: NFC, abbreviations, acronyms and numbers
+    spelled out, punctuation reduced to , . ! ? and lowercase. Idempotent.
+    In all-caps text only known acronyms and capitals that cannot be a
+    Vietnamese syllable are spelled out.
+    """
+    text = unicodedata.normalize('NFC', text)
+    all_caps = text == text.upper() and len(text.split()) > 1
+    text = ABBREVIATION_RE.sub(lambda match: ABBREVIATIONS[match.group()], text)
+    text = ACRONYM_RE.sub(lambda match: _acronym(match, all_caps), text)
+
+    text = DATE_RE.sub(_date, text)
+    text = TIME_RE.sub(lambda match: f'{read_number(int(match.group(1)))} giờ '
+                                     f'{read_number(int(match.group(2)))} phút', text)
+    text = RANGE_RE.sub(r'\1 đến \2', text)
+    text = CURRENCY_RE.sub(lambda match: f'{match.group(1)} đô la', text)
+    text = NUMBER_RE.sub(_number, text)
+
+    text = QUOTES_RE.sub('', text)
+    text = BRACKETS_RE.sub(', ', text)
+    text = DASH_RE.sub(', ', text)
+    text = ELLIPSIS_RE.sub('.', text)
+    text = PAUSE_RE.sub(',', text)
+    text = SYMBOLS_RE.sub(lambda match: SYMBOLS[match.group()], text)
+    text = OTHER_RE.sub(' ', text)
+
+    text = WHITESPACE_RE.sub(' ', text)
+    text = SPACE_BEFORE_RE.sub(r'\1', text)
+    text = REPEATED_RE.sub(lambda match: match.group()[-1], text)  # the last mark wins
+    return text.strip(' ,').lower()
+
+
+class TokenCache:
+    """
+    Bounded LRU of tokenizer input ids, keyed by normalized text.
+
+    batch(texts) returns the same padded input_ids/attention_mask a
+    tokenizer(texts, padding=True) call would, built from cached rows;
+    only texts not seen recently go through the tokenizer. Safe to share
+    between threads.
+    """
+
+    def __init__(self, tokenizer, max_items=4096):
+        self.tokenizer = tokenizer
+        self.max_items = max_items
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def ids(self, text):
+        """1-D input ids tensor for an already normalized text."""
+        with self.lock:
+            ids = self.entries.get(text)
+            if ids is not None:
+                self.entries.move_to_end(text)
+                self.hits += 1
+        if ids is not None:
+            metrics.count('tts_token_cache_requests_total', result='hit')
+            return ids
+
+        ids = self.tokenizer(text, return_tensors='pt')['input_ids'][0]
+        metrics.count('tts_token_cache_requests_total', result='miss')
+        with self.lock:
+            self.misses += 1
+            self.entries[text] = ids
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+        return ids
+
+    def batch(self, texts):
+        """Right-padded {'input_ids', 'attention_mask'} for normalized texts."""
+        import torch
+
+        rows = [self.ids(text) for text in texts]
+        width = max(len(row) for row in rows)
+        input_ids = torch.full((len(rows), width), self.tokenizer.pad_token_id or 0,
+                               dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
+
+    def stats(self):
+        total = self.hits + self.misses
+        normalized = normalize_text.cache_info()
+        normalized_total = normalized.hits + normalized.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'items': len(self.entries),
+            'normalize_hit_rate': normalized.hits / normalized_total if normalized_total else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('texts', nargs='+', help='texts to normalize')
+    args = parser.parse_args()
+
+    for text in args.texts:
+        print(f"{text}\n  -> {normalize_text(text)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Pre-forked TTS worker processes sharing one copy of the model weights.
+
+The parent loads the model, then forks the workers: tensor storage is
+never written during inference, so its pages stay shared copy-on-write
+and N workers cost little more RAM than one. Each worker pins its torch
+thread count (and, where supported, its CPU cores) and pulls requests
+from one shared queue, so idle workers pick up the next request and load
+balances itself. WorkerPool.submit() matches MicroBatcher.submit(), so
+the two are interchangeable in vietnamese-tts-mms.py.
+
+A worker that dies (crash, OOM kill) fails the requests it had taken;
+the others keep serving. It is not replaced: forking again from the
+now multithreaded parent could deadlock the child on a lock some other
+thread held at the time.
+"""
+
+import atexit
+import gc
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait as wait_for_sentinels
+
+from tts_batching import BatchRequest
+
+# How long submit() waits for a worker before giving up on the request
+SUBMIT_TIMEOUT = 120
+
+
+def _pin_worker(index, threads):
+    """Limit the worker to `threads` torch threads on its own slice of cores."""
+    import torch
+
+    torch.set_num_threads(threads)
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        mine = cores[index * threads:(index + 1) * threads]
+        if len(mine) == threads:
+            os.sched_setaffinity(0, mine)
+
+
+def _worker_main(index, synthesize, tasks, results, threads, max_batch_size, warm_up_text,
+                 taken, batches):
+    _pin_worker(index, threads)
+    if warm_up_text:
+        synthesize([warm_up_text], [0])
+    results.put(("ready", index, os.getpid()))
+
+    running = True
+    while running:
+        task = tasks.get()
+        if task is None:
+            break
+
+        # Requests already waiting ride along in the same forward pass
+        batch = [task]
+        while len(batch) < max_batch_size:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                running = False
+                break
+            batch.append(task)
+
+        # Shared memory, written before synthesis starts: if this process
+        # dies, the parent fails exactly these requests
+        taken[0] = len(batch)
+        taken[1:len(batch) + 1] = [request_id for request_id, _, _ in batch]
+        with batches.get_lock():
+            batches.value += 1
+        try:
+            waveforms = synthesize([text for _, text, _ in batch], [seed for _, _, seed in batch])
+        except Exception as e:
+            for request_id, _, _ in batch:
+                results.put(("error", request_id, f"{type(e).__name__}: {e}"))
+            continue
+
+        for (request_id, _, _), waveform in zip(batch, waveforms):
+            results.put(("done", request_id, waveform, len(batch), index))
+
+
+class WorkerPool:
+    """
+    Fork `workers` processes running synthesize(texts, seeds) -> waveforms.
+
+    Must be created after the model is loaded, before the parent runs any
+    inference and before it starts any other thread, so the forked
+    children inherit the weights but no busy torch thread pool and no
+    lock held by a thread that does not exist in the child.
+    """
+
+    def __init__(self, synthesize, workers=2, threads_per_worker=None, max_batch_size=8,
+                 warm_up_text=None, history=256, timeout=SUBMIT_TIMEOUT):
+        context = multiprocessing.get_context("fork")
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        self.threads_per_worker = threads_per_worker or max(1, (cores or 1) // workers)
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.pending = {}
+        # Per worker: count, then the ids of the requests it is synthesizing
+        self.taken = [context.Array("q", max_batch_size + 1, lock=False) for _ in range(workers)]
+        self.batch_count = context.Value("q", 0)
+        self.timeout = timeout
+        self.closing = False
+        self.error = None               # set once no worker is left
+        self.lock = threading.Lock()
+        self.ids = itertools.count()
+        self.latencies = deque(maxlen=history)
+        self.per_worker = [0] * workers
+        self.requests = 0
+
+        # Objects surviving to here are never collected in the children, so
+        # the GC never writes to (and un-shares) their pages
+        gc.collect()
+        gc.freeze()
+        self.processes = []
+        for index in range(workers):
+            process = context.Process(
+                target=_worker_main,
+                args=(index, synthesize, self.tasks, self.results, self.threads_per_worker,
+                      max_batch_size, warm_up_text, self.taken[index], self.batch_count),
+                name=f"tts-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        for _ in range(workers):
+            try:
+                message = self.results.get(timeout=self.timeout)
+            except queue.Empty:
+                message = ("timeout",)
+            if message[0] != "ready":
+                self.close()
+                raise RuntimeError(f"TTS worker failed to start: {message}")
+
+        self.alive = dict(enumerate(self.processes))
+        self._collector = threading.Thread(target=self._collect, name="tts-results", daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch, name="tts-worker-monitor", daemon=True)
+        self._monitor.start()
+        atexit.register(self.close)
+
+    @property
+    def batches(self):
+        return self.batch_count.value
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    def submit(self, text, seed=42):
+        """Queue text for the next idle worker and wait. Returns (result, latency, request)."""
+        request = BatchRequest(text, seed)
+        request_id = next(self.ids)
+        with self.lock:
+            if self.error is not None:
+                raise RuntimeError(self.error)
+            request.queue_depth = len(self.pending)
+            self.pending[request_id] = request
+        self.tasks.put((request_id, text, seed))
+
+        try:
+            result = request.future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self.lock:
+                self.pending.pop(request_id, None)
+            raise RuntimeError(f"no TTS worker answered within {self.timeout}s") from None
+        latency = time.perf_counter() - request.enqueued
+        self.latencies.append(latency)
+        return result, latency, request
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            if message is None:
+                return
+
+            with self.lock:
+                request = self.pending.pop(message[1], None)
+            if request is None:
+                continue
+            if message[0] == "error":
+                request.future.set_exception(RuntimeError(message[2]))
+                continue
+
+            _, _, waveform, batch_size, worker = message
+            request.batch_size = batch_size
+            self.requests += 1
+            self.per_worker[worker] += 1
+            request.future.set_result(waveform)
+
+    def _watch(self):
+        """Fail the requests of workers that exit while the pool is open."""
+        while not self.closing:
+            with self.lock:
+                sentinels = {process.sentinel: index for index, process in self.alive.items()}
+            if not sentinels:
+                return
+            for sentinel in wait_for_sentinels(list(sentinels), timeout=1.0):
+                if self.closing:
+                    return
+                # Let the collector read what the worker sent before it died
+                time.sleep(0.2)
+                index = sentinels[sentinel]
+                self._worker_died(index, self.alive[index].exitcode)
+
+    def _worker_died(self, index, exitcode):
+        message = f"TTS worker {index} died (exit code {exitcode})"
+        print(f"❌ {message}")
+        with self.lock:
+            del self.alive[index]
+            taken = self.taken[index]
+            failed = [self.pending.pop(request_id, None) for request_id in taken[1:taken[0] + 1]]
+            if not self.alive:
+                # Nobody is left to take the queued requests either
+                self.error = f"all TTS workers have exited; last: {message}"
+                failed += list(self.pending.values())
+                self.pending.clear()
+        for request in failed:
+            if request is not None:
+                request.future.set_exception(RuntimeError(message))
+
+    def memory(self):
+        """
+        Resident and proportional set size per worker in MB (Linux only).
+        PSS splits shared pages between the processes mapping them, so it
+        shows what each worker really adds.
+        """
+        usage = []
+        for process in self.processes:
+            fields = {}
+            try:
+                with open(f"/proc/{process.pid}/smaps_rollup") as f:
+                    for line in f:
+                        parts = line.split()
+                        if parts[0] in ("Rss:", "Pss:"):
+                            fields[parts[0][:-1].lower() + "_mb"] = int(parts[1]) / 1024
+            except OSError:
+                pass
+            usage.append({"pid": process.pid, **fields})
+        return usage
+
+    def stats(self):
+        """Same keys as MicroBatcher.stats(), plus per-worker request counts."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        batches = self.batches
+        return {
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "batches": batches,
+            "avg_batch_size": self.requests / batches if batches else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "workers": len(self.processes),
+            "workers_alive": len(getattr(self, "alive", ())),
+            "threads_per_worker": self.threads_per_worker,
+            "per_worker": list(self.per_worker),
+        }
+
+    def close(self):
+        if not self.processes:
+            return
+        self.closing = True
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.results.put(None)
@@ -5,39 +5,341 @@ Uses Transformers library - works perfectly on Colab
 No binary permissions issues!
 """
 
-import torch
-import gradio as gr
-import scipy.io.wavfile
-import tempfile
+# torch, transformers and gradio are imported where they are used, so
+# the server (and its health check) can come up before they finish loading
+import argparse
+import asyncio
+import importlib.util
 import os
+import threading
+import time
 from pathlib import Path
 
+import metrics
+from tts_backends import BACKENDS, configure_threads, create_backend
+from tts_batching import MicroBatcher
+from tts_bulk import load_summary, run_bulk, source_names, write_summary
+from tts_api import SpeechApi
+from tts_cache import DEFAULT_CACHE_DIR, AudioCache, cache_key
+from tts_encoding import FORMATS, AudioEncoder
+from tts_startup import BackgroundLoader, HealthServer
+from tts_streaming import stream_speech
+from tts_text import TokenCache, normalize_text
+from tts_workers import WorkerPool
+
 # Global variables for model
 model = None
 tokenizer = None
+device = None
+inference = None
+loader = None
+batcher = None
+audio_cache = None
+encoder = None
+token_cache = None
 MODEL_NAME = "facebook/mms-tts-vie"
 
+# Lower noise = less randomness, fewer skipped words / more stable durations
+NOISE_SCALE = 0.3
+NOISE_SCALE_DURATION = 0.5
+SEED = 42
+
+# Requests arriving within MAX_WAIT seconds share one forward pass
+MAX_BATCH_SIZE = 16
+MAX_WAIT = 0.025
+
+# Generated audio is reused across requests; the directory is size-capped
+CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", DEFAULT_CACHE_DIR))
+CACHE_MAX_MB = int(os.environ.get("TTS_CACHE_MB", "512"))
+
+# Output is int16 PCM encoded by ffmpeg (WAV without it); the encode pool
+# also caps how many ffmpeg processes run at once
+AUDIO_FORMAT = os.environ.get("TTS_AUDIO_FORMAT", "mp3")
+AUDIO_BITRATE = os.environ.get("TTS_AUDIO_BITRATE")
+ENCODE_WORKERS = 2
+
+# Input ids of recently seen normalized texts, so drill phrases skip the tokenizer
+TOKEN_CACHE_ITEMS = 4096
+
+# Cache misses the HTTP API lets queue for the model before answering 503
+API_MAX_PENDING = 64
 
-def load_model():
-    """Load MMS Vietnamese TTS model"""
-    global model, tokenizer
+# Streaming mode: longest chunk per forward pass and crossfade at each join
+STREAM_MAX_CHARS = 160
+STREAM_FADE_MS = 30
+
+# How long a request waits for a model that is still loading
+MODEL_READY_TIMEOUT = 120
+WARM_UP_TEXT = "Xin chào."
+
+# Input-length buckets (characters) labelling the synthesis latency histogram
+LENGTH_BUCKETS = (50, 100, 200)
+
+
+def load_model(snapshot=None, backend="fp32", threads=None, cpu_only=False):
+    """
+    Load MMS Vietnamese TTS model.
+    With a snapshot path, the model and tokenizer are unpickled from it
+    (memory-mapped), which is much faster than from_pretrained; the
+    snapshot is written on the first load if it does not exist yet.
+    backend picks the inference path (see tts_backends.py); everything
+    but fp32 runs on CPU, as does a model shared with forked workers.
+    """
+    global model, tokenizer, device, inference
 
     if model is not None:
         print("✓ Model already loaded")
         return
 
-    print(f"📥 Loading {MODEL_NAME}...")
+    import torch
+
+    start = time.perf_counter()
+    if snapshot and Path(snapshot).exists():
+        print(f"📥 Loading snapshot {snapshot}...")
+        state = torch.load(snapshot, map_location="cpu", weights_only=False, mmap=True)
+        loaded_model, loaded_tokenizer = state["model"], state["tokenizer"]
+    else:
+        print(f"📥 Loading {MODEL_NAME}...")
+
+        from transformers import VitsModel, AutoTokenizer
+
+        loaded_tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        loaded_model = VitsModel.from_pretrained(MODEL_NAME)
+        loaded_model.eval()
+
+        if snapshot:
+            tmp_path = Path(f"{snapshot}.tmp")
+            torch.save({"model": loaded_model, "tokenizer": loaded_tokenizer}, tmp_path)
+            os.replace(tmp_path, snapshot)
+            print(f"💾 Saved snapshot {snapshot}")
+
+    # Move to GPU if available; the optimized backends are CPU-only
+    use_cuda = backend == "fp32" and not cpu_only and torch.cuda.is_available()
+    device = "cuda" if use_cuda else "cpu"
+    if device == "cpu":
+        print(f"🧵 {configure_threads(threads)} intra-op threads")
+
+    loaded_model = loaded_model.to(device)
+    loaded_inference = create_backend(
+        backend, loaded_model, loaded_tokenizer, NOISE_SCALE, NOISE_SCALE_DURATION, threads
+    )
+
+    # Publish the inference backend last: it is what requests run on
+    tokenizer = loaded_tokenizer
+    model = loaded_model
+    inference = loaded_inference
+
+    print(f"✓ Model loaded on {device} ({backend}) in {time.perf_counter() - start:.1f}s")
+
+
+def warm_up():
+    """One short inference so the first real request skips lazy init costs."""
+    start = time.perf_counter()
+    synthesize_batch([WARM_UP_TEXT], [SEED])
+    print(f"🔥 Warm-up inference in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+def start_workers(workers, threads=None):
+    """
+    Fork worker processes that share the loaded weights and serve requests
+    in place of the in-process batcher. Call before any inference runs here.
+    """
+    global batcher
+
+    start = time.perf_counter()
+    batcher = WorkerPool(
+        synthesize_batch,
+        workers=workers,
+        threads_per_worker=threads,
+        max_batch_size=MAX_BATCH_SIZE,
+        warm_up_text=WARM_UP_TEXT
+    )
+    memory = batcher.memory()
+    pss = sum(usage.get("pss_mb", 0) for usage in memory)
+    print(f"👷 {workers} workers x {batcher.threads_per_worker} threads ready in "
+          f"{time.perf_counter() - start:.1f}s"
+          + (f", {pss:.0f}MB proportional memory in total" if pss else ""))
+    return batcher
+
+
+def start_background_load(workers=1, **load_options):
+    """
+    Load and warm up the model on a thread; returns the loader. With
+    several workers, the model is loaded and the workers forked on the
+    calling thread instead: call this before starting any other thread,
+    since forking a multithreaded process can deadlock the children.
+    """
+    global loader
+
+    if workers > 1:
+        def load():
+            load_model(cpu_only=True, **load_options)
+            start_workers(workers, load_options.get("threads"))
+
+        # Each worker runs its own warm-up inference before reporting ready
+        loader = BackgroundLoader(load).run()
+    else:
+        loader = BackgroundLoader(lambda: load_model(**load_options), warm_up).start()
+    return loader
+
+
+def wait_for_model(timeout=MODEL_READY_TIMEOUT):
+    """True once the model can serve requests."""
+    if loader is None:
+        return inference is not None
+    return loader.wait(timeout)
+
+
+def synthesize_batch(texts, seeds):
+    """
+    Synthesize several texts in one padded forward pass.
+    Returns one float32 numpy waveform per text, trimmed to its own length.
+    """
+    # Normalize, then pad cached input ids so the whole batch goes through at once
+    with metrics.timer("tts.tokenize"):
+        inputs = get_token_cache().batch([normalize_text(text) for text in texts])
+
+    # The backend keeps each request's noise independent of its batch mates
+    with metrics.timer("tts.forward"):
+        waveforms, lengths = inference(inputs, seeds)
+    return [waveform[:length] for waveform, length in zip(waveforms, lengths)]
+
+
+def process_batch(requests):
+    """MicroBatcher callback: one forward pass for all queued requests."""
+    return synthesize_batch(
+        [request.text for request in requests],
+        [request.seed for request in requests]
+    )
+
+
+def get_batcher():
+    """Start the micro-batching worker on first use."""
+    global batcher
+
+    if batcher is None:
+        batcher = MicroBatcher(process_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT)
+    return batcher
+
+
+def get_token_cache():
+    """Token cache for the loaded tokenizer, created on first use (per worker process)."""
+    global token_cache
 
-    from transformers import VitsModel, AutoTokenizer
+    if token_cache is None:
+        token_cache = TokenCache(tokenizer, max_items=TOKEN_CACHE_ITEMS)
+    return token_cache
 
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = VitsModel.from_pretrained(MODEL_NAME)
 
-    # Move to GPU if available
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = model.to(device)
+def get_audio_cache():
+    """Open the audio cache on first use."""
+    global audio_cache
 
-    print(f"✓ Model loaded on {device}")
+    if audio_cache is None:
+        audio_cache = AudioCache(CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024,
+                                 suffix=get_encoder().suffix)
+    return audio_cache
+
+
+def get_encoder(fmt=None, bitrate=None):
+    """Start the background audio encoder on first use; WAV if ffmpeg is missing."""
+    global encoder
+
+    if encoder is None:
+        try:
+            encoder = AudioEncoder(fmt or AUDIO_FORMAT, bitrate or AUDIO_BITRATE,
+                                   workers=ENCODE_WORKERS)
+        except RuntimeError as e:
+            print(f"⚠️ {e}; writing WAV instead")
+            encoder = AudioEncoder("wav", workers=ENCODE_WORKERS)
+    return encoder
+
+
+def speech_cache_key(text):
+    """Cache key covering everything that changes the generated audio."""
+    return cache_key(
+        normalize_text(text),
+        model=MODEL_NAME,
+        noise_scale=NOISE_SCALE,
+        noise_scale_duration=NOISE_SCALE_DURATION,
+        seed=SEED,
+        audio_format=get_encoder().name,
+        bitrate=get_encoder().bitrate
+    )
+
+
+def length_bucket(text):
+    """Coarse input-length label for the synthesis latency histogram."""
+    for limit in LENGTH_BUCKETS:
+        if len(text) < limit:
+            return f"<{limit}"
+    return f"{LENGTH_BUCKETS[-1]}+"
+
+
+def encode_speech(text):
+    """
+    Synthesize text through the batcher and encode it on the encode pool.
+    Returns (encoded bytes, synthesis latency, batch request).
+    """
+    waveform, latency, request = get_batcher().submit(text, seed=SEED)
+    metrics.observe("tts_synthesis_seconds", latency, chars=length_bucket(text))
+
+    with metrics.timer("tts.encode"):
+        data = get_encoder().submit(waveform, model.config.sampling_rate).result()
+    return data, latency, request
+
+
+def speech_bytes(text, persist=False):
+    """
+    Encoded audio for text as (bytes, MIME type), without touching the
+    filesystem unless persist is set: served from the cache's memory or
+    disk tier, or synthesized and kept in memory. Raises TimeoutError
+    while the model is still loading.
+    """
+    data = cached_speech(speech_cache_key(text))
+    if data is None:
+        data = store_speech(text, persist)
+    return data, get_encoder().mime_type
+
+
+def cached_speech(key):
+    """Cached encoded audio for a speech cache key, or None."""
+    data = get_audio_cache().get(key)
+    metrics.count("tts_cache_requests_total", result="miss" if data is None else "hit")
+    return data
+
+
+def store_speech(text, persist=True):
+    """
+    Synthesize and encode text, store it in the cache and return the bytes.
+    Raises TimeoutError while the model is still loading.
+    """
+    if not wait_for_model():
+        raise TimeoutError("model is still loading")
+    data, _, _ = encode_speech(text)
+    get_audio_cache().put(speech_cache_key(text), data, persist=persist)
+    return data
+
+
+def speech_stream_bytes(text):
+    """
+    Encoded audio for text, yielded as it is synthesized chunk by chunk and
+    piped through one ffmpeg process. Raises TimeoutError while the model
+    is still loading.
+    """
+    if not wait_for_model():
+        raise TimeoutError("model is still loading")
+
+    sample_rate = model.config.sampling_rate
+    speech_batcher = get_batcher()
+    pieces = stream_speech(
+        normalize_text(text),
+        synthesize=lambda chunk: speech_batcher.submit(chunk, seed=SEED)[0],
+        sample_rate=sample_rate,
+        max_chars=STREAM_MAX_CHARS,
+        fade_ms=STREAM_FADE_MS
+    )
+    return get_encoder().stream((piece for piece, _ in pieces), sample_rate)
 
 
 def generate_speech(text):
@@ -46,51 +348,126 @@ def generate_speech(text):
         return None, "⚠️ Please enter some text"
 
     try:
+        # Repeated phrases are served straight from the cache
+        start = time.perf_counter()
+        cache = get_audio_cache()
+        key = speech_cache_key(text)
+        cached_file = cache.path(key)
+        metrics.count("tts_cache_requests_total", result="miss" if cached_file is None else "hit")
+        if cached_file is not None:
+            file_size = os.path.getsize(cached_file) / 1024
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"♻️ Cached: {text[:50]} ({elapsed:.2f}ms)")
+            return str(cached_file), f"♻️ Cached {file_size:.1f}KB audio | {elapsed:.2f}ms"
+
+        if not wait_for_model():
+            return None, "⏳ Model is still loading, please try again shortly"
+
         print(f"🎤 Generating: {text[:50]}...")
 
-        # Tokenize input
-        inputs = tokenizer(text, return_tensors="pt")
+        # Queue for the next batched forward pass, then encode in memory
+        # and store the result in the cache
+        data, latency, request = encode_speech(text)
+        output_file = cache.put(key, data)
+
+        file_size = len(data) / 1024
+        audio_format = get_encoder().name.upper()
+        print(f"✓ Generated {file_size:.1f}KB {audio_format} in {latency * 1000:.0f}ms "
+              f"(batch of {request.batch_size}, queue depth {request.queue_depth})")
+
+        return str(output_file), (
+            f"✅ Generated {file_size:.1f}KB {audio_format} audio at "
+            f"{model.config.sampling_rate}Hz | "
+            f"{latency * 1000:.0f}ms, batch of {request.batch_size}, "
+            f"queue depth {request.queue_depth}"
+        )
 
-        # Move to same device as model
-        device = next(model.parameters()).device
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return None, f"❌ Error: {str(e)}"
 
-        # Set seed for reproducibility
-        torch.manual_seed(42)
 
-        # Generate speech with reduced noise for better word preservation
-        with torch.no_grad():
-            output = model(
-                **inputs,
-                noise_scale=0.3,  # Lower = less randomness, fewer skipped words
-                noise_scale_duration=0.5  # Lower = more stable durations
-            ).waveform
+def generate_speech_stream(text):
+    """
+    Stream Vietnamese speech sentence by sentence.
+    Yields (sample_rate, waveform piece) for a streaming gr.Audio plus a
+    status line, starting as soon as the first chunk is synthesized.
+    """
+    if not text or not text.strip():
+        yield None, "⚠️ Please enter some text"
+        return
 
-        # Move to CPU and convert to numpy
-        waveform = output.cpu().squeeze().numpy()
+    try:
+        import gradio as gr
 
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            output_file = tmp.name
+        if not wait_for_model():
+            yield None, "⏳ Model is still loading, please try again shortly"
+            return
 
-        # Write WAV file
         sample_rate = model.config.sampling_rate
-        scipy.io.wavfile.write(output_file, rate=sample_rate, data=waveform)
-
-        file_size = os.path.getsize(output_file) / 1024
-        print(f"✓ Generated {file_size:.1f}KB audio")
+        speech_batcher = get_batcher()
+        pieces = stream_speech(
+            normalize_text(text),
+            synthesize=lambda chunk: speech_batcher.submit(chunk, seed=SEED)[0],
+            sample_rate=sample_rate,
+            max_chars=STREAM_MAX_CHARS,
+            fade_ms=STREAM_FADE_MS
+        )
 
-        return output_file, f"✅ Generated {file_size:.1f}KB audio at {sample_rate}Hz"
+        stats = None
+        for piece, stats in pieces:
+            yield (sample_rate, piece), (
+                f"🔊 Streaming {stats.chunks} chunks | "
+                f"first audio after {stats.first_chunk_s * 1000:.0f}ms | "
+                f"{stats.audio_s:.1f}s of audio so far"
+            )
+
+        if stats is not None:
+            print(f"✓ Streamed {stats.chunks} chunks, {stats.audio_s:.1f}s of audio: "
+                  f"first chunk {stats.first_chunk_s * 1000:.0f}ms, total {stats.total_s:.1f}s")
+            # Leave the stream as it is and only update the status line
+            yield gr.update(), (
+                f"✅ Streamed {stats.audio_s:.1f}s of audio in {stats.chunks} chunks | "
+                f"first audio after {stats.first_chunk_s * 1000:.0f}ms, "
+                f"total {stats.total_s * 1000:.0f}ms"
+            )
 
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
-        return None, f"❌ Error: {str(e)}"
+        yield None, f"❌ Error: {str(e)}"
+
+
+def model_info():
+    """Model details for the UI footer; the device is known once loading finishes."""
+    if device is not None:
+        device_info = "🎮 GPU" if device == "cuda" else f"💻 CPU ({inference.name})"
+    elif loader is not None and loader.state == "failed":
+        device_info = "❌ Model failed to load"
+    else:
+        device_info = "⏳ Loading..."
+
+    cache_info = ""
+    if token_cache is not None:
+        stats = token_cache.stats()
+        cache_info = f"\n        **Token cache**: {stats['hit_rate']:.0%} hits, {stats['items']} phrases"
+
+    return f"""
+        ---
+        **Model**: {MODEL_NAME}
+        **Architecture**: VITS (Facebook MMS)
+        **Language**: Vietnamese (vi-VN)
+        **Device**: {device_info}
+        **Quality**: High (16kHz){cache_info}
+        """
 
 
 def create_ui():
     """Create Gradio interface"""
+    import gradio as gr
 
     examples = [
         ["Xin chào! Tôi là trợ lý giọng nói tiếng Việt của bạn."],
@@ -124,6 +501,7 @@ def create_ui():
 
                 with gr.Row():
                     generate_btn = gr.Button("🔊 Generate Speech", variant="primary", size="lg")
+                    stream_btn = gr.Button("📡 Stream", size="lg")
                     clear_btn = gr.ClearButton([text_input], value="🗑️ Clear")
 
                 status_output = gr.Textbox(
@@ -138,6 +516,12 @@ def create_ui():
                     type="filepath",
                     autoplay=True
                 )
+                # Long passages start playing after the first sentence
+                stream_output = gr.Audio(
+                    label="Streamed Audio",
+                    streaming=True,
+                    autoplay=True
+                )
 
         gr.Markdown("### 📝 Example Texts (click to use)")
         gr.Examples(
@@ -146,50 +530,199 @@ def create_ui():
             label=None
         )
 
-        device_info = "🎮 GPU" if torch.cuda.is_available() else "💻 CPU"
-
-        gr.Markdown(f"""
-        ---
-        **Model**: {MODEL_NAME}
-        **Architecture**: VITS (Facebook MMS)
-        **Language**: Vietnamese (vi-VN)
-        **Device**: {device_info}
-        **Quality**: High (16kHz)
-        """)
+        # Filled in on page load, so it reflects the background loader
+        info_output = gr.Markdown(model_info())
+        demo.load(fn=model_info, outputs=info_output)
 
+        # Let concurrent clicks reach the batcher instead of queueing in Gradio
         generate_btn.click(
             fn=generate_speech,
             inputs=text_input,
-            outputs=[audio_output, status_output]
+            outputs=[audio_output, status_output],
+            concurrency_limit=MAX_BATCH_SIZE * 2
+        )
+        stream_btn.click(
+            fn=generate_speech_stream,
+            inputs=text_input,
+            outputs=[stream_output, status_output],
+            concurrency_limit=MAX_BATCH_SIZE * 2
         )
 
     return demo
 
 
+def write_audio_file(path, waveform):
+    """Encode and write one file atomically, so an interrupted bulk run never leaves a partial file."""
+    data = get_encoder().encode(waveform, model.config.sampling_rate)
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def run_bulk_generation(sources, output_dir, batch_size):
+    """Synthesize every text in the given item files / vocab lists."""
+    output_dir = Path(output_dir)
+    summary_file = output_dir / "generation-summary.json"
+    previous = {entry['source']: entry
+                for entry in load_summary(summary_file).get('files_processed', [])}
+    entries = []
+
+    for source_file, name in zip(sources, source_names(sources)):
+        entry = run_bulk(
+            source_file,
+            output_dir / name,
+            source=name,
+            synthesize=lambda texts: synthesize_batch(texts, [SEED] * len(texts)),
+            write_audio=write_audio_file,
+            sample_rate=model.config.sampling_rate,
+            batch_size=batch_size,
+            suffix=get_encoder().suffix,
+            previous=previous.get(name)
+        )
+        entries.append(entry)
+        print(f"✓ {entry['count']} files, {entry['total_size_kb'] / 1024:.1f}MB, "
+              f"{entry['total_duration_s'] / 60:.1f} min of audio")
+
+    summary = write_summary(summary_file, MODEL_NAME, entries)
+    print(f"\n📄 {summary['total_files']} files summarized in {summary_file}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vietnamese TTS - Facebook MMS")
+    parser.add_argument("--bulk", nargs="+", metavar="FILE",
+                        help="generate audio for data/translated.json or vocablist files, then exit")
+    parser.add_argument("--output-dir", default="audio/vietnamese",
+                        help="bulk output directory (default: audio/vietnamese)")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help="texts per forward pass in bulk mode")
+    parser.add_argument("--format", choices=FORMATS, default=AUDIO_FORMAT,
+                        help="audio output format; opus/mp3 need ffmpeg (default: %(default)s)")
+    parser.add_argument("--bitrate",
+                        help="encoder bitrate, e.g. 24k (default: per format)")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="pickled model snapshot; loads faster than from_pretrained, "
+                             "written on first run")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.environ.get("TTS_BACKEND", "fp32"),
+                        help="inference backend; int8/torchscript/onnx are CPU optimizations")
+    parser.add_argument("--threads", type=int,
+                        help="torch intra-op threads on CPU, per worker with --workers "
+                             "(default: physical cores, split between workers)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="fork this many CPU worker processes sharing one copy of the weights")
+    parser.add_argument("--api-port", type=int, default=7862,
+                        help="port for the HTTP synthesis API (0 disables it)")
+    parser.add_argument("--api-max-pending", type=int, default=API_MAX_PENDING,
+                        help="syntheses the API queues before answering 503")
+    parser.add_argument("--no-ui", action="store_true",
+                        help="serve only the HTTP API, without Gradio")
+    parser.add_argument("--health-port", type=int, default=7861,
+                        help="port for the /health readiness endpoint (0 disables it)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record stage timings and cache hit rates, served on "
+                             "/metrics of the health port")
+    args = parser.parse_args()
+    if args.workers > 1 and args.backend == "onnx":
+        parser.error("--workers needs a torch backend; onnxruntime sessions do not survive fork")
+    if args.no_ui and not args.api_port and not args.bulk:
+        parser.error("--no-ui needs the HTTP API (--api-port)")
+    return args
+
+
+def create_api(port, max_pending=API_MAX_PENDING):
+    """HTTP API over the shared cache, batcher and encoder."""
+    return SpeechApi(
+        key_for=speech_cache_key,
+        cached=cached_speech,
+        synthesize=store_speech,
+        mime_type=get_encoder().mime_type,
+        is_ready=lambda: inference is not None,
+        queue_depth=lambda: batcher.queue_depth if batcher is not None else 0,
+        port=port,
+        max_pending=max_pending
+    )
+
+
+def report_ready():
+    """Print time-to-ready once the background load finishes."""
+    try:
+        loader.wait()
+    except RuntimeError as e:
+        print(f"\n❌ {e}")
+        return
+    timings = loader.status()
+    print(f"\n✅ Ready in {timings['time_to_ready_s']:.1f}s "
+          f"(load {timings['load_s']:.1f}s, warm-up {timings.get('warm_up_s', 0.0):.1f}s)")
+
+
 def main():
+    args = parse_args()
+    if args.metrics:
+        metrics.enable()
+
     print("=" * 60)
     print("Vietnamese TTS - Facebook MMS")
     print("=" * 60)
 
-    # Check dependencies
-    try:
-        from transformers import VitsModel, AutoTokenizer
-        import scipy
-    except ImportError as e:
-        print(f"\n❌ Missing dependency: {e}")
+    # Check dependencies without paying for their imports
+    missing = [name for name in ["transformers", "torch"] if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"\n❌ Missing dependency: {', '.join(missing)}")
         print("\nInstall with:")
-        print("  pip install transformers torch scipy gradio")
+        print("  pip install transformers torch gradio")
         return
 
-    print("\n📦 Loading model...")
-    try:
-        load_model()
-    except Exception as e:
-        print(f"\n❌ Failed to load model: {e}")
-        import traceback
-        traceback.print_exc()
+    # Gradio is only needed for the UI; the HTTP API runs without it
+    ui = not args.bulk and not args.no_ui
+    if ui and importlib.util.find_spec("gradio") is None:
+        if not args.api_port:
+            print("\n❌ Missing dependency: gradio (or use --api-port without the UI)")
+            return
+        print("\n⚠️ gradio is not installed; serving the HTTP API only")
+        ui = False
+
+    output = get_encoder(args.format, args.bitrate)
+    print(f"🎵 Output: {output.name}" + (f" at {output.bitrate}bps" if output.name != "wav" else ""))
+
+    if args.bulk:
+        print("\n📦 Loading model...")
+        try:
+            load_model(args.snapshot, args.backend, args.threads)
+        except Exception as e:
+            print(f"\n❌ Failed to load model: {e}")
+            import traceback
+            traceback.print_exc()
+            return
+
+        print("\n📚 Bulk generation...")
+        run_bulk_generation(args.bulk, args.output_dir, args.batch_size)
         return
 
+    # Serve immediately; requests wait for the background load to finish.
+    # Worker processes are forked first, while this is the only thread.
+    print("\n📦 Loading model" + (" and forking workers..." if args.workers > 1
+                                  else " in the background..."))
+    start_background_load(
+        workers=args.workers,
+        snapshot=args.snapshot,
+        backend=args.backend,
+        threads=args.threads
+    )
+
+    if args.health_port:
+        health = HealthServer(loader, port=args.health_port).start()
+        print(f"💓 Health check on http://0.0.0.0:{health.port}/health")
+
+    threading.Thread(target=report_ready, name="ready-report", daemon=True).start()
+
+    if args.api_port:
+        api = create_api(args.api_port, args.api_max_pending)
+        print(f"🔌 HTTP API on http://0.0.0.0:{args.api_port}/tts")
+        if not ui:
+            asyncio.run(api.serve_forever())
+            return
+        threading.Thread(target=asyncio.run, args=(api.serve_forever(),),
+                         name="tts-api", daemon=True).start()
+
     print("\n🚀 Starting Gradio server...")
     demo = create_ui()
     demo.launch(
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Compact indexed store of the vocablist/ word lists.
+
+Every `N. word: (type) translation /ipa/` line of vocablist/*.txt|*.md is
+parsed in one streaming pass into columns: interned headwords, part of
+speech codes and source numbers in typed arrays, and translations/IPA
+packed into one string each with array-backed offsets. Indexes by
+headword, part of speech, source list and IPA make any lookup O(1)
+across all lists. The built store is cached as a pickle and rebuilt only
+when a list changes.
+
+Usage:
+    python vocab_store.py flood
+    python vocab_store.py --pos adv
+    python vocab_store.py --source grade-9/unit1
+"""
+
+import argparse
+import os
+import pickle
+import re
+import sys
+import time
+from array import array
+from pathlib import Path
+
+VOCAB_DIR = Path(__file__).parent / 'vocablist'
+DEFAULT_CACHE = Path(__file__).parent / 'data' / 'vocab-store.pickle'
+
+# Optional "N." numbering; grade-7 lists have none
+LINE_RE = re.compile(
+    r'^\s*(?:\d+\.\s*)?(?P<word>[^:/]+?)\s*:\s*(?P<translation>.*?)\s*(?:/(?P<ipa>[^/]*)/)?\s*$'
+)
+MARKER_RE = re.compile(r'\(([^()]*)\)')
+POS_TAGS = {'n', 'v', 'adj', 'adv', 'exp', 'prep', 'pron', 'conj', 'det', 'phr', 'phr v',
+            'phrasal verb', 'idiom', 'interj', 'plural', 'n phr'}
+
+
+def vocab_files(directory=VOCAB_DIR):
+    """Every word list under directory, in a stable order."""
+    return sorted(p for p in Path(directory).rglob('*') if p.suffix in ('.txt', '.md'))
+
+
+def normalize_headword(word):
+    """Index key: lowercased, without notes such as "hurt (hurt - hurt)"."""
+    return ' '.join(MARKER_RE.sub(' ', word).lower().split())
+
+
+def parse_translation(text):
+    """
+    Split "(n) lũ lụt (v) ngập lụt" into (('n', 'v'), 'lũ lụt, ngập lụt').
+    Parentheses that are not part-of-speech markers, like irregular forms
+    "(hurt - hurt)", stay in the translation.
+    """
+    tags = []
+
+    def strip_marker(match):
+        parts = [part.strip() for part in match.group(1).split(',')]
+        if parts and all(part in POS_TAGS for part in parts):
+            tags.extend(part for part in parts if part not in tags)
+            return ', '
+        return match.group(0)
+
+    translation = MARKER_RE.sub(strip_marker, text)
+    translation = ' '.join(translation.replace(' ,', ',').split()).strip(' ,')
+    translation = re.sub(r',(\s*,)+', ',', translation)
+    return tuple(tags), translation
+
+
+class VocabEntry:
+    """One word-list line, materialized from the store's columns."""
+
+    __slots__ = ('index', 'headword', 'pos', 'translation', 'ipa', 'source', 'line')
+
+    def __init__(self, index, headword, pos, translation, ipa, source, line):
+        self.index = index
+        self.headword = headword
+        self.pos = pos
+        self.translation = translation
+        self.ipa = ipa
+        self.source = source
+        self.line = line
+
+    def __repr__(self):
+        pos = f" ({', '.join(self.pos)})" if self.pos else ''
+        ipa = f" /{self.ipa}/" if self.ipa else ''
+        return f"<{self.source}:{self.line} {self.headword}:{pos} {self.translation}{ipa}>"
+
+
+class VocabStore:
+    """
+    Columnar store of word-list entries.
+
+    Entry i is headwords[i] plus slices of the packed translation/IPA
+    strings, a part-of-speech combination code and a source number; the
+    indexes map a key to the ids of its entries.
+    """
+
+    def __init__(self):
+        self.headwords = []
+        self.sources = []               # source number -> list name, e.g. 'grade-9/unit1'
+        self.pos_codes = []             # code -> tuple of tags, e.g. ('n', 'v')
+        self.entry_pos = array('H')
+        self.entry_source = array('H')
+        self.entry_line = array('I')
+        self.translation_offsets = array('I', [0])
+        self.ipa_offsets = array('I', [0])
+        self.translations = ''
+        self.ipas = ''
+        self.by_headword = {}
+        self.by_pos = {}
+        self.by_source = {}
+        self.by_ipa = {}
+        self.signature = None
+
+    def __len__(self):
+        return len(self.headwords)
+
+    @classmethod
+    def build(cls, files=None, root=VOCAB_DIR):
+        """Parse every list in one pass, line by line."""
+        store = cls()
+        files = list(files) if files is not None else vocab_files(root)
+        pos_lookup = {}
+        translations = []
+        ipas = []
+        translation_end = ipa_end = 0
+
+        for path in files:
+            path = Path(path)
+            try:
+                source = path.relative_to(root).with_suffix('').as_posix()
+            except ValueError:
+                source = path.stem
+            source_number = len(store.sources)
+            store.sources.append(sys.intern(source))
+            first = len(store.headwords)
+
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    match = LINE_RE.match(line)
+                    if not match:
+                        continue
+                    pos, translation = parse_translation(match.group('translation'))
+                    if not translation:
+                        continue
+
+                    index = len(store.headwords)
+                    headword = sys.intern(match.group('word').strip())
+                    ipa = (match.group('ipa') or '').strip()
+
+                    code = pos_lookup.get(pos)
+                    if code is None:
+                        code = pos_lookup[pos] = len(store.pos_codes)
+                        store.pos_codes.append(pos)
+
+                    store.headwords.append(headword)
+                    store.entry_pos.append(code)
+                    store.entry_source.append(source_number)
+                    store.entry_line.append(line_number)
+                    translations.append(translation)
+                    translation_end += len(translation)
+                    store.translation_offsets.append(translation_end)
+                    ipas.append(ipa)
+                    ipa_end += len(ipa)
+                    store.ipa_offsets.append(ipa_end)
+
+                    store.by_headword.setdefault(normalize_headword(headword), array('I')).append(index)
+                    for tag in pos:
+                        store.by_pos.setdefault(tag, array('I')).append(index)
+                    if ipa:
+                        store.by_ipa.setdefault(ipa, array('I')).append(index)
+
+            # Entries of one list are contiguous: a range is enough
+            store.by_source[source] = (first, len(store.headwords))
+
+        store.translations = ''.join(translations)
+        store.ipas = ''.join(ipas)
+        store.signature = files_signature(files)
+        return store
+
+    def entry(self, index):
+        return VocabEntry(
+            index,
+            self.headwords[index],
+            self.pos_codes[self.entry_pos[index]],
+            self.translations[self.translation_offsets[index]:self.translation_offsets[index + 1]],
+            self.ipas[self.ipa_offsets[index]:self.ipa_offsets[index + 1]],
+            self.sources[self.entry_source[index]],
+            self.entry_line[index]
+        )
+
+    def lookup(self, word):
+        """Entries for a headword across all lists (case-insensitive)."""
+        return [self.entry(i) for i in self.by_headword.get(normalize_headword(word), ())]
+
+    def translate(self, word):
+        """First translation of word in any list, or None."""
+        ids = self.by_headword.get(normalize_headword(word))
+        return self.entry(ids[0]).translation if ids else None
+
+    def with_pos(self, tag):
+        return [self.entry(i) for i in self.by_pos.get(tag, ())]
+
+    def with_ipa(self, ipa):
+        return [self.entry(i) for i in self.by_ipa.get(ipa.strip('/ '), ())]
+
+    def in_source(self, source):
+        """Entries of one list, e.g. 'Quynh' or 'grade-9/unit1', in file order."""
+        first, end = self.by_source.get(source, (0, 0))
+        return [self.entry(i) for i in range(first, end)]
+
+    def save(self, path=DEFAULT_CACHE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            # Plain columns only, so the pickle does not depend on how this
+            # module was imported (as a script it is __main__)
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CACHE):
+        store = cls()
+        with open(path, 'rb') as f:
+            store.__dict__.update(pickle.load(f))
+        store.headwords = [sys.intern(headword) for headword in store.headwords]
+        return store
+
+
+def files_signature(files):
+    """Paths, sizes and mtimes: changes whenever a list is edited, added or removed."""
+    signature = []
+    for path in files:
+        stat = os.stat(path)
+        signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_store(root=VOCAB_DIR, cache=DEFAULT_CACHE):
+    """The cached store if it matches the lists on disk, else a fresh build (saved)."""
+    files = vocab_files(root)
+    signature = files_signature(files)
+    if cache and Path(cache).exists():
+        try:
+            store = VocabStore.load(cache)
+            if store.signature == signature:
+                return store
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+
+    store = VocabStore.build(files, root)
+    if cache:
+        try:
+            store.save(cache)
+        except OSError:
+            pass  # read-only checkout: the store still works, just uncached
+    return store
+
+
+_shared = None
+
+
+def shared_store():
+    """One store per process, loaded on first use."""
+    global _shared
+    if _shared is None:
+        _shared = load_store()
+    return _shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('word', nargs='?', help='headword to look up')
+    parser.add_argument('--pos', help='list entries with this part of speech')
+    parser.add_argument('--ipa', help='list entries with this IPA')
+    parser.add_argument('--source', help="list one word list, e.g. 'grade-9/unit1'")
+    parser.add_argument('--rebuild', action='store_true', help='ignore the cached store')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = VocabStore.build() if args.rebuild else load_store()
+    if args.rebuild:
+        store.save()
+    elapsed = time.perf_counter() - start
+    print(f"{len(store)} entries from {len(store.sources)} lists "
+          f"({len(store.by_headword)} headwords, {elapsed * 1000:.1f} ms)")
+
+    if args.word:
+        entries = store.lookup(args.word)
+    elif args.pos:
+        entries = store.with_pos(args.pos)
+    elif args.ipa:
+        entries = store.with_ipa(args.ipa)
+    elif args.source:
+        entries = store.in_source(args.source)
+    else:
+        return
+
+    for entry in entries:
+        print(entry)
+    if not entries:
+        print("(not found)")
+
+
+if __name__ == '__main__':
+    main()